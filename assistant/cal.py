@@ -1,3 +1,6 @@
+import time
+
+from core.metrics import Metrics
 from assistant.voice_io import VoiceIO
 from assistant.persona_engine import PersonaEngine
 from assistant.nlu import NLU
@@ -6,6 +9,8 @@ from assistant.dialog_manager import DialogManager
 class Assistant:
     def __init__(self, workspace, core, model_path=None, persona_path=None):
         self.core = core
+        # reply latency, kept apart from core.metrics() so per-plugin figures stay plugin-only
+        self.reply_metrics = Metrics()
         self.voice = VoiceIO()
         self.persona = PersonaEngine(persona_path=persona_path, model_path=model_path)
         self.nlu = NLU(core, persona_engine=self.persona)
@@ -21,14 +26,19 @@ class Assistant:
                 if text.strip().lower() in ('exit','quit','stop'):
                     self.voice.speak("Goodbye.")
                     break
+                started = time.perf_counter()
                 res = self.dialog.handle_utterance(text)
-                if res is None:
-                    # fallback persona small talk
-                    reply = self.persona.decorate(text, None)
-                    self.voice.speak(reply)
-                else:
-                    # decorate plugin response
-                    decorated = self.persona.decorate(text, res)
-                    self.voice.speak(decorated)
+                dialog = time.perf_counter() - started
+                # decorate the plugin response (or persona small talk when res is None),
+                # speaking each sentence as soon as the LLM has produced it
+                _, first_word = self.voice.speak_stream(self.persona.decorate_stream(text, res), started=started)
+                self._record_reply(time.perf_counter() - started, dialog, first_word)
         except KeyboardInterrupt:
-            self.voice.speak("Shutting down.")
\ No newline at end of file
+            self.voice.speak("Shutting down.")
+
+    def _record_reply(self, seconds, dialog, first_word):
+        """Reply latency under "assistant:reply" in reply_metrics, with time to first word as a stage."""
+        stages = {"dialog": dialog}
+        if first_word is not None:
+            stages["first_word"] = first_word
+        self.reply_metrics.record("assistant:reply", seconds, stages, None if first_word is not None else "empty")
@@ -0,0 +1,119 @@
+"""
+TF-IDF intent classifier over word, word-bigram and character-trigram features.
+
+Each intent's keywords and examples form one document. Documents are weighted with
+sublinear TF-IDF and L2-normalized, and stored column-wise (one posting list of
+(intent, weight) per feature), so scoring an utterance touches only the features it
+contains and yields the cosine similarity with every intent at once. NumPy does the
+accumulation when it is installed; otherwise the same postings are summed in Python.
+"""
+
+import re
+import math
+import heapq
+
+from assistant.keyword_index import normalize
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python path gives the same scores
+    np = None
+
+_WORD = re.compile(r"\w+")
+
+
+def features(text):
+    """{feature: count} for normalized text: words, adjacent word pairs, char trigrams."""
+    words = _WORD.findall(normalize(text))
+    feats = {}
+
+    def add(f):
+        feats[f] = feats.get(f, 0) + 1
+
+    for i, w in enumerate(words):
+        add("w:" + w)
+        if i:
+            add("b:" + words[i - 1] + " " + w)
+        padded = f" {w} "
+        for j in range(len(padded) - 2):
+            add("c:" + padded[j:j + 3])
+    return feats
+
+
+def _weigh(counts, idf, unseen=None):
+    # unseen: idf for features outside the vocabulary, which still count towards the norm
+    vec = {f: (1.0 + math.log(n)) * idf.get(f, unseen) for f, n in counts.items() if f in idf or unseen}
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {f: v / norm for f, v in vec.items()} if norm else {}
+
+
+class IntentClassifier:
+    def __init__(self, documents, use_numpy=None):
+        """documents: one text list per intent (its keywords and examples)."""
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        self.size = len(documents)
+        counts = []
+        df = {}
+        for texts in documents:
+            c = {}
+            for text in texts:
+                for f, n in features(text).items():
+                    c[f] = c.get(f, 0) + n
+            counts.append(c)
+            for f in c:
+                df[f] = df.get(f, 0) + 1
+        n = len(documents)
+        self.idf = {f: math.log((1.0 + n) / (1.0 + d)) + 1.0 for f, d in df.items()}
+        self.unseen_idf = math.log(1.0 + n) + 1.0
+
+        postings = {}
+        for row, c in enumerate(counts):
+            for f, w in _weigh(c, self.idf).items():
+                postings.setdefault(f, []).append((row, w))
+        if self.use_numpy:
+            # CSC layout: feature -> slice of (rows, weights)
+            self.columns = {}
+            rows, weights, start = [], [], 0
+            for f, plist in postings.items():
+                self.columns[f] = (start, start + len(plist))
+                rows.extend(r for r, _ in plist)
+                weights.extend(w for _, w in plist)
+                start += len(plist)
+            self.rows = np.asarray(rows, dtype=np.int32)
+            self.weights = np.asarray(weights, dtype=np.float32)
+        else:
+            self.columns = postings
+
+    @classmethod
+    def from_specs(cls, specs, use_numpy=None):
+        """Classifier over a list of intent spec dicts; results are positions in that list."""
+        return cls([list(s.get("keywords") or []) + list(s.get("examples") or []) for s in specs], use_numpy)
+
+    def scores(self, utterance):
+        """Cosine similarity of the utterance with every intent (list, or numpy array)."""
+        query = _weigh(features(utterance), self.idf, self.unseen_idf)
+        if self.use_numpy:
+            out = np.zeros(self.size, dtype=np.float32)
+            spans = [(self.columns[f], q) for f, q in query.items() if f in self.columns]
+            if spans:
+                idx = np.concatenate([np.arange(a, b) for (a, b), _ in spans])
+                qw = np.concatenate([np.full(b - a, q, dtype=np.float32) for (a, b), q in spans])
+                out += np.bincount(self.rows[idx], weights=self.weights[idx] * qw, minlength=self.size)
+            return out
+        out = [0.0] * self.size
+        for f, q in query.items():
+            for row, w in self.columns.get(f, ()):
+                out[row] += w * q
+        return out
+
+    def top(self, utterance, k=2):
+        """[(intent position, score)] for the k best intents, best first."""
+        if not self.size:
+            return []
+        scores = self.scores(utterance)
+        k = min(k, self.size)
+        if self.use_numpy:
+            best = np.argpartition(-scores, k - 1)[:k] if k < self.size else np.arange(self.size)
+            ranked = sorted(((int(i), float(scores[i])) for i in best), key=lambda p: (-p[1], p[0]))
+            return ranked[:k]
+        return heapq.nsmallest(k, enumerate(scores), key=lambda p: (-p[1], p[0]))
@@ -0,0 +1,123 @@
+"""
+Multi-pattern keyword index (Aho-Corasick) for intent matching.
+
+Built once from the intent specs; scan() walks the utterance a single time and
+reports every intent whose keywords or examples occur in it as whole words, so the
+cost of a turn depends on the utterance length, not on how many intents exist.
+"""
+
+KEYWORD_WEIGHT = 10
+EXAMPLE_WEIGHT = 20
+
+
+def normalize(text):
+    """Lower-case and collapse runs of whitespace, as both patterns and utterances are."""
+    return " ".join(str(text).lower().split())
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordIndex:
+    def __init__(self):
+        self.goto = [{}]      # state -> {char: state}
+        self.fail = [0]
+        self.out = [[]]       # state -> pattern ids ending here (including via fail links)
+        self.patterns = []    # pattern id -> (length, starts with word char, ends with word char)
+        self.owners = []      # pattern id -> [(intent id, weight, is keyword)]
+        self._ids = {}        # normalized text -> pattern id
+        self._owned = set()   # (pattern id, intent id, weight, is keyword) already recorded
+
+    @classmethod
+    def from_specs(cls, specs):
+        """Index a list of intent spec dicts; scan() reports positions in that list."""
+        index = cls()
+        for i, spec in enumerate(specs):
+            for kw in spec.get("keywords") or []:
+                index.add(kw, i, KEYWORD_WEIGHT, keyword=True)
+            for ex in spec.get("examples") or []:
+                index.add(ex, i, EXAMPLE_WEIGHT)
+        index.build()
+        return index
+
+    def add(self, text, intent, weight, keyword=False):
+        text = normalize(text)
+        if not text:
+            return
+        pid = self._ids.get(text)
+        if pid is None:
+            pid = self._ids[text] = len(self.patterns)
+            self.patterns.append((len(text), _is_word(text[0]), _is_word(text[-1])))
+            self.owners.append([])
+            state = 0
+            for ch in text:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(pid)
+        if (pid, intent, weight, keyword) not in self._owned:
+            self._owned.add((pid, intent, weight, keyword))
+            self.owners[pid].append((intent, weight, keyword))
+
+    def build(self):
+        """Compute failure links breadth-first; call after the last add()."""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def scan(self, utterance):
+        """{intent id: (score, keyword hits)} for whole-word matches; each pattern counts once."""
+        text = normalize(utterance)
+        goto, fail, out, patterns = self.goto, self.fail, self.out, self.patterns
+        seen = set()
+        state = 0
+        n = len(text)
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                if pid in seen:
+                    continue
+                length, word_start, word_end = patterns[pid]
+                start = end - length + 1
+                if word_start and start > 0 and _is_word(text[start - 1]):
+                    continue
+                if word_end and end + 1 < n and _is_word(text[end + 1]):
+                    continue
+                seen.add(pid)
+        hits = {}
+        for pid in seen:
+            for intent, weight, keyword in self.owners[pid]:
+                score, keywords = hits.get(intent, (0, 0))
+                hits[intent] = (score + weight, keywords + keyword)
+        return hits
+
+    def best(self, utterance):
+        """(intent id, score) of the highest-scoring intent, earliest on ties; (None, 0) if none."""
+        hits = self.scan(utterance)
+        if not hits:
+            return None, 0
+        intent = min(hits, key=lambda i: (-hits[i][0], i))
+        return intent, hits[intent][0]
+
+    def first_keyword_match(self, utterance):
+        """Earliest intent with at least one keyword in the utterance, or None."""
+        matched = [i for i, (_, keywords) in self.scan(utterance).items() if keywords]
+        return min(matched) if matched else None
@@ -1,16 +1,52 @@
 import os
+import math
+import threading
 from ctransformers import AutoModelForCausalLM
+from core import profiler
 
 # Default model settings for Raspberry Pi / Low-end devices
 DEFAULT_MODEL_REPO = "TheBloke/TinyLlama-1.1B-Chat-v1.0-GGUF"
 DEFAULT_MODEL_FILE = "tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf"
 
+# Model contexts kept loaded, each holding the KV state of the last prompt it evaluated.
+# Weights are memory-mapped, so extra contexts mostly cost their KV cache.
+DEFAULT_CONTEXTS = 2
+# A prompt sharing fewer tokens than this with every idle context takes an unused one
+# (or evicts the least recently used) rather than overwrite another prompt family's prefix
+PREFIX_MIN_TOKENS = 16
+
+
+class _Context:
+    __slots__ = ('model', 'tokens', 'used', 'busy')
+
+    def __init__(self, model):
+        self.model = model
+        self.tokens = []    # prompt tokens whose evaluation the model's context still holds
+        self.used = 0
+        self.busy = False
+
+
 class LLMClient:
-    def __init__(self, model_path=None):
+    """
+    Local LLM. Prompts sharing a prefix (the constant system block of the intent and
+    persona prompts) are routed to the context that last evaluated it, so only the
+    tokens after the shared prefix are evaluated again; see _checkout.
+    """
+
+    def __init__(self, model_path=None, contexts=DEFAULT_CONTEXTS):
         self.model_path = model_path
         self.model = None
-        self._ensure_model()
-        self._load_model()
+        self.max_contexts = max(1, contexts)
+        self._contexts = []
+        self._warmup = None
+        self._clock = 0
+        self._idle = threading.Condition()
+        # prompt tokens seen, of which already held in a context's KV state
+        self.prefix_stats = {"prompt_tokens": 0, "reused_tokens": 0, "contexts": 0, "evictions": 0}
+        with profiler.phase("llm.ensure_model"):
+            self._ensure_model()
+        with profiler.phase("llm.load_model"):
+            self._load_model()
 
     def _ensure_model(self):
         """
@@ -50,19 +86,86 @@ class LLMClient:
             print("[CAL][LLM] No model file available. LLM features disabled.")
             return
 
+        self.model = self._open_model()
+        if self.model:
+            self._contexts.append(_Context(self.model))
+            self.prefix_stats["contexts"] = 1
+            print(f"[CAL][LLM] Loaded model from {self.model_path}")
+            if self.max_contexts > 1:
+                # the other contexts load in the background, not inside a user's request
+                self._warmup = threading.Thread(target=self._open_contexts, name="llm-contexts", daemon=True)
+                self._warmup.start()
+
+    def _open_contexts(self):
+        for _ in range(self.max_contexts - 1):
+            model = self._open_model()
+            with self._idle:
+                if model is None:
+                    # no room for another context: share the ones already loaded
+                    self.max_contexts = len(self._contexts)
+                    return
+                self._contexts.append(_Context(model))
+                self.prefix_stats["contexts"] = len(self._contexts)
+                self._idle.notify()
+
+    def wait_ready(self, timeout=None):
+        """Block until the background context warm-up has finished."""
+        if self._warmup is not None:
+            self._warmup.join(timeout)
+
+    def _open_model(self):
         try:
             # Set threads to a reasonable default for Pi (e.g., 4)
             # context_length=2048 is standard for TinyLlama
-            self.model = AutoModelForCausalLM.from_pretrained(
+            return AutoModelForCausalLM.from_pretrained(
                 os.path.abspath(self.model_path),
                 model_type="llama",
                 context_length=2048,
                 threads=4
             )
-            print(f"[CAL][LLM] Loaded model from {self.model_path}")
         except Exception as e:
             print(f"[CAL][LLM] Failed to load model: {e}")
-            self.model = None
+            return None
+
+    def _pick(self, tokens):
+        # caller holds self._idle; None means every context is busy
+        idle = [c for c in self._contexts if not c.busy]
+        if not idle:
+            return None
+        best = max(idle, key=lambda c: (_shared_prefix(c.tokens, tokens), c.used))
+        if _shared_prefix(best.tokens, tokens) >= PREFIX_MIN_TOKENS:
+            return best
+        for c in idle:
+            if not c.tokens:
+                return c
+        lru = min(idle, key=lambda c: c.used)
+        self.prefix_stats["evictions"] += 1
+        return lru
+
+    def _checkout(self, tokens):
+        """
+        Idle context holding the longest prefix of tokens. Without a useful match an
+        unused context is taken, else the least recently used idle one is reused; with
+        none idle, wait for one.
+        """
+        with self._idle:
+            ctx = self._pick(tokens)
+            while ctx is None:
+                self._idle.wait()
+                ctx = self._pick(tokens)
+            ctx.busy = True
+        # the model re-evaluates at least the last prompt token
+        self.prefix_stats["prompt_tokens"] += len(tokens)
+        self.prefix_stats["reused_tokens"] += min(_shared_prefix(ctx.tokens, tokens), max(0, len(tokens) - 1))
+        return ctx
+
+    def _checkin(self, ctx, tokens):
+        with self._idle:
+            ctx.tokens = tokens
+            self._clock += 1
+            ctx.used = self._clock
+            ctx.busy = False
+            self._idle.notify()
 
     def generate(self, prompt, max_new_tokens=128, temperature=0.7, stop=None):
         if not self.model:
@@ -73,12 +176,122 @@ class LLMClient:
             # <|system|>\n{system_prompt}</s>\n<|user|>\n{user_prompt}</s>\n<|assistant|>
             # We'll assume the caller handles the formatting or we do simple raw generation.
             # For now, let's just pass the prompt through.
-            return self.model(
+            tokens = self.model.tokenize(prompt)
+            ctx = self._checkout(tokens)
+            try:
+                out = ctx.model(
+                    prompt,
+                    max_new_tokens=max_new_tokens,
+                    temperature=temperature,
+                    stop=stop or []
+                )
+            except Exception:
+                self._checkin(ctx, [])
+                raise
+            self._checkin(ctx, tokens)
+            return out
+        except Exception as e:
+            print(f"[CAL][LLM] Generation error: {e}")
+            return None
+
+    def generate_stream(self, prompt, max_new_tokens=128, temperature=0.7, stop=None):
+        """
+        Yield the reply's text piece by piece as the model produces it; yields nothing
+        without a model. The context stays checked out until the generator finishes or
+        is closed.
+        """
+        if not self.model:
+            return
+        try:
+            tokens = self.model.tokenize(prompt)
+            ctx = self._checkout(tokens)
+        except Exception as e:
+            print(f"[CAL][LLM] Generation error: {e}")
+            return
+        held = []
+        try:
+            for piece in ctx.model(
                 prompt,
                 max_new_tokens=max_new_tokens,
                 temperature=temperature,
-                stop=stop or []
-            )
+                stop=stop or [],
+                stream=True
+            ):
+                yield piece
+            held = tokens
+        except GeneratorExit:
+            held = tokens   # closed early: the prompt prefix is still evaluated
+            raise
         except Exception as e:
             print(f"[CAL][LLM] Generation error: {e}")
+        finally:
+            self._checkin(ctx, held)
+
+    def score_labels(self, prompt, labels):
+        """
+        Probability of each label being the model's continuation of prompt, normalized
+        over labels; None without a model or on error. No sampling: the prompt is
+        evaluated once and single-token labels are read off its logits. Longer labels
+        evaluate only the tokens after the shared prompt, walking shared label prefixes
+        once. A label that is a prefix of another must be followed by end-of-sequence.
+        """
+        if not self.model or not labels:
             return None
+        try:
+            prompt_tokens = self.model.tokenize(prompt)
+            ctx = self._checkout(prompt_tokens)
+            try:
+                probs = self._score_labels(ctx.model, prompt, prompt_tokens, labels)
+            except Exception:
+                self._checkin(ctx, [])
+                raise
+            self._checkin(ctx, prompt_tokens)
+            return probs
+        except Exception as e:
+            print(f"[CAL][LLM] Scoring error: {e}")
+            return None
+
+    def _score_labels(self, model, prompt, prompt_tokens, labels):
+        seqs = []
+        for label in labels:
+            # tokenize in context: the first label token may merge with the prompt's spacing
+            full = model.tokenize(prompt + label)
+            if full[:len(prompt_tokens)] == prompt_tokens and len(full) > len(prompt_tokens):
+                seqs.append(tuple(full[len(prompt_tokens):]))
+            else:
+                seqs.append(tuple(model.tokenize(label, add_bos_token=False)))
+        seqs = [seq + (model.eos_token_id,) if any(o != seq and o[:len(seq)] == seq for o in seqs) else seq
+                for seq in seqs]
+
+        dists = {}   # label-token prefix -> (next-token logits, their log-sum-exp)
+
+        def next_token_logprobs(prefix):
+            if prefix not in dists:
+                # rewinds the model's context to the longest prefix it has already evaluated
+                rest = model.prepare_inputs_for_generation(prompt_tokens + list(prefix), reset=True)
+                model.eval(rest)
+                logits = list(model.logits)
+                dists[prefix] = (logits, _logsumexp(logits))
+            return dists[prefix]
+
+        def logprob(prefix, tok):
+            logits, norm = next_token_logprobs(prefix)
+            return logits[tok] - norm
+
+        scores = [sum(logprob(seq[:i], tok) for i, tok in enumerate(seq)) for seq in seqs]
+        norm = _logsumexp(scores)
+        return [math.exp(sc - norm) for sc in scores]
+
+
+def _shared_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def _logsumexp(values):
+    top = max(values)
+    return top + math.log(sum(math.exp(x - top) for x in values))
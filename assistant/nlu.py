@@ -1,10 +1,14 @@
 """
 Type-free slots NLU (regex-only validators are in the dialog manager).
-Builds simple intent specs from plugin manifests and performs keyword/example matching.
+Builds simple intent specs from plugin manifests and performs keyword/example matching
+through a KeywordIndex and an IntentClassifier built once per plugin set.
 """
 
 import re
 from assistant.persona_engine import PersonaEngine
+from core.manifest_index import derive_intents
+from assistant.keyword_index import KeywordIndex
+from assistant.intent_classifier import IntentClassifier
 
 class IntentSpec:
     def __init__(self, name, plugin, export, keywords=None, examples=None, slots=None, confirm_template=None):
@@ -25,44 +29,69 @@ class NLU:
         self.core = core
         self.persona = persona_engine or PersonaEngine()
         self.intent_specs = []
+        self.spec_dicts = []        # intent_specs as the dicts handed to the persona engine
+        self.keyword_index = KeywordIndex.from_specs([])
+        self.classifier = IntentClassifier.from_specs([])
+        self._by_key = {}
         self._build_from_manifests()
+        # keep intents in step with plugins hot-reloaded by the core
+        if hasattr(core, 'add_plugin_listener'):
+            core.add_plugin_listener(self.on_plugin_changed)
+
+    def _specs_for(self, pname, pdata):
+        # Core caches the derived specs in its manifest index
+        intents = pdata.get('intents')
+        if intents is None:
+            intents = derive_intents(pdata.get('meta') or {})
+        return [IntentSpec(idef['name'], pname, idef['export'], idef['keywords'], idef['examples'], idef['slots'], idef['confirm_template'])
+                for idef in intents]
 
     def _build_from_manifests(self):
-        self.intent_specs = []
+        specs = []
         for pname, pdata in self.core.plugins.items():
-            manifest = pdata.get('meta') or {}
-            for iname, idef in (manifest.get('intents') or {}).items():
-                slots = {}
-                for sname, sdef in (idef.get('slots') or {}).items():
-                    slots[sname] = {'prompt': sdef.get('prompt'), 'required': sdef.get('required', False), 'validator': sdef.get('validator')}
-                spec = IntentSpec(iname, pname, idef.get('export') or iname, idef.get('keywords', []), idef.get('examples', []), slots, idef.get('confirm_template'))
-                self.intent_specs.append(spec)
+            specs.extend(self._specs_for(pname, pdata))
+        self._install(specs)
+
+    def _install(self, specs):
+        dicts = [s.to_dict() for s in specs]
+        index = KeywordIndex.from_specs(dicts)
+        classifier = IntentClassifier.from_specs(dicts)
+        by_key = {}
+        for s in specs:
+            by_key.setdefault((s.name, s.plugin), s)
+        # swap in one assignment so a concurrent parse() never sees a partial set
+        self._state = (specs, dicts, index, classifier, by_key)
+        self.intent_specs, self.spec_dicts, self.keyword_index, self.classifier, self._by_key = self._state
+
+    def on_plugin_changed(self, pname, pdata):
+        """Patch intent specs for one reloaded plugin (pdata is None when it was removed)."""
+        specs = [s for s in self.intent_specs if s.plugin != pname]
+        if pdata is not None:
+            specs.extend(self._specs_for(pname, pdata))
+        self._install(specs)
 
     def parse(self, utterance):
-        # ask persona engine (LLM) if available
-        specs = [s.to_dict() for s in self.intent_specs]
-        chosen, score = self.persona.parse_intent(utterance, specs)
+        specs, dicts, index, classifier, by_key = self._state
+        # classifier first; persona engine asks the LLM (if available) when it is unsure
+        chosen, score = self.persona.parse_intent(utterance, dicts, keyword_index=index, classifier=classifier)
         if chosen:
-            # find matching IntentSpec
-            for s in self.intent_specs:
-                if s.name == chosen['name'] and s.plugin == chosen['plugin']:
-                    return s, {}
-        # fallback: simple match by keywords
-        # return first matching spec with naive slot extractions (location/number heuristics)
-        u = utterance.lower()
-        for s in self.intent_specs:
-            for kw in s.keywords:
-                if kw.lower() in u:
-                    # simple global slots
-                    slots = {}
-                    m = re.search(r'\b(?:in|for|at)\s+([A-Za-z0-9 \-]+)', utterance, re.IGNORECASE)
-                    if m:
-                        slots['location'] = m.group(1).strip()
-                    m2 = re.search(r'\b(-?\d+)\b', utterance)
-                    if m2:
-                        try:
-                            slots['number'] = int(m2.group(1))
-                        except Exception:
-                            pass
-                    return s, slots
-        return None, {}
\ No newline at end of file
+            s = by_key.get((chosen['name'], chosen['plugin']))
+            if s is not None:
+                return s, {}
+        # fallback: first spec with a keyword in the utterance,
+        # with naive slot extractions (location/number heuristics)
+        i = index.first_keyword_match(utterance)
+        if i is None:
+            return None, {}
+        # simple global slots
+        slots = {}
+        m = re.search(r'\b(?:in|for|at)\s+([A-Za-z0-9 \-]+)', utterance, re.IGNORECASE)
+        if m:
+            slots['location'] = m.group(1).strip()
+        m2 = re.search(r'\b(-?\d+)\b', utterance)
+        if m2:
+            try:
+                slots['number'] = int(m2.group(1))
+            except Exception:
+                pass
+        return specs[i], slots
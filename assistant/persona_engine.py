@@ -4,15 +4,33 @@ Persona engine that uses a local LLM (via LLMClient) for responses and intent de
 
 import json
 import os
+import re
+import heapq
 import random
 from assistant.llm_client import LLMClient
+from assistant.keyword_index import KeywordIndex
+
+# The classifier's pick is used without asking the LLM when its cosine score is at
+# least DEFAULT_INTENT_MIN_SCORE and beats the runner-up by DEFAULT_INTENT_MARGIN;
+# a persona file may override both ("intent_min_score", "intent_margin").
+DEFAULT_INTENT_MIN_SCORE = 0.2
+DEFAULT_INTENT_MARGIN = 0.1
+# Intents offered to the LLM per classification prompt ("intent_shortlist" in a persona file)
+DEFAULT_INTENT_SHORTLIST = 8
+# The LLM's scored pick is used when its probability over the shortlist reaches this
+# ("intent_llm_min_prob"); below it the keyword fallback decides
+DEFAULT_INTENT_LLM_MIN_PROB = 0.3
+
+# decorate_stream cuts the reply after sentence-ending punctuation or a line break
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
 
 class PersonaEngine:
     """
     Wrapper for intent parsing and persona responses using a local LLM.
     """
 
-    def __init__(self, persona_path=None, model_path=None):
+    def __init__(self, persona_path=None, model_path=None, intent_margin=None, intent_min_score=None,
+                 intent_shortlist=None, intent_llm_min_prob=None):
         self.persona = {"name":"CAL","style":"friendly, concise","wrap":"{reply}"}
         if persona_path and os.path.exists(persona_path):
             try:
@@ -21,6 +39,19 @@ class PersonaEngine:
             except Exception:
                 pass
         
+        self.intent_margin = intent_margin if intent_margin is not None else \
+            self.persona.get("intent_margin", DEFAULT_INTENT_MARGIN)
+        self.intent_min_score = intent_min_score if intent_min_score is not None else \
+            self.persona.get("intent_min_score", DEFAULT_INTENT_MIN_SCORE)
+        self.intent_shortlist = max(1, intent_shortlist if intent_shortlist is not None else
+                                    self.persona.get("intent_shortlist", DEFAULT_INTENT_SHORTLIST))
+        self.intent_llm_min_prob = intent_llm_min_prob if intent_llm_min_prob is not None else \
+            self.persona.get("intent_llm_min_prob", DEFAULT_INTENT_LLM_MIN_PROB)
+        # which path answered parse_intent (classifier, llm, keyword, none), LLM prompts
+        # sent, and classifier answers given while a model was loaded
+        self.intent_decisions = {"classifier": 0, "llm": 0, "keyword": 0, "none": 0,
+                                 "llm_calls": 0, "llm_avoided": 0}
+
         # Initialize LLM Client
         self.llm = LLMClient(model_path)
 
@@ -29,17 +60,46 @@ class PersonaEngine:
         Convert plugin result into persona-flavored text.
         """
         if self.llm.model:
-            # Construct a prompt suitable for TinyLlama
-            # <|system|>\n{system}</s>\n<|user|>\n{user}</s>\n<|assistant|>
-            sys_prompt = f"You are {self.persona.get('name')}. Style: {self.persona.get('style')}."
-            user_prompt = f"User said: {user_text}\nData: {plugin_result}\nReply to the user using the data."
-            
-            prompt = f"<|system|>\n{sys_prompt}</s>\n<|user|>\n{user_prompt}</s>\n<|assistant|>"
-            
-            out = self.llm.generate(prompt, max_new_tokens=100, temperature=0.6)
+            out = self.llm.generate(self._reply_prompt(user_text, plugin_result), max_new_tokens=100, temperature=0.6)
             if out:
                 return out.strip()
+        return self._fallback_reply(plugin_result)
+
+    def decorate_stream(self, user_text, plugin_result=None):
+        """
+        decorate(), yielded a sentence at a time while the LLM is still generating, so
+        the first words can be shown or spoken early. Falls back to the template reply
+        (one chunk) when no model is loaded or the model produced nothing.
+        """
+        if self.llm.model:
+            buf = ""
+            produced = False
+            for piece in self.llm.generate_stream(self._reply_prompt(user_text, plugin_result),
+                                                  max_new_tokens=100, temperature=0.6):
+                buf += piece
+                cut = 0
+                for m in _SENTENCE_END.finditer(buf):
+                    cut = m.end()
+                if cut:
+                    chunk, buf = buf[:cut].strip(), buf[cut:]
+                    if chunk:
+                        produced = True
+                        yield chunk
+            if buf.strip():
+                yield buf.strip()
+                return
+            if produced:
+                return
+        yield self._fallback_reply(plugin_result)
+
+    def _reply_prompt(self, user_text, plugin_result):
+        # Construct a prompt suitable for TinyLlama
+        # <|system|>\n{system}</s>\n<|user|>\n{user}</s>\n<|assistant|>
+        sys_prompt = f"You are {self.persona.get('name')}. Style: {self.persona.get('style')}."
+        user_prompt = f"User said: {user_text}\nData: {plugin_result}\nReply to the user using the data."
+        return f"<|system|>\n{sys_prompt}</s>\n<|user|>\n{user_prompt}</s>\n<|assistant|>"
 
+    def _fallback_reply(self, plugin_result):
         # fallback templating
         if plugin_result is None:
             return random.choice(["Sorry, I don't know that yet.", "I couldn't find an answer."])
@@ -47,46 +107,99 @@ class PersonaEngine:
             return f"In {plugin_result['city']}, it's {plugin_result['forecast']} at {plugin_result.get('temp_c')}°C."
         return str(plugin_result)
 
-    def parse_intent(self, utterance, intent_specs):
+    def parse_intent(self, utterance, intent_specs, keyword_index=None, classifier=None):
         """
         Ask LLM to choose an intent from intent_specs.
+        With a classifier (an IntentClassifier over the same intent_specs) the LLM is only
+        asked when the classifier's top two intents are too close to call; its pick also
+        needs a keyword or example of that intent in the utterance.
+        The prompt lists at most intent_shortlist candidates, ranked by the classifier
+        (or by keyword score without one), so its size does not grow with the plugin count.
+        The LLM scores every candidate's index label in one pass (LLMClient.score_labels)
+        and its pick counts if that probability reaches intent_llm_min_prob; free-form
+        generation is only used when scoring is unavailable.
+        The fallback scores keywords and examples with keyword_index, a KeywordIndex
+        built from the same intent_specs (built here if not given).
         """
+        ranked = None
+        if classifier is not None:
+            ranked = classifier.top(utterance, max(2, self.intent_shortlist))
+            if ranked:
+                best, score = ranked[0]
+                runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+                if score >= self.intent_min_score and score - runner_up >= self.intent_margin:
+                    # trigram overlap alone ("what's the time" vs "what's the weather")
+                    # is not evidence: the intent must also have a keyword or example hit
+                    if keyword_index is None:
+                        keyword_index = KeywordIndex.from_specs(intent_specs)
+                    if best in keyword_index.scan(utterance):
+                        self._decided("classifier")
+                        return intent_specs[best], float(score)
+
         if self.llm.model:
+            self.intent_decisions["llm_calls"] += 1
             # Build prompt
             lines = ["<|system|>\nYou are an intent classifier. Choose the best matching intent from the list. Return ONLY the index number.</s>"]
             
+            if keyword_index is None and ranked is None and len(intent_specs) > self.intent_shortlist:
+                keyword_index = KeywordIndex.from_specs(intent_specs)
+            candidates = self._shortlist(utterance, intent_specs, ranked, keyword_index)
             user_lines = [f"Utterance: {utterance}", "Intents:"]
-            for i, spec in enumerate(intent_specs):
+            for i, spec in enumerate(intent_specs[c] for c in candidates):
                 user_lines.append(f"{i}: {spec['name']} (keywords: {', '.join(spec.get('keywords',[])[:3])})")
             user_lines.append("Index:")
             
             prompt = "\n".join(lines) + "\n<|user|>\n" + "\n".join(user_lines) + "</s>\n<|assistant|>"
-            
-            out = self.llm.generate(prompt, max_new_tokens=5, temperature=0.1)
+
+            probs = self.llm.score_labels(prompt + "\n", [str(i) for i in range(len(candidates))])
+            if isinstance(probs, list) and len(probs) == len(candidates):
+                idx = max(range(len(probs)), key=probs.__getitem__)
+                if probs[idx] >= self.intent_llm_min_prob:
+                    self._decided("llm")
+                    return intent_specs[candidates[idx]], float(probs[idx])
+                out = None
+            else:
+                out = self.llm.generate(prompt, max_new_tokens=5, temperature=0.1)
             if out:
                 # Clean up output to find the number
                 cleaned = ''.join(ch for ch in out if ch.isdigit())
                 if cleaned:
                     try:
                         idx = int(cleaned)
-                        if 0 <= idx < len(intent_specs):
-                            return intent_specs[idx], 1.0
+                        if 0 <= idx < len(candidates):
+                            self._decided("llm")
+                            return intent_specs[candidates[idx]], 1.0
                     except ValueError:
                         pass
 
-        # fallback: simple scoring by keywords/examples
-        best = None; best_score = 0
-        u = utterance.lower()
-        for spec in intent_specs:
-            score = 0
-            for kw in spec.get('keywords', []):
-                if kw.lower() in u:
-                    score += 10
-            for ex in spec.get('examples', []):
-                if ex.lower() in u:
-                    score += 20
-            if score > best_score:
-                best_score = score; best = spec
-        if best_score > 0:
-            return best, float(best_score)
-        return None, 0.0
\ No newline at end of file
+        # fallback: simple scoring by keywords/examples (whole words)
+        if keyword_index is None:
+            keyword_index = KeywordIndex.from_specs(intent_specs)
+        i, score = keyword_index.best(utterance)
+        if i is not None:
+            self._decided("keyword")
+            return intent_specs[i], float(score)
+        self._decided("none")
+        return None, 0.0
+
+    def _shortlist(self, utterance, intent_specs, ranked, keyword_index):
+        """Positions in intent_specs to offer the LLM, best first."""
+        k = self.intent_shortlist
+        if len(intent_specs) <= k:
+            return list(range(len(intent_specs)))
+        if ranked:
+            return [i for i, _ in ranked[:k]]
+        hits = keyword_index.scan(utterance)
+        return heapq.nsmallest(k, range(len(intent_specs)), key=lambda i: (-hits.get(i, (0, 0))[0], i))
+
+    def _decided(self, path):
+        self.intent_decisions[path] += 1
+        if path == "classifier" and self.llm.model:
+            self.intent_decisions["llm_avoided"] += 1
+
+    def decision_stats(self):
+        """Decision-path counters plus the share of parse_intent calls that prompted the LLM."""
+        stats = dict(self.intent_decisions)
+        total = sum(stats[k] for k in ("classifier", "llm", "keyword", "none"))
+        stats["llm_rate"] = stats["llm_calls"] / total if total else 0.0
+        return stats
\ No newline at end of file
@@ -3,8 +3,13 @@ Simple voice I/O: optional STT/TTS; falls back to text I/O.
 By default uses text I/O (safe, no external deps).
 """
 
-import speech_recognition as sr
-import pyttsx3
+import time
+import queue
+import threading
+
+from core import profiler
+
+_DONE = object()
 
 class VoiceIO:
     def __init__(self, use_stt=False, use_tts=False):
@@ -12,15 +17,20 @@ class VoiceIO:
         self.use_tts = use_tts
         self.stt = None
         self.tts = None
+        # speech libraries are slow to import; only pay for them when enabled
         if use_stt:
             try:
-                self.stt = sr.Recognizer()
+                with profiler.phase("voice.stt"):
+                    import speech_recognition as sr
+                    self.stt = sr.Recognizer()
                 self.sr = sr
             except Exception:
                 self.stt = None
         if use_tts:
             try:
-                self.tts = pyttsx3.init()
+                with profiler.phase("voice.tts"):
+                    import pyttsx3
+                    self.tts = pyttsx3.init()
             except Exception:
                 self.tts = None
 
@@ -48,3 +58,50 @@ class VoiceIO:
                 self.tts.runAndWait()
             except Exception:
                 pass
+
+    def speak_stream(self, chunks, started=None):
+        """
+        Print and speak text chunks (e.g. PersonaEngine.decorate_stream) as they arrive.
+        The chunks are pulled on a background thread, so the LLM keeps generating
+        while earlier chunks are spoken. Returns (full text, time to first word): the
+        seconds from started (a time.perf_counter() value; default: now) until the
+        first chunk was shown, or None if there was none.
+        """
+        started = time.perf_counter() if started is None else started
+        pending = queue.Queue()
+
+        def produce():
+            try:
+                for chunk in chunks:
+                    pending.put(chunk)
+            except Exception as e:
+                pending.put(e)
+            pending.put(_DONE)
+
+        threading.Thread(target=produce, name="cal-speak", daemon=True).start()
+        parts = []
+        first_word = None
+        while True:
+            chunk = pending.get()
+            if chunk is _DONE:
+                break
+            if isinstance(chunk, Exception):
+                print(f"(reply failed: {chunk})")
+                continue
+            if not chunk:
+                continue
+            if first_word is None:
+                first_word = time.perf_counter() - started
+                print("Assistant:", chunk, end='', flush=True)
+            else:
+                print("", chunk, end='', flush=True)
+            parts.append(chunk)
+            if self.tts:
+                try:
+                    self.tts.say(chunk)
+                    self.tts.runAndWait()
+                except Exception:
+                    pass
+        if parts:
+            print()
+        return " ".join(parts), first_word
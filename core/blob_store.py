@@ -0,0 +1,134 @@
+"""
+Content-addressed file store for provisioned runtimes.
+
+Every file of a runtime tree is stored once under blobs/<aa>/<sha256>, keyed by its
+content and whether it is executable. Runtime trees are materialized from it by
+reflink (a copy-on-write clone, which a tree can change without touching the blob),
+falling back to a hardlink and finally a plain copy. Blobs, and so hardlinked files,
+are read-only; since a hardlinked file is the blob itself, put_bytes re-hashes every
+blob it reuses.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+
+CHUNK = 1 << 20
+FICLONE = 0x40049409   # Linux ioctl: clone a file's extents
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _reflink(src, dest):
+    import fcntl
+    with open(src, 'rb') as s, open(dest, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(digest, executable=False):
+        return digest + ('.x' if executable else '')
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def put_bytes(self, data, executable=False):
+        """
+        Store data (once) and return (key, sha256). A blob that already exists is
+        re-hashed first and rewritten if it no longer matches its key.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        key = self.key(digest, executable)
+        path = self.path(key)
+        if not os.path.exists(path):
+            self._write(path, data, executable)
+        elif not self.verify(key):
+            # changed through a hardlinked tree: publish a good copy under a new inode
+            print(f"[CAL][runtime] Blob {key} does not match its hash; rewriting it")
+            self._write(path, data, executable, replace=True)
+        return key, digest
+
+    def _write(self, path, data, executable, replace=False):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.blob.', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, 0o555 if executable else 0o444)
+            if replace:
+                os.replace(tmp, path)
+                return
+            try:
+                # link, not rename: a blob another writer already published (and
+                # trees already link) must keep its inode
+                os.link(tmp, path)
+            except FileExistsError:
+                pass
+        finally:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def materialize(self, key, dest):
+        """Place blob key at dest: reflink, else hardlink, else copy. Returns the method used."""
+        src = self.path(key)
+        try:
+            _reflink(src, dest)
+            shutil.copymode(src, dest)
+            return 'reflink'
+        except (OSError, ImportError):
+            try:
+                os.unlink(dest)
+            except OSError:
+                pass
+        try:
+            os.link(src, dest)
+            return 'hardlink'
+        except OSError:
+            pass
+        shutil.copy2(src, dest)
+        return 'copy'
+
+    def verify(self, key):
+        """True if the blob's content still hashes to its key."""
+        try:
+            return sha256_file(self.path(key)) == key.split('.')[0]
+        except OSError:
+            return False
+
+    def keys(self):
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.startswith('.'):
+                    yield name
+
+    def remove(self, key):
+        """Delete a blob; returns the bytes freed."""
+        path = self.path(key)
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+            return size
+        except OSError:
+            return 0
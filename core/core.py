@@ -1,7 +1,33 @@
 import json
+import time
+import asyncio
 import importlib
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from core import profiler
+from core.registry import Registry
+from core.runtime_manager import RuntimeManager
+from core.result_cache import ResultCache
+from core.manifest_index import ManifestIndex, fingerprint, derive_intents
+from core.dependencies import resolve_dependencies, activation_waves, DependencyError
+from core.deadlines import (
+    PluginTimeout, CallStages, LatencyWindow, DEFAULT_TIMEOUT, DEFAULT_HEDGE_MIN_SAMPLES
+)
+from core.scheduler import Scheduler, QueueTimeout, SchedulerRejected, INTERACTIVE
+from core.metrics import Metrics, MetricsServer, is_error_output
+from core.watcher import PluginWatcher, DEFAULT_POLL_INTERVAL
+
+
+# Default cap on concurrent calls per language in gather_plugins
+DEFAULT_LANGUAGE_CONCURRENCY = 4
+# Threads loading plugin directories in resolve_and_load
+PLUGIN_LOAD_WORKERS = 8
+# Seconds a hot reload waits for a plugin's in-flight calls before swapping it anyway
+RELOAD_DRAIN_TIMEOUT = 30.0
+
 
 class Core:
     """
@@ -18,104 +44,330 @@ class Core:
         self.languages_dir = self.base_dir / "languages"
         self.plugins_dir = self.base_dir / "plugins"
         self.runtime_dir = self.base_dir / "cal_ai" / "runtimes"
+        self.cache_dir = self.base_dir / "cal_ai" / "cache"
+        self.index_path = self.base_dir / "cal_ai" / "plugin_index.json"
+        self.language_loaders = {}   # lang -> loader module name, imported on first use
+        self.language_runtimes = {}  # lang -> RuntimeManager language ("runtime" in its .pmodule)
         self.language_modules = {}
+        self._language_locks = {}
         self.plugins = {}
+        self.call_metrics = Metrics()
+        self.metrics_server = None
+        self.registry = Registry(metrics=self.call_metrics)
+        self.runtime_manager = RuntimeManager(base_dir=str(self.base_dir / "cal_ai"))
+        self.scheduler = Scheduler()
+        self.result_cache = ResultCache(disk_dir=str(self.cache_dir))
+        self.latency = {}        # "plugin:export" -> LatencyWindow
+        self._stats_lock = threading.Lock()
+        self.activation_waves = []   # plugin names in the order they were started
+        self.plugin_listeners = []   # callables(name, plugin entry or None) run after a reload
+        self.watcher = None
+        self._reload_lock = threading.Lock()
         print("[core] initialized")
 
     # ---------------------------------------------------------------------
     # Discovery and loading
     # ---------------------------------------------------------------------
     def resolve_and_load(self):
-        """Discover runtimes, load languages, then load all plugins."""
+        """
+        Discover languages, load all plugins, then activate them in dependency order.
+        Language modules are only imported and constructed when the first plugin
+        needing them is loaded; plugin directories are loaded on a thread pool.
+        Raises DependencyError, before any plugin starts, if "requires" cannot be met.
+        """
         print("[core] discovering languages and plugins...")
 
-        for lang_dir in self.languages_dir.iterdir():
-            if not lang_dir.is_dir():
-                continue
-            lang_name = lang_dir.name.lower()
-            loader_path = lang_dir / "loader.py"
+        with profiler.phase("languages.discover"):
+            for lang_dir in self.languages_dir.iterdir():
+                if not lang_dir.is_dir():
+                    continue
+                lang_name = lang_dir.name.lower()
+                if not (lang_dir / "loader.py").exists():
+                    print(f"[core:warn] No loader for language {lang_name}")
+                    continue
+                self.language_loaders[lang_name] = f"languages.{lang_name}.loader"
+                self.language_runtimes[lang_name] = _pmodule(lang_dir).get("runtime", lang_name)
+                self._language_locks[lang_name] = threading.Lock()
 
-            if not loader_path.exists():
-                print(f"[core:warn] No loader for language {lang_name}")
-                continue
+        # Load all plugins; unchanged ones come straight from the manifest index
+        with profiler.phase("plugins.load"):
+            index = ManifestIndex(self.index_path)
+            plugin_dirs = []
+            for plugin_dir in sorted(self.plugins_dir.iterdir()):
+                if not plugin_dir.is_dir():
+                    continue
+                if not (plugin_dir / "plugin.json").exists():
+                    print(f"[core:warn] Plugin missing metadata: {plugin_dir.name}")
+                    continue
+                plugin_dirs.append(plugin_dir)
+
+            with ThreadPoolExecutor(max_workers=PLUGIN_LOAD_WORKERS, thread_name_prefix="plugin-load") as ex:
+                loaded = [e for e in ex.map(partial(self._try_load_plugin_dir, index=index), plugin_dirs) if e]
+            index.prune(p.resolve() for p in plugin_dirs)
+            index.save()
 
-            mod_name = f"languages.{lang_name}.loader"
+        # Nothing has started yet, so a broken dependency graph aborts cleanly here
+        with profiler.phase("plugins.resolve"):
+            deps = resolve_dependencies({name: entry["meta"] for name, entry in loaded})
+            waves = activation_waves(deps)
+        # register in directory order so listings stay stable
+        for name, entry in loaded:
+            entry["requires"] = sorted(deps[name])
+            self.plugins[name] = entry
+        with profiler.phase("plugins.activate"):
+            self._activate(waves)
+
+    def _activate(self, waves):
+        """Start plugins wave by wave (see core.dependencies); each wave's on_start hooks run in parallel."""
+        failed = set()
+        with ThreadPoolExecutor(max_workers=PLUGIN_LOAD_WORKERS, thread_name_prefix="plugin-start") as ex:
+            for wave in waves:
+                ready = []
+                for name in wave:
+                    if failed.intersection(self.plugins[name]["requires"]):
+                        print(f"[core:error] Not starting {name}: a plugin it requires failed to start")
+                        failed.add(name)
+                    else:
+                        ready.append(name)
+                for name, started in zip(ready, ex.map(self._start_plugin, ready)):
+                    if not started:
+                        failed.add(name)
+        for name in failed:
+            self.registry.unregister_plugin(name)
+            del self.plugins[name]
+        self.activation_waves = [[n for n in wave if n not in failed] for wave in waves]
+
+    def _start_plugin(self, name):
+        """Run an in-process plugin's on_start hook; other isolation modes have nothing to start."""
+        entry = self.registry.plugins.get(name)
+        on_start = getattr(entry["instance"], "on_start", None) if entry else None
+        if not callable(on_start):
+            return True
+        try:
+            with profiler.phase(f"{name} on_start", kind="plugin"):
+                on_start(self)
+            return True
+        except Exception as e:
+            print(f"[core:error] on_start failed for {name}: {e}")
+            return False
+
+    def _language_module(self, lang):
+        """Return the language module for lang, importing and constructing it on first use."""
+        lm = self.language_modules.get(lang)
+        if lm is not None or lang not in self._language_locks:
+            return lm
+        with self._language_locks[lang]:
+            lm = self.language_modules.get(lang)
+            if lm is not None or lang not in self.language_loaders:
+                return lm
             try:
-                mod = importlib.import_module(mod_name)
-                runtime_path = self.find_runtime_path(lang_name)
-                runtime_version = self.detect_runtime_version(lang_name, runtime_path)
-
-                lm = mod.LanguageModule(
-                    core=self,
-                    runtime_path=runtime_path,
-                    runtime_version=runtime_version
-                )
-                self.language_modules[lang_name] = lm
-                print(f"[core] Loaded language module: {lang_name}")
+                with profiler.phase(f"language:{lang}"):
+                    mod = importlib.import_module(self.language_loaders[lang])
+                    runtime_path = self.find_runtime_path(lang)
+                    runtime_version = self.detect_runtime_version(lang, runtime_path)
 
+                    lm = mod.LanguageModule(
+                        core=self,
+                        runtime_path=runtime_path,
+                        runtime_version=runtime_version
+                    )
+                self.language_modules[lang] = lm
+                print(f"[core] Loaded language module: {lang}")
             except Exception as e:
-                print(f"[core:error] Failed to load {lang_name}: {e}")
+                # do not retry for every remaining plugin of this language
+                del self.language_loaders[lang]
+                print(f"[core:error] Failed to load {lang}: {e}")
+            return lm
 
-        # Load all plugins
-        for plugin_dir in self.plugins_dir.iterdir():
-            if not plugin_dir.is_dir():
-                continue
-            plugin_meta = plugin_dir / "plugin.json"
-            if not plugin_meta.exists():
-                print(f"[core:warn] Plugin missing metadata: {plugin_dir.name}")
+    def _try_load_plugin_dir(self, plugin_dir, index):
+        try:
+            with profiler.phase(plugin_dir.name, kind="plugin"):
+                return self._load_plugin_dir(plugin_dir, index)
+        except Exception as e:
+            print(f"[core:error] Failed to load plugin {plugin_dir.name}: {e}")
+            return None
+
+    def _load_plugin_dir(self, plugin_dir, index):
+        """
+        Load one plugin directory, reusing its index entry when plugin.json is unchanged.
+        Returns (name, plugin entry), or None if no runtime can host it.
+        """
+        key = plugin_dir.resolve()
+        fp = fingerprint(plugin_dir)
+        entry = index.lookup(key, fp)
+        if entry is not None:
+            data, plugin_info, intents = entry["meta"], entry["info"], entry["intents"]
+        else:
+            with open(plugin_dir / "plugin.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            plugin_info, intents = None, derive_intents(data)
+
+        lang = data.get("language", "python").lower()
+        lm = self._language_module(lang)
+        if lm is None:
+            print(f"[core:warn] No runtime for {lang}, skipping {plugin_dir.name}")
+            return None
+
+        if plugin_info is None:
+            plugin_info = lm.load_plugin(data, plugin_dir)
+            index.store(key, fp, data, plugin_info, intents)
+        elif hasattr(lm, "restore_plugin"):
+            lm.restore_plugin(data, plugin_info)
+        # the language module may downgrade a mode it cannot provide here
+        isolation = plugin_info.get("isolation", data.get("isolation", "process"))
+        if isolation == "inprocess":
+            self._load_inprocess(plugin_dir.name, lm, data, plugin_info)
+        self.result_cache.invalidate(plugin_dir.name, keep_version=data.get("version"))
+        self.scheduler.set_plugin_limit(plugin_dir.name, data.get("max_concurrency"))
+        cached = " from index" if entry is not None else ""
+        print(f"[core] Registered plugin: {plugin_dir.name} ({lang}, {isolation}){cached}")
+        return plugin_dir.name, {
+            "lang": lang,
+            "meta": data,
+            "info": plugin_info,
+            "isolation": isolation,
+            "intents": intents
+        }
+
+    def _load_inprocess(self, name, lm, data, plugin_info):
+        """Import a trusted plugin once and register its exports; on_start runs at activation."""
+        if not hasattr(lm, "load_inprocess"):
+            raise RuntimeError(f"language '{data.get('language')}' does not support in-process plugins")
+
+        instance = lm.load_inprocess(plugin_info)
+        self.registry.register_plugin(name, instance, data)
+        batch_exports = [o.get("batch_export") for o in (data.get("export_options") or {}).values()]
+        for export_name in data.get("exports", []) + [b for b in batch_exports if b]:
+            func = getattr(instance, export_name, None)
+            if not callable(func):
+                print(f"[core:warn] Plugin {name} declares missing export '{export_name}'")
                 continue
+            self.registry.register_export(name, export_name, func)
 
+    # ---------------------------------------------------------------------
+    # Hot reload
+    # ---------------------------------------------------------------------
+    def add_plugin_listener(self, callback):
+        """Call callback(name, plugin entry) after a plugin is reloaded; entry is None if it was removed."""
+        self.plugin_listeners.append(callback)
+
+    def watch_plugins(self, interval=DEFAULT_POLL_INTERVAL, use_inotify=True):
+        """Start reloading plugins as their directories change (see core.watcher)."""
+        if self.watcher is None:
+            self.watcher = PluginWatcher(self, interval=interval, use_inotify=use_inotify).start()
+        return self.watcher
+
+    def reload_plugin(self, name, drain_timeout=RELOAD_DRAIN_TIMEOUT):
+        """
+        Re-load one plugin directory on the running instance.
+        New calls to the plugin queue while its in-flight calls drain; the old version
+        is then retired (on_stop, modules evicted from the workers, cached results
+        dropped) and the new one loaded, checked against "requires" and started.
+        A directory that is gone unloads the plugin.
+        Returns True if the plugin is loaded afterwards.
+        """
+        plugin_dir = self.plugins_dir / name
+        with self._reload_lock:
+            self.scheduler.pause(name)
             try:
-                with open(plugin_meta, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                if not self.scheduler.drain(name, drain_timeout):
+                    print(f"[core:warn] {name} still busy after {drain_timeout:.3g}s; reloading anyway")
+                # the old entry stays visible so calls arriving meanwhile queue rather than fail
+                old = self.plugins.get(name)
+                if old is not None:
+                    self._retire_plugin(name, old)
+                entry = None
+                if (plugin_dir / "plugin.json").exists():
+                    index = ManifestIndex(self.index_path)
+                    entry = self._try_load_plugin_dir(plugin_dir, index)
+                    index.save()
+                if entry is not None and not self._admit_reloaded(name, entry[1]):
+                    self.registry.unregister_plugin(name)
+                    entry = None
+                if entry is not None:
+                    self.plugins[name] = entry[1]
+                else:
+                    self.plugins.pop(name, None)
+                    self.scheduler.set_plugin_limit(name, None)
+                    print(f"[core] Unloaded plugin: {name}")
+                    dependents = [n for n, p in self.plugins.items() if name in p.get("requires", ())]
+                    if dependents:
+                        print(f"[core:warn] {', '.join(dependents)} require the unloaded plugin {name}")
+            finally:
+                self.scheduler.resume(name)
 
-                lang = data.get("language", "python").lower()
-                if lang not in self.language_modules:
-                    print(f"[core:warn] No runtime for {lang}, skipping {plugin_dir.name}")
-                    continue
+        plugin = entry[1] if entry is not None else None
+        for callback in list(self.plugin_listeners):
+            try:
+                callback(name, plugin)
+            except Exception as e:
+                print(f"[core:warn] Plugin listener failed for {name}: {e}")
+        return plugin is not None
 
-                lm = self.language_modules[lang]
-                plugin_info = lm.load_plugin(data, plugin_dir)
-                self.plugins[plugin_dir.name] = {
-                    "lang": lang,
-                    "meta": data,
-                    "info": plugin_info
-                }
-                print(f"[core] Registered plugin: {plugin_dir.name} ({lang})")
+    def _admit_reloaded(self, name, plugin):
+        """Check a reloaded plugin's requires (and its dependents' ranges), then start it."""
+        manifests = {n: p["meta"] for n, p in self.plugins.items() if n != name}
+        manifests[name] = plugin["meta"]
+        try:
+            deps = resolve_dependencies(manifests)
+            activation_waves(deps)
+        except DependencyError as e:
+            print(f"[core:error] Not reloading {name}: {e}")
+            return False
+        plugin["requires"] = sorted(deps[name])
+        return self._start_plugin(name)
+
+    def _retire_plugin(self, name, plugin):
+        if plugin.get("isolation") == "inprocess":
+            self._stop_inprocess(name)
+        self.registry.unregister_plugin(name)
+        lm = self.language_modules.get(plugin["lang"])
+        if lm is not None and hasattr(lm, "evict_plugin"):
+            lm.evict_plugin(self.plugins_dir / name, plugin["info"])
+        self.result_cache.invalidate(name)
 
+    def _stop_inprocess(self, name):
+        entry = self.registry.plugins.get(name)
+        on_stop = getattr(entry["instance"], "on_stop", None) if entry else None
+        if callable(on_stop):
+            try:
+                on_stop()
             except Exception as e:
-                print(f"[core:error] Failed to load plugin {plugin_dir.name}: {e}")
+                print(f"[core:warn] on_stop failed for {name}: {e}")
 
     # ---------------------------------------------------------------------
     # Runtime helpers
     # ---------------------------------------------------------------------
     def find_runtime_path(self, language):
-        """Locate or create runtime directory for a given language."""
+        """
+        Runtime for a language module: one provisioned under cal_ai/runtimes/<language>
+        if present, else the system binary the RuntimeManager found on PATH.
+        """
         lang_dir = self.runtime_dir / language
         lang_dir.mkdir(parents=True, exist_ok=True)
-        return str(lang_dir)
-
-    def detect_runtime_version(self, language, runtime_path):
-        """Detect runtime version if available."""
-        if language == "python":
-            import sys
-            return f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
-        elif language == "nodejs":
-            import subprocess, shutil
-            node_bin = shutil.which("node")
-            if node_bin:
-                try:
-                    out = subprocess.check_output([node_bin, "--version"], text=True).strip()
-                    return out.lstrip("v")
-                except Exception:
-                    pass
+        if any(lang_dir.iterdir()):
+            return str(lang_dir)
+        system = self.runtime_manager.system_runtime(self.language_runtimes.get(language, language))
+        return system[0] if system else str(lang_dir)
+
+    def detect_runtime_version(self, language, runtime_path=None):
+        """Version of the system runtime, from the RuntimeManager's probe cache."""
+        system = self.runtime_manager.system_runtime(self.language_runtimes.get(language, language))
+        if system and runtime_path in (None, system[0]):
+            return system[1]
         return "unknown"
 
     # ---------------------------------------------------------------------
     # Plugin execution
     # ---------------------------------------------------------------------
-    def run_plugin(self, name, *args, **kwargs):
-        """Run a plugin by name and return its output."""
+    def run_plugin(self, name, *args, timeout=None, priority=INTERACTIVE, **kwargs):
+        """
+        Run a plugin by name and return its output.
+        The call first takes a slot from the scheduler in the given priority class
+        ("interactive" or "background"); time queued counts against the deadline.
+        Raises PluginTimeout if the call misses its deadline (see core.deadlines) and
+        SchedulerRejected if its queue is full (see core.scheduler).
+        """
         if name not in self.plugins:
             return f"[core:error] Plugin '{name}' not found."
 
@@ -125,10 +377,333 @@ class Core:
         if not lm:
             return f"[core:error] Language module '{lang}' missing."
 
+        cache = self._cache_options(name, args)
+        if cache:
+            hit, output = self._cache_get(name, args, cache)
+            if hit:
+                return output
+
+        timeout, hedge_after = self._call_policy(name, args, timeout)
+        stages = CallStages()
+        started = time.perf_counter()
+        try:
+            ticket = self.scheduler.acquire(lang, name, priority, timeout)
+        except QueueTimeout as e:
+            stages.add("queue", e.waited)
+            self._record_call(name, args, None, stages, "timeout")
+            raise PluginTimeout(name, args[0] if args else None, timeout, stages.as_dict()) from None
+        except SchedulerRejected:
+            self._record_call(name, args, None, stages, "rejected")
+            raise
+        stages.add("queue", ticket.waited)
         try:
-            return lm.run_code(plugin["info"], *args, **kwargs)
+            plugin = self._live_plugin(name)
+            if plugin["isolation"] == "inprocess":
+                with stages.measure("execute"):
+                    output = self._run_inprocess(name, lang, lm, *args, stages=stages)
+            else:
+                output = lm.run_code(plugin["info"], *args, timeout=_remaining(timeout, ticket.waited),
+                                     hedge_after=hedge_after, stages=stages, **kwargs)
+        except TimeoutError:
+            self._record_call(name, args, time.perf_counter() - started, stages, "timeout")
+            raise PluginTimeout(name, args[0] if args else None, timeout, stages.as_dict()) from None
         except Exception as e:
+            self._record_call(name, args, time.perf_counter() - started, stages, "core")
             return f"[core:error] Failed to run plugin '{name}': {e}"
+        finally:
+            self.scheduler.release(ticket)
+        self._record_call(name, args, time.perf_counter() - started, stages,
+                          stages.error or ("plugin" if is_error_output(output) else None))
+
+        if cache:
+            self._cache_put(name, args, cache, output)
+        return output
+
+    def run_plugin_batch(self, name, export_name, slots_list, timeout=None, priority=INTERACTIVE):
+        """
+        Run one export over many slot dicts in a single runtime round-trip.
+        Returns one output per slot dict, in order. If the manifest declares a native
+        batch export (export_options.<export>.batch_export) the plugin gets the whole list.
+        The batch takes a single scheduler slot, and the resolved deadline applies to the
+        whole batch; PluginTimeout is raised if it is missed.
+        """
+        slots_list = list(slots_list)
+        if name not in self.plugins:
+            return [f"[core:error] Plugin '{name}' not found."] * len(slots_list)
+
+        plugin = self.plugins[name]
+        lang = plugin["lang"]
+        lm = self.language_modules.get(lang)
+        if not lm:
+            return [f"[core:error] Language module '{lang}' missing."] * len(slots_list)
+
+        options = self.export_options(name, export_name)
+        cache = options.get("cache")
+        outputs = [None] * len(slots_list)
+        pending = list(range(len(slots_list)))
+        if cache:
+            pending = []
+            for i, slots in enumerate(slots_list):
+                hit, output = self._cache_get(name, (export_name, slots), cache)
+                if hit:
+                    outputs[i] = output
+                else:
+                    pending.append(i)
+            if not pending:
+                return outputs
+
+        todo = [slots_list[i] for i in pending]
+        batch_export = options.get("batch_export")
+        timeout, _ = self._call_policy(name, (export_name,), timeout)
+        # a batch is one sample of its own series; its items are not per-call latencies
+        key = f"{name}:{export_name}[batch]"
+        started = time.perf_counter()
+        try:
+            ticket = self.scheduler.acquire(lang, name, priority, timeout)
+        except QueueTimeout as e:
+            self.call_metrics.record(key, None, {"queue": e.waited}, "timeout")
+            raise PluginTimeout(name, export_name, timeout, {"queue": e.waited}) from None
+        except SchedulerRejected:
+            self.call_metrics.record(key, None, None, "rejected")
+            raise
+        remaining = _remaining(timeout, ticket.waited)
+        stages = CallStages()
+        try:
+            plugin = self._live_plugin(name)
+            if plugin["isolation"] == "inprocess":
+                results = self._run_inprocess_batch(name, lang, lm, export_name, todo, batch_export, stages)
+            elif not hasattr(lm, "run_batch"):
+                # one deadline for the whole batch: each item gets what is left of it
+                results = []
+                for slots in todo:
+                    left = _remaining(remaining, time.perf_counter() - started - ticket.waited)
+                    if left == 0.0:
+                        raise TimeoutError(f"batch ran out of time after {len(results)} items")
+                    results.append(lm.run_code(plugin["info"], export_name, slots, timeout=left))
+            else:
+                results = lm.run_batch(plugin["info"], export_name, todo, batch_export=batch_export, timeout=remaining)
+        except TimeoutError:
+            self.call_metrics.record(key, time.perf_counter() - started, {"queue": ticket.waited}, "timeout")
+            raise PluginTimeout(name, export_name, timeout, {"queue": ticket.waited}) from None
+        except Exception as e:
+            stages.fail("core")
+            results = [f"[core:error] Failed to run plugin '{name}': {e}"] * len(todo)
+        finally:
+            self.scheduler.release(ticket)
+        elapsed = time.perf_counter() - started
+        if any(is_error_output(r) for r in results):
+            stages.fail("plugin")
+        self.call_metrics.record(key, elapsed, {"queue": ticket.waited, "execute": elapsed - ticket.waited}, stages.error)
+
+        for i, output in zip(pending, results):
+            outputs[i] = output
+            if cache:
+                self._cache_put(name, (export_name, slots_list[i]), cache, output)
+        return outputs
+
+    def _live_plugin(self, name):
+        """Current entry for a plugin; a hot reload may have swapped it while a call was queued."""
+        plugin = self.plugins.get(name)
+        if plugin is None:
+            raise RuntimeError("plugin was unloaded")
+        return plugin
+
+    def _call_policy(self, name, args, timeout=None):
+        """Resolve (timeout, hedge_after) in seconds for one call; see core.deadlines."""
+        export_name = args[0] if args else None
+        options = self.export_options(name, export_name)
+        if timeout is None:
+            timeout = options.get("timeout", self.plugins[name]["meta"].get("timeout", DEFAULT_TIMEOUT))
+
+        hedge_after = None
+        hedge = options.get("hedge")
+        if hedge and options.get("idempotent"):
+            window = self.latency.get(f"{name}:{export_name}")
+            if window is not None and len(window) >= hedge.get("min_samples", DEFAULT_HEDGE_MIN_SAMPLES):
+                hedge_after = window.percentile(hedge.get("percentile", 95))
+        return (float(timeout) if timeout is not None else None), hedge_after
+
+    def _record_call(self, name, args, seconds, stages, error=None):
+        key = f"{name}:{args[0] if args else None}"
+        self.call_metrics.record(key, seconds, stages.stages, error)
+        if seconds is None or error not in (None, "plugin"):
+            return
+        # hedge delays only learn from calls that ran to completion
+        with self._stats_lock:
+            window = self.latency.get(key)
+            if window is None:
+                window = self.latency[key] = LatencyWindow()
+        window.add(seconds)
+
+    def metrics(self):
+        """
+        Per plugin:export snapshot: calls, errors (total and by kind) and p50/p95/p99
+        latency for the whole call and for each stage. Result-cache hits are not calls;
+        see cache_stats(). Batches are reported as "<plugin>:<export>[batch]".
+        """
+        return self.call_metrics.snapshot()
+
+    def serve_metrics(self, path=None):
+        """Serve metrics in Prometheus text format on a Unix socket (default cal_ai/metrics.sock)."""
+        if self.metrics_server is None:
+            path = path or str(self.base_dir / "cal_ai" / "metrics.sock")
+            self.metrics_server = MetricsServer(self.call_metrics, path)
+            print(f"[core] serving metrics on {path}")
+        return self.metrics_server.path
+
+    def scheduler_stats(self):
+        """Running/queued call counts and queue-wait percentiles per priority class."""
+        return self.scheduler.stats()
+
+    def stage_timings(self):
+        """Per plugin:export call counts and total seconds spent in each call stage."""
+        timings = {}
+        for key, m in self.call_metrics.snapshot().items():
+            timings[key] = {"calls": m["calls"]}
+            timings[key].update((stage, hist["sum"]) for stage, hist in m["stages"].items())
+        return timings
+
+    def export_options(self, name, export_name):
+        """Per-export settings from the manifest's "export_options" section."""
+        meta = self.plugins.get(name, {}).get("meta") or {}
+        return (meta.get("export_options") or {}).get(export_name) or {}
+
+    # ---------------------------------------------------------------------
+    # Result cache
+    # ---------------------------------------------------------------------
+    def _cache_options(self, name, args):
+        return self.export_options(name, args[0] if args else None).get("cache")
+
+    def _cache_get(self, name, args, cache):
+        version = self.plugins[name]["meta"].get("version")
+        slots = args[1] if len(args) > 1 else {}
+        return self.result_cache.get(name, version, args[0], slots, cache)
+
+    def _cache_put(self, name, args, cache, output):
+        version = self.plugins[name]["meta"].get("version")
+        slots = args[1] if len(args) > 1 else {}
+        self.result_cache.put(name, version, args[0], slots, cache, output)
+
+    def cache_stats(self):
+        """Hit/miss counters and entry counts for cached exports."""
+        return self.result_cache.stats()
+
+    async def run_plugin_async(self, name, *args, timeout=None, priority=INTERACTIVE, **kwargs):
+        """
+        Awaitable run_plugin; worker-backed plugins do not block the event loop.
+        Goes through the same scheduler as run_plugin. Raises PluginTimeout if the call
+        misses its deadline and SchedulerRejected if its queue is full.
+        """
+        if name not in self.plugins:
+            return f"[core:error] Plugin '{name}' not found."
+
+        plugin = self.plugins[name]
+        lang = plugin["lang"]
+        lm = self.language_modules.get(lang)
+        if not lm:
+            return f"[core:error] Language module '{lang}' missing."
+
+        cache = self._cache_options(name, args)
+        if cache:
+            hit, output = self._cache_get(name, args, cache)
+            if hit:
+                return output
+
+        timeout, hedge_after = self._call_policy(name, args, timeout)
+        stages = CallStages()
+        started = time.perf_counter()
+        try:
+            ticket = await self.scheduler.acquire_async(lang, name, priority, timeout)
+        except QueueTimeout as e:
+            stages.add("queue", e.waited)
+            self._record_call(name, args, None, stages, "timeout")
+            raise PluginTimeout(name, args[0] if args else None, timeout, stages.as_dict()) from None
+        except SchedulerRejected:
+            self._record_call(name, args, None, stages, "rejected")
+            raise
+        stages.add("queue", ticket.waited)
+        remaining = _remaining(timeout, ticket.waited)
+        loop = asyncio.get_running_loop()
+        try:
+            plugin = self._live_plugin(name)
+            if plugin["isolation"] == "inprocess":
+                with stages.measure("execute"):
+                    output = await loop.run_in_executor(None, partial(self._run_inprocess, name, lang, lm, *args, stages=stages))
+            elif hasattr(lm, "run_code_async"):
+                output = await lm.run_code_async(plugin["info"], *args, timeout=remaining, hedge_after=hedge_after,
+                                                 stages=stages, **kwargs)
+            else:
+                # the loader enforces the deadline itself, as on the sync path; the slot is
+                # held until its thread has actually finished
+                output = await loop.run_in_executor(None, partial(
+                    lm.run_code, plugin["info"], *args, timeout=remaining, hedge_after=hedge_after,
+                    stages=stages, **kwargs))
+        except (TimeoutError, asyncio.TimeoutError):
+            self._record_call(name, args, time.perf_counter() - started, stages, "timeout")
+            raise PluginTimeout(name, args[0] if args else None, timeout, stages.as_dict()) from None
+        except Exception as e:
+            self._record_call(name, args, time.perf_counter() - started, stages, "core")
+            return f"[core:error] Failed to run plugin '{name}': {e}"
+        finally:
+            self.scheduler.release(ticket)
+        self._record_call(name, args, time.perf_counter() - started, stages,
+                          stages.error or ("plugin" if is_error_output(output) else None))
+
+        if cache:
+            self._cache_put(name, args, cache, output)
+        return output
+
+    async def gather_plugins(self, calls, limit_per_language=DEFAULT_LANGUAGE_CONCURRENCY, priority=INTERACTIVE):
+        """
+        Run many plugin exports concurrently.
+        calls is an iterable of (plugin_name, export_name, slots) tuples; results come back
+        in the same order. At most limit_per_language calls from this fan-out run at once
+        for each language, on top of the scheduler's global caps. A call that misses its
+        deadline or is rejected yields its exception in place of an output.
+        """
+        semaphores = {}
+
+        async def run_one(call):
+            name, *args = call
+            lang = self.plugins.get(name, {}).get("lang")
+            sem = semaphores.setdefault(lang, asyncio.Semaphore(limit_per_language))
+            async with sem:
+                return await self.run_plugin_async(name, *args, priority=priority)
+
+        return await asyncio.gather(*(run_one(c) for c in calls), return_exceptions=True)
+
+    def _run_inprocess(self, name, lang, lm, *args, stages=None):
+        """Call a registered in-process export directly; errors are reported like worker errors."""
+        export_name = args[0] if args else None
+        slots = args[1] if len(args) > 1 else {}
+        try:
+            # straight to the callable: Core records this call itself
+            result = self.registry.get_export(name, export_name)(slots)
+        except KeyError:
+            print(f"[{lang}:error] Export '{export_name}' not found or not a function in plugin.")
+            if stages is not None:
+                stages.fail("plugin")
+            return ""
+        except Exception as e:
+            print(f"[{lang}:error] Error executing plugin: {e}")
+            if stages is not None:
+                stages.fail("plugin")
+            return ""
+        return lm.format_result(result)
+
+    def _run_inprocess_batch(self, name, lang, lm, export_name, slots_list, batch_export, stages=None):
+        if not batch_export:
+            return [self._run_inprocess(name, lang, lm, export_name, slots, stages=stages) for slots in slots_list]
+        try:
+            results = self.registry.get_export(name, batch_export)(slots_list)
+            if not isinstance(results, list) or len(results) != len(slots_list):
+                raise ValueError(f"Batch export '{batch_export}' must return a list of {len(slots_list)} results")
+        except Exception as e:
+            print(f"[{lang}:error] Error executing plugin: {e}")
+            if stages is not None:
+                stages.fail("plugin")
+            return [""] * len(slots_list)
+        return [lm.format_result(r) for r in results]
 
     # ---------------------------------------------------------------------
     def list_plugins(self):
@@ -136,10 +711,40 @@ class Core:
         return list(self.plugins.keys())
 
     def stop_all(self):
-        """Gracefully stop all runtimes."""
+        """Stop watching plugins and serving metrics, gracefully stop in-process plugins, then all runtimes."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        # dependents stop before the plugins they require
+        order = [n for wave in reversed(self.activation_waves) for n in reversed(wave)]
+        order += [n for n in self.plugins if n not in order]
+        for name in order:
+            plugin = self.plugins.get(name)
+            if plugin is not None and plugin.get("isolation") == "inprocess":
+                self._stop_inprocess(name)
+
         for lang, lm in self.language_modules.items():
             try:
                 lm.stop()
                 print(f"[core] stopped runtime {lang}")
             except Exception as e:
                 print(f"[core:warn] Failed to stop {lang}: {e}")
+
+
+def _pmodule(lang_dir):
+    """A language directory's <name>.pmodule descriptor, or {} if it has none."""
+    for path in lang_dir.glob("*.pmodule"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[core:warn] Unreadable language descriptor {path.name}: {e}")
+    return {}
+
+
+def _remaining(timeout, spent):
+    """Seconds left of a deadline after spent seconds (None means no deadline)."""
+    return None if timeout is None else max(0.0, timeout - spent)
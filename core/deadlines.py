@@ -0,0 +1,91 @@
+"""
+Deadlines, hedging and per-stage timing for plugin calls.
+
+A call's deadline comes from (first match wins):
+  - the per-call override:                   core.run_plugin(name, export, slots, timeout=2.0)
+  - the export's manifest options:           "export_options": {"<export>": {"timeout": 5}}
+  - the plugin's manifest default:           "timeout": 10
+  - DEFAULT_TIMEOUT
+
+Idempotent exports may also hedge: once a latency history exists, a duplicate request
+is sent if the first has not answered by the configured percentile of recent latencies:
+
+    "export_options": {"<export>": {"idempotent": true, "hedge": {"percentile": 95}}}
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_TIMEOUT = 30.0
+# Latency samples required before hedging kicks in
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 256
+
+
+class PluginTimeout(Exception):
+    """A plugin call did not answer before its deadline."""
+
+    def __init__(self, plugin, export, timeout, stages=None):
+        self.plugin = plugin
+        self.export = export
+        self.timeout = timeout
+        self.stages = dict(stages or {})
+        super().__init__(f"Plugin '{plugin}' export '{export}' timed out after {timeout:.3g}s")
+
+    def to_dict(self):
+        return {"error": "timeout", "plugin": self.plugin, "export": self.export,
+                "timeout": self.timeout, "stages": self.stages}
+
+
+class CallStages:
+    """
+    Seconds spent in each stage (spawn, transport, execute, decode) of one call, and
+    the kind of failure ("plugin", "core", ...) if the runtime reported one.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.error = None
+
+    def fail(self, kind):
+        if self.error is None:
+            self.error = kind
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def as_dict(self):
+        return dict(self.stages)
+
+
+class LatencyWindow:
+    """Most recent call latencies for one plugin:export, used to pick hedge delays."""
+
+    def __init__(self, size=LATENCY_WINDOW):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct):
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
@@ -0,0 +1,80 @@
+"""
+Plugin dependency resolution.
+
+A manifest lists the plugins it needs in "requires"; each entry is a plugin name
+with an optional semver range (see tools.semver_utils.satisfies):
+
+    "requires": ["com.example.weather@^1.0", {"name": "com.example.echo", "version": ">=1.0 <2"}]
+
+Core activates plugins in topological waves: every plugin starts after all the plugins
+it requires, and the plugins within one wave start in parallel.
+"""
+
+from tools.semver_utils import satisfies
+
+
+class DependencyError(RuntimeError):
+    """Raised for a missing dependency, an unsatisfiable version range or a cycle."""
+
+
+def parse_requirement(req):
+    """(name, version range or None) from a "name@range" string or a {"name", "version"} dict."""
+    if isinstance(req, dict):
+        return req.get("name"), req.get("version")
+    name, _, spec = str(req).partition("@")
+    return name.strip(), spec.strip() or None
+
+
+def resolve_dependencies(manifests):
+    """
+    manifests maps plugin key -> manifest. Returns key -> set of keys it requires.
+    A requirement may name a plugin by its key (directory) or by its manifest "name".
+    """
+    keys = {}
+    for key, manifest in manifests.items():
+        keys.setdefault(manifest.get("name") or key, key)
+    keys.update({key: key for key in manifests})
+
+    deps = {}
+    for key, manifest in manifests.items():
+        deps[key] = set()
+        for req in manifest.get("requires") or []:
+            name, spec = parse_requirement(req)
+            target = keys.get(name)
+            if target is None:
+                raise DependencyError(f"Plugin '{key}' requires '{name}', which is not loaded")
+            version = manifests[target].get("version", "0.0.0")
+            try:
+                ok = satisfies(version, spec)
+            except ValueError as e:
+                raise DependencyError(f"Plugin '{key}' has an invalid range for '{name}': {e}")
+            if not ok:
+                raise DependencyError(f"Plugin '{key}' requires '{name}' {spec}, but {version} is loaded")
+            deps[key].add(target)
+    return deps
+
+
+def activation_waves(deps):
+    """Group plugins into waves whose requirements are all met by earlier waves."""
+    remaining = {key: set(d) for key, d in deps.items()}
+    done = set()
+    waves = []
+    while remaining:
+        wave = sorted(key for key, d in remaining.items() if d <= done)
+        if not wave:
+            raise DependencyError(f"Plugin dependency cycle: {' -> '.join(_find_cycle(remaining, done))}")
+        for key in wave:
+            del remaining[key]
+        done.update(wave)
+        waves.append(wave)
+    return waves
+
+
+def _find_cycle(remaining, done):
+    # every blocked plugin waits on another blocked one, so walking the edges must loop
+    path = [min(remaining)]
+    while True:
+        nxt = min(d for d in remaining[path[-1]] if d not in done)
+        if nxt in path:
+            return path[path.index(nxt):] + [nxt]
+        path.append(nxt)
@@ -0,0 +1,95 @@
+"""
+Persistent plugin manifest index.
+
+Stored as <workspace>/cal_ai/plugin_index.json. Each plugin directory is keyed by its
+path and fingerprinted by the directory's mtime plus plugin.json's mtime and size.
+An unchanged plugin is registered straight from its entry (parsed manifest, language
+module plugin info and derived intent specs) without re-reading plugin.json.
+"""
+
+import os
+import json
+import threading
+
+INDEX_VERSION = 1
+
+
+def fingerprint(plugin_dir):
+    """Cheap change detector for a plugin directory (two stat calls)."""
+    d = os.stat(plugin_dir)
+    m = os.stat(os.path.join(plugin_dir, "plugin.json"))
+    return [d.st_mtime_ns, m.st_mtime_ns, m.st_size]
+
+
+def derive_intents(manifest):
+    """Intent specs (plain dicts) declared by a plugin manifest, as the NLU consumes them."""
+    intents = []
+    for iname, idef in (manifest.get('intents') or {}).items():
+        slots = {}
+        for sname, sdef in (idef.get('slots') or {}).items():
+            slots[sname] = {'prompt': sdef.get('prompt'), 'required': sdef.get('required', False), 'validator': sdef.get('validator')}
+        intents.append({
+            "name": iname,
+            "export": idef.get('export') or iname,
+            "keywords": idef.get('keywords', []),
+            "examples": idef.get('examples', []),
+            "slots": slots,
+            "confirm_template": idef.get('confirm_template'),
+        })
+    return intents
+
+
+class ManifestIndex:
+    def __init__(self, path):
+        self.path = str(path)
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.entries = data.get("plugins") or {}
+
+    def lookup(self, plugin_dir, fp):
+        """Indexed entry for plugin_dir if its fingerprint still matches, else None."""
+        entry = self.entries.get(str(plugin_dir))
+        if entry and entry.get("fingerprint") == fp:
+            return entry
+        return None
+
+    def store(self, plugin_dir, fp, meta, info, intents):
+        with self.lock:
+            self.entries[str(plugin_dir)] = {
+                "fingerprint": fp, "meta": meta, "info": info, "intents": intents
+            }
+            self.dirty = True
+
+    def prune(self, live_dirs):
+        """Forget plugin directories that no longer exist."""
+        live = {str(d) for d in live_dirs}
+        with self.lock:
+            for key in [k for k in self.entries if k not in live]:
+                del self.entries[key]
+                self.dirty = True
+
+    def save(self):
+        """Write the index atomically if anything changed."""
+        with self.lock:
+            if not self.dirty:
+                return
+            payload = {"version": INDEX_VERSION, "plugins": self.entries}
+            self.dirty = False
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[core:warn] Could not save plugin index: {e}")
@@ -0,0 +1,220 @@
+"""
+Per-export call metrics.
+
+Every call through Core (and direct Registry.call_export calls) is recorded under
+"plugin:export": call and error counts plus latency histograms for the whole call and
+for each stage (queue, spawn, transport, execute, decode; see core.deadlines.CallStages).
+
+Histograms use fixed log-spaced buckets, so recording is a bisect and an increment
+under one per-export lock and memory does not grow with traffic. Quantiles are
+interpolated within a bucket and are accurate to about BUCKET_GROWTH.
+
+    core.metrics()                       # snapshot dict
+    core.serve_metrics()                 # Prometheus text on cal_ai/metrics.sock
+    socat - UNIX-CONNECT:cal_ai/metrics.sock
+"""
+
+import os
+import re
+import socket
+import threading
+import socketserver
+from bisect import bisect_left
+
+BUCKET_MIN = 25e-6        # seconds
+BUCKET_MAX = 600.0
+BUCKET_GROWTH = 1.2
+QUANTILES = (0.5, 0.95, 0.99)
+
+_ERROR_OUTPUT = re.compile(r"^\[[\w.-]+:(error|exception)\]")
+
+
+def _bounds():
+    bounds = []
+    b = BUCKET_MIN
+    while b < BUCKET_MAX:
+        bounds.append(b)
+        b *= BUCKET_GROWTH
+    bounds.append(BUCKET_MAX)
+    return tuple(bounds)
+
+
+BOUNDS = _bounds()
+
+
+def is_error_output(output):
+    """True for the "[<lang>:error] ..." strings the loaders and Core return on failure."""
+    return isinstance(output, str) and _ERROR_OUTPUT.match(output) is not None
+
+
+class Histogram:
+    """Counts of observations per log-spaced bucket; not locked, the owner serializes."""
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)   # last bucket is overflow
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BOUNDS[i - 1] if i else 0.0
+                high = BOUNDS[i] if i < len(BOUNDS) else self.max
+                return min(self.max, low + (high - low) * max(0.0, rank - seen) / n)
+            seen += n
+        return self.max
+
+    def summary(self):
+        out = {"count": self.count, "sum": self.sum, "max": self.max}
+        for q in QUANTILES:
+            out[f"p{round(q * 100)}"] = self.quantile(q)
+        return out
+
+
+class ExportMetrics:
+    __slots__ = ('lock', 'calls', 'errors', 'latency', 'stages')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = {}      # kind -> count
+        self.latency = Histogram()
+        self.stages = {}      # stage -> Histogram
+
+    def record(self, seconds, stages, error):
+        with self.lock:
+            self.calls += 1
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            if seconds is not None:
+                self.latency.observe(seconds)
+            for stage, spent in stages.items():
+                hist = self.stages.get(stage)
+                if hist is None:
+                    hist = self.stages[stage] = Histogram()
+                hist.observe(spent)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "errors": sum(self.errors.values()),
+                "errors_by_kind": dict(self.errors),
+                "latency": self.latency.summary(),
+                "stages": {stage: hist.summary() for stage, hist in self.stages.items()},
+            }
+
+
+class Metrics:
+    """Registry of ExportMetrics keyed by "plugin:export"."""
+
+    def __init__(self):
+        self.exports = {}
+        self.lock = threading.Lock()
+
+    def _series(self, key):
+        series = self.exports.get(key)
+        if series is None:
+            with self.lock:
+                series = self.exports.setdefault(key, ExportMetrics())
+        return series
+
+    def record(self, key, seconds, stages=None, error=None):
+        """
+        One finished call: total seconds (None if it never ran), {stage: seconds} and
+        an error kind ("plugin", "core", "timeout", "rejected", ...) or None.
+        """
+        self._series(key).record(seconds, stages or {}, error)
+
+    def snapshot(self):
+        with self.lock:
+            items = list(self.exports.items())
+        return {key: series.snapshot() for key, series in sorted(items)}
+
+    def reset(self):
+        with self.lock:
+            self.exports = {}
+
+    def prometheus(self):
+        """The snapshot in Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(key, **extra):
+            plugin, _, export = key.partition(":")
+            pairs = [("plugin", plugin), ("export", export)] + list(extra.items())
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+        def summary(name, key, hist, **extra):
+            for q in QUANTILES:
+                value = hist[f"p{round(q * 100)}"]
+                if value is not None:
+                    lines.append(f"{name}{labels(key, **extra, quantile=q)} {value:.9g}")
+            lines.append(f"{name}_sum{labels(key, **extra)} {hist['sum']:.9g}")
+            lines.append(f"{name}_count{labels(key, **extra)} {hist['count']}")
+
+        header("cal_plugin_calls_total", "counter", "Plugin export calls.")
+        for key, m in snap.items():
+            lines.append(f"cal_plugin_calls_total{labels(key)} {m['calls']}")
+        header("cal_plugin_errors_total", "counter", "Failed plugin export calls by kind.")
+        for key, m in snap.items():
+            for kind, n in sorted(m["errors_by_kind"].items()):
+                lines.append(f"cal_plugin_errors_total{labels(key, kind=kind)} {n}")
+        header("cal_plugin_call_seconds", "summary", "Plugin export call latency.")
+        for key, m in snap.items():
+            summary("cal_plugin_call_seconds", key, m["latency"])
+        header("cal_plugin_stage_seconds", "summary", "Plugin export latency by call stage.")
+        for key, m in snap.items():
+            for stage, hist in sorted(m["stages"].items()):
+                summary("cal_plugin_stage_seconds", key, hist, stage=stage)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """Writes metrics.prometheus() to each client that connects to a Unix socket."""
+
+    def __init__(self, metrics, path):
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not available on this platform")
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)   # stale socket from an earlier run
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(handler):
+                handler.request.sendall(metrics.prometheus().encode("utf-8"))
+
+        self.server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        self.server.daemon_threads = True
+        os.chmod(path, 0o600)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="cal-metrics", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,125 @@
+"""
+Startup profiler.
+
+Entry points enable it before anything heavy is imported:
+
+    profiler.enable()
+    with profiler.phase("core.init"):
+        core = Core(workspace)
+
+Code along the boot path marks its phases with profiler.phase(name); while no
+profiler is enabled that is a no-op. Each phase records wall time and the change in
+resident memory. Per-plugin phases run on the loader thread pool, so their RSS deltas
+overlap and only indicate which plugins allocate heavily.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+_active = None
+
+
+def enable():
+    """Start recording phases process-wide and return the profiler."""
+    global _active
+    _active = StartupProfiler()
+    return _active
+
+
+def active():
+    return _active
+
+
+@contextmanager
+def phase(name, kind="phase"):
+    """Record a phase on the enabled profiler, if any."""
+    if _active is None:
+        yield
+        return
+    with _active.phase(name, kind):
+        yield
+
+
+def rss_bytes():
+    """Current resident set size, or None where it cannot be read cheaply."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # peak, not current: kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.start_rss = rss_bytes()
+        self.phases = []     # dicts in start order
+        self.lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name, kind="phase"):
+        stack = self._local.__dict__.setdefault("stack", [])
+        record = {"name": name, "kind": kind, "depth": len(stack),
+                  "offset_ms": (time.perf_counter() - self.started) * 1000.0}
+        with self.lock:
+            self.phases.append(record)
+        stack.append(name)
+        rss = rss_bytes()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_ms"] = (time.perf_counter() - started) * 1000.0
+            after = rss_bytes()
+            record["rss_delta_kb"] = None if rss is None or after is None else (after - rss) // 1024
+            stack.pop()
+
+    def report(self):
+        """Phases and per-plugin timings as a JSON-serialisable dict."""
+        with self.lock:
+            phases = [dict(p) for p in self.phases]
+        rss = rss_bytes()
+        return {
+            "total_ms": (time.perf_counter() - self.started) * 1000.0,
+            "rss_kb": None if rss is None else rss // 1024,
+            "rss_delta_kb": None if rss is None or self.start_rss is None else (rss - self.start_rss) // 1024,
+            "phases": [p for p in phases if p["kind"] != "plugin"],
+            "plugins": {p["name"]: {"wall_ms": p.get("wall_ms"), "rss_delta_kb": p.get("rss_delta_kb")}
+                        for p in phases if p["kind"] == "plugin"},
+        }
+
+    def dump_json(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def format_table(self):
+        report = self.report()
+        lines = [f"{'phase':<44} {'wall ms':>10} {'rss KiB':>10}"]
+
+        def row(label, wall, rss):
+            wall = "-" if wall is None else f"{wall:.1f}"
+            rss = "-" if rss is None else f"{rss:+d}"
+            lines.append(f"{label[:44]:<44} {wall:>10} {rss:>10}")
+
+        for p in report["phases"]:
+            row("  " * p["depth"] + p["name"], p.get("wall_ms"), p.get("rss_delta_kb"))
+        if report["plugins"]:
+            lines.append("plugins (loaded concurrently):")
+            slowest = sorted(report["plugins"].items(), key=lambda kv: -(kv[1]["wall_ms"] or 0))
+            for name, p in slowest:
+                row("  " + name, p["wall_ms"], p["rss_delta_kb"])
+        row("total", report["total_ms"], report["rss_delta_kb"])
+        return "\n".join(lines)
@@ -1,10 +1,14 @@
+import time
+
+
 class Registry:
     """
     Simple registry: stores plugin instances and callables (exports).
     """
-    def __init__(self):
+    def __init__(self, metrics=None):
         self.plugins = {}   # plugin_name -> { instance, manifest }
         self.exports = {}   # "plugin:export" -> callable
+        self.metrics = metrics   # optional core.metrics.Metrics for call_export
 
     def register_plugin(self, name, instance, manifest):
         self.plugins[name] = {'instance': instance, 'manifest': manifest}
@@ -13,11 +17,30 @@ class Registry:
         key = f"{plugin_name}:{export_name}"
         self.exports[key] = callable_handle
 
-    def call_export(self, plugin_name, export_name, *args, **kwargs):
+    def unregister_plugin(self, name):
+        self.plugins.pop(name, None)
+        for key in [k for k in self.exports if k.startswith(f"{name}:")]:
+            del self.exports[key]
+
+    def get_export(self, plugin_name, export_name):
         key = f"{plugin_name}:{export_name}"
         if key not in self.exports:
             raise KeyError(f"Export not found: {key}")
-        return self.exports[key](*args, **kwargs)
+        return self.exports[key]
+
+    def call_export(self, plugin_name, export_name, *args, **kwargs):
+        func = self.get_export(plugin_name, export_name)
+        if self.metrics is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        error = "plugin"
+        try:
+            result = func(*args, **kwargs)
+            error = None
+            return result
+        finally:
+            seconds = time.perf_counter() - started
+            self.metrics.record(f"{plugin_name}:{export_name}", seconds, {"execute": seconds}, error)
 
     def get_manifest(self, plugin_name):
         p = self.plugins.get(plugin_name)
@@ -0,0 +1,156 @@
+"""
+Result cache for plugin exports.
+
+Exports opt in through their manifest:
+
+    "export_options": {
+        "get_weather": {
+            "cache": {"ttl": 300, "max_entries": 128, "key": ["city"], "disk": true}
+        }
+    }
+
+Entries live in a bounded per-export LRU in memory; with "disk": true they are also
+written under <workspace>/cal_ai/cache/<plugin>/<version>/<export>/ so they survive
+restarts. Entries are scoped to the plugin version, and a reload drops the plugin's
+in-memory entries.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+from core.metrics import is_error_output
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 256
+
+
+def cacheable(output):
+    # failures the runtimes report ("[<lang>:error] ...") are never cached
+    return isinstance(output, str) and bool(output) and not is_error_output(output)
+
+
+class ResultCache:
+    def __init__(self, disk_dir=None):
+        self.disk_dir = disk_dir
+        self.partitions = {}    # (plugin, version, export) -> OrderedDict(key -> (expires, output))
+        self.hits = {}          # "plugin:export" -> count
+        self.misses = {}
+        self.lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def make_key(self, slots, options):
+        """Cache key from the slots named in options["key"] (all slots if unset)."""
+        slots = slots if isinstance(slots, dict) else {"_": slots}
+        names = options.get("key")
+        if names:
+            slots = {n: slots.get(n) for n in names}
+        return json.dumps(slots, sort_keys=True, default=str)
+
+    def _disk_path(self, plugin, version, export, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, plugin, str(version), export, f"{digest}.json")
+
+    def _count(self, table, plugin, export):
+        name = f"{plugin}:{export}"
+        table[name] = table.get(name, 0) + 1
+
+    # ------------------------------------------------------------------
+    def get(self, plugin, version, export, slots, options):
+        """Return (True, output) on a fresh hit, else (False, None)."""
+        key = self.make_key(slots, options)
+        now = time.time()
+        with self.lock:
+            part = self.partitions.get((plugin, version, export))
+            entry = part.get(key) if part is not None else None
+            if entry is not None:
+                if entry[0] > now:
+                    part.move_to_end(key)
+                    self._count(self.hits, plugin, export)
+                    return True, entry[1]
+                del part[key]
+
+        if options.get("disk") and self.disk_dir:
+            entry = self._read_disk(plugin, version, export, key)
+            if entry is not None and entry[0] > now:
+                self._store(plugin, version, export, key, entry, options)
+                with self.lock:
+                    self._count(self.hits, plugin, export)
+                return True, entry[1]
+
+        with self.lock:
+            self._count(self.misses, plugin, export)
+        return False, None
+
+    def put(self, plugin, version, export, slots, options, output):
+        if not cacheable(output):
+            return
+        key = self.make_key(slots, options)
+        entry = (time.time() + float(options.get("ttl", DEFAULT_TTL)), output)
+        self._store(plugin, version, export, key, entry, options)
+        if options.get("disk") and self.disk_dir:
+            self._write_disk(plugin, version, export, key, entry)
+
+    def _store(self, plugin, version, export, key, entry, options):
+        max_entries = int(options.get("max_entries", DEFAULT_MAX_ENTRIES))
+        with self.lock:
+            part = self.partitions.setdefault((plugin, version, export), OrderedDict())
+            part[key] = entry
+            part.move_to_end(key)
+            while len(part) > max_entries:
+                part.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    def _read_disk(self, plugin, version, export, key):
+        try:
+            with open(self._disk_path(plugin, version, export, key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["expires"], data["output"]
+        except Exception:
+            return None
+
+    def _write_disk(self, plugin, version, export, key, entry):
+        path = self._disk_path(plugin, version, export, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"expires": entry[0], "output": entry[1]}, f)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"[core:warn] Could not write cache entry for {plugin}:{export}: {e}")
+
+    # ------------------------------------------------------------------
+    def invalidate(self, plugin, keep_version=None):
+        """
+        Drop every in-memory entry for a plugin, plus on-disk entries for all
+        versions other than keep_version.
+        """
+        with self.lock:
+            for part_key in [k for k in self.partitions if k[0] == plugin]:
+                del self.partitions[part_key]
+        if not self.disk_dir:
+            return
+        plugin_dir = os.path.join(self.disk_dir, plugin)
+        if not os.path.isdir(plugin_dir):
+            return
+        for version in os.listdir(plugin_dir):
+            if keep_version is None or version != str(keep_version):
+                shutil.rmtree(os.path.join(plugin_dir, version), ignore_errors=True)
+
+    def stats(self):
+        """Hit/miss counters and live entry counts per plugin:export."""
+        with self.lock:
+            names = set(self.hits) | set(self.misses)
+            entries = {}
+            for (plugin, _, export), part in self.partitions.items():
+                name = f"{plugin}:{export}"
+                names.add(name)
+                entries[name] = entries.get(name, 0) + len(part)
+            return {n: {"hits": self.hits.get(n, 0),
+                        "misses": self.misses.get(n, 0),
+                        "entries": entries.get(n, 0)} for n in sorted(names)}
@@ -1,15 +1,31 @@
 import os
+import re
 import json
 import time
 import shutil
 import subprocess
 import sys
-from tools.semver_utils import Version
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tools.semver_utils import VersionIndex
+from core.runtime_store import open_store, FileLock
+from core.blob_store import BlobStore, sha256_file
+
+# language -> candidate binaries in order of preference: (binary, version flag, version regex)
+SYSTEM_PROBES = {
+    "python": [("python3","--version", r"Python (\d+\.\d+\.\d+)"),
+               ("python","--version", r"Python (\d+\.\d+\.\d+)")],
+    "node": [("node","--version", r"v?(\d+\.\d+\.\d+)")],
+    "go":   [("go","version", r"go version go(\d+\.\d+\.\d+)")]
+}
+PROBE_TIMEOUT = 2
 
 class RuntimeManager:
     """
     Discovers system runtimes (python/node/go) and otherwise creates a cross-platform simulated runtime.
-    Stores installations under base_dir (default /cal_ai/cal_runtimes).
+    Stores installations under base_dir (default /cal_ai/cal_runtimes); their files live once in
+    base_dir/blobs and each runtimes/<language>/<version> tree hardlinks them.
     """
     def __init__(self, base_dir=None, policy=None):
         # default base dir under workspace root if provided, else /cal_ai
@@ -19,75 +35,141 @@ class RuntimeManager:
         self.base_dir = os.path.expanduser(env_base or default_base)
         os.makedirs(self.base_dir, exist_ok=True)
         self.cache_file = os.path.join(self.base_dir, 'runtime_cache.json')
-        self.cache = self._load_cache()
         self.policy = policy or {'prefer_reuse': True}
         self.locks_dir = os.path.join(self.base_dir, 'locks')
         os.makedirs(self.locks_dir, exist_ok=True)
+        self.store = open_store(self.cache_file, self.locks_dir)
+        self._indexes = {}   # language -> VersionIndex over cache[language], built on first use
+        self._indexes_generation = self.store.generation
+        self._discover_lock = threading.Lock()
+        self._index_lock = threading.RLock()
+        self.blobs = BlobStore(os.path.join(self.base_dir, 'blobs'))
+        self.blob_lock = os.path.join(self.locks_dir, 'blobs.lock')
 
-    def _load_cache(self):
-        try:
-            with open(self.cache_file, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return {}
-
-    def _save_cache(self):
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
-        except Exception:
-            pass
+    @property
+    def cache(self):
+        """Read-only snapshot of runtime_cache.json; change it through self.store."""
+        return self.store.snapshot()
 
     def discover_system_runtimes(self):
         """
         Probe PATH for common runtimes and record them in cache as language->version->path.
+        Each binary's probe result is cached with its resolved path, mtime and size and
+        reused until one of those or PATH itself changes; stale binaries are re-probed
+        in parallel, so a warm start runs no subprocesses at all.
         """
-        if self.cache.get('_discovered'):
-            return
-        candidates = {
-            "python": [("python3","--version", r"Python (\d+\.\d+\.\d+)"),
-                       ("python","--version", r"Python (\d+\.\d+\.\d+)")],
-            "node": [("node","--version", r"v?(\d+\.\d+\.\d+)")],
-            "go":   [("go","version", r"go version go(\d+\.\d+\.\d+)")]
-        }
-        import re
-        for lang, bins in candidates.items():
-            for bin_name, arg, regex in bins:
-                path = shutil.which(bin_name)
-                if not path:
-                    continue
-                try:
-                    proc = subprocess.run([path, arg], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=2)
-                    m = re.search(regex, proc.stdout or "")
-                    if m:
-                        ver = m.group(1)
-                        # store path to binary's directory
-                        self._record_install(lang, ver, os.path.dirname(path))
-                        print(f"[CAL][runtime] Found system {lang} {ver} at {path}")
-                        break
-                except Exception:
-                    continue
-        self.cache['_discovered'] = True
-        self._save_cache()
+        with self._discover_lock:
+            path_env = os.environ.get('PATH', '')
+            probes = self.cache.get('_probes', {}) if self.cache.get('_path_env') == path_env else {}
+            fresh, stale = {}, []
+            for lang, bins in SYSTEM_PROBES.items():
+                for bin_name, arg, regex in bins:
+                    path = shutil.which(bin_name)
+                    if not path:
+                        continue
+                    real = os.path.realpath(path)
+                    try:
+                        st = os.stat(real)
+                    except OSError:
+                        continue
+                    entry = {'lang': lang, 'path': path, 'real': real, 'mtime': st.st_mtime_ns, 'size': st.st_size}
+                    cached = probes.get(bin_name)
+                    if cached and all(cached.get(k) == v for k, v in entry.items()):
+                        fresh[bin_name] = cached
+                    else:
+                        stale.append((bin_name, arg, regex, entry))
+            if stale:
+                with ThreadPoolExecutor(max_workers=len(stale)) as ex:
+                    for bin_name, entry in ex.map(self._probe, stale):
+                        fresh[bin_name] = entry
+
+            store = self.store
+            cache = store.snapshot()
+            if cache.get('_probes') != fresh or cache.get('_path_env') != path_env:
+                store.set(('_probes',), fresh)
+                store.set(('_path_env',), path_env)
+            if '_discovered' in cache:
+                store.delete(('_discovered',))
+            system = {}
+            for lang, bins in SYSTEM_PROBES.items():
+                entry = next((fresh[b[0]] for b in bins if fresh.get(b[0], {}).get('version')), None)
+                previous = cache.get('_system', {}).get(lang)
+                if previous and (entry is None or previous != entry['version']):
+                    # the system binary went away or changed version
+                    store.delete((lang, previous))
+                    self._indexes.pop(lang, None)
+                if entry is not None:
+                    # store path to binary's directory
+                    bin_dir = os.path.dirname(entry['path'])
+                    if cache.get(lang, {}).get(entry['version']) != bin_dir:
+                        store.set((lang, entry['version']), bin_dir)
+                        self._indexes.pop(lang, None)
+                    system[lang] = entry['version']
+            if cache.get('_system') != system:
+                store.set(('_system',), system)
+
+    def _probe(self, job):
+        bin_name, arg, regex, entry = job
+        entry = dict(entry, version=None)
+        try:
+            proc = subprocess.run([entry['path'], arg], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=PROBE_TIMEOUT)
+            m = re.search(regex, proc.stdout or "")
+            if m:
+                entry['version'] = m.group(1)
+                print(f"[CAL][runtime] Found system {entry['lang']} {entry['version']} at {entry['path']}")
+        except Exception:
+            pass
+        # failed probes are cached too, so a broken binary is not re-run on every start
+        return bin_name, entry
+
+    def system_runtime(self, language):
+        """(binary path, version) of the preferred system runtime for language, or None."""
+        self.discover_system_runtimes()
+        probes = self.cache.get('_probes', {})
+        for bin_name, _, _ in SYSTEM_PROBES.get(language, ()):
+            entry = probes.get(bin_name)
+            if entry and entry.get('version'):
+                return entry['path'], entry['version']
+        return None
 
     def find_installed_versions(self, language):
-        return list(self.cache.get(language, {}).keys())
+        return list(self.version_index(language))
+
+    def version_index(self, language):
+        """Installed versions of a language, parsed once and kept sorted."""
+        with self._index_lock:
+            return self._version_index(language)
+
+    def _version_index(self, language):
+        cache = self.cache
+        if self._indexes_generation != self.store.generation:
+            # another process changed the file since the indexes were built
+            self._indexes = {}
+            self._indexes_generation = self.store.generation
+        index = self._indexes.get(language)
+        if index is None:
+            index = self._indexes[language] = VersionIndex(cache.get(language, {}).keys())
+        return index
 
     def _max_version(self, versions):
         if not versions:
             return None
-        return max(versions, key=lambda v: Version(v))
+        return versions.latest() if isinstance(versions, VersionIndex) else VersionIndex(versions).latest()
 
     def find_compatible_version(self, installed_versions, version_spec):
+        """
+        Highest installed version matching version_spec (see tools.semver_utils ranges).
+        installed_versions may be a VersionIndex (bisected) or a plain list of versions.
+        """
+        index = installed_versions if isinstance(installed_versions, VersionIndex) else VersionIndex(installed_versions)
         if not version_spec or version_spec in ('latest','*', None):
-            return self._max_version(installed_versions)
-        if version_spec in installed_versions:
-            return version_spec
-        if isinstance(version_spec, str) and version_spec.startswith('^'):
-            base = Version(version_spec[1:])
-            cand = [v for v in installed_versions if Version(v).parts[0] == base.parts[0] and Version(v) >= base]
-            return max(cand, key=lambda v: Version(v)) if cand else None
-        return None
+            return index.latest()
+        # a bare version is a range too ("3.11" is 3.11.x); either way the installed
+        # version's own string comes back, never the spec
+        try:
+            return index.max_satisfying(version_spec)
+        except ValueError:
+            return None
 
     def choose_version_to_install(self, language, version_spec):
         defaults = {'python':'3.11.5', 'node':'20.6.0', 'go':'1.21.3'}
@@ -96,22 +178,23 @@ class RuntimeManager:
         return version_spec
 
     def ensure_runtime(self, language, version_spec):
-        # discover system runtimes once
+        # refresh system runtimes (no subprocesses unless a binary changed)
         self.discover_system_runtimes()
-        installed = self.find_installed_versions(language)
-        found = self.find_compatible_version(installed, version_spec)
+        found = self.find_compatible_version(self.version_index(language), version_spec)
         if found:
             return (self.get_runtime_path(language, found), found)
         to_install = self.choose_version_to_install(language, version_spec)
         lockfh = self._acquire_lock(language, to_install)
         try:
-            # re-check after lock
-            installed = self.find_installed_versions(language)
-            found = self.find_compatible_version(installed, version_spec)
+            # re-check after lock; whoever held it may have just installed this
+            self.store.refresh()
+            found = self.find_compatible_version(self.version_index(language), version_spec)
             if found:
                 return (self.get_runtime_path(language, found), found)
             path = self.download_and_install(language, to_install)
             self._record_install(language, to_install, path)
+            # other processes waiting on this install lock re-check the file next
+            self.store.flush()
             return (path, to_install)
         finally:
             self._release_lock(lockfh)
@@ -138,45 +221,150 @@ class RuntimeManager:
             pass
 
     def _record_install(self, language, version, path):
-        self.cache.setdefault(language, {})[version] = path
-        self._save_cache()
+        with self._index_lock:
+            self.version_index(language).add(version)
+        self.store.set((language, version), path)
 
     def get_runtime_path(self, language, version):
         return self.cache[language][version]
 
+    def _runtime_files(self, language, version):
+        """relative path -> (content, executable) of the simulated runtime tree."""
+        # the scripts read their version from the tree they sit in, so every version of
+        # a language has byte-identical files and shares its blobs
+        if sys.platform.startswith("win"):
+            script = ("@echo off\r\n"
+                      'for %%I in ("%~dp0..") do set CAL_VERSION=%%~nxI\r\n'
+                      f"echo SIMULATED RUNTIME: {language} %CAL_VERSION%\r\n"
+                      # simple echo: read a line and write it back
+                      "set /p IN=\r\n"
+                      "echo %IN%\r\n")
+            return {f"bin/{language}_runtime.bat": (script.encode(), True)}
+        script = ("#!/bin/sh\n"
+                  'tree=${0%/*}; tree=${tree%/*}; version=${tree##*/}\n'
+                  f'echo "SIMULATED RUNTIME: {language} $version" >&2\n'
+                  "cat -\n")
+        return {f"bin/{language}_runtime": (script.encode(), True)}
+
     def download_and_install(self, language, version):
         """
         Create a cross-platform simulated runtime under base_dir/runtimes/<language>/<version>/bin/
         On Windows produce a .bat; on POSIX produce an executable shell script.
         The simulated runtime is intentionally simple for dev/testing: it echoes stdin to stdout.
+        Files go into the blob store first and the tree is materialized from it in a
+        staging directory, verified and renamed into place; meta.json records every
+        file's checksum.
         """
         target = os.path.join(self.base_dir, 'runtimes', language, version)
-        os.makedirs(target, exist_ok=True)
-        meta = {'language':language, 'version':version, 'installed_at': time.time()}
-        try:
-            with open(os.path.join(target,'meta.json'),'w') as f:
-                json.dump(meta, f, indent=2)
-        except Exception:
-            pass
-        bin_dir = os.path.join(target, 'bin')
-        os.makedirs(bin_dir, exist_ok=True)
-        import stat
-        if sys.platform.startswith("win"):
-            exe_name = f"{language}_runtime.bat"
-            exe_path = os.path.join(bin_dir, exe_name)
-            with open(exe_path, 'w', newline='\r\n') as fh:
-                fh.write(f"@echo off\r\n")
-                fh.write(f"echo SIMULATED RUNTIME: {language} {version}\r\n")
-                # simple echo: read a line and write it back
-                fh.write("set /p IN=\r\n")
-                fh.write("echo %IN%\r\n")
-        else:
-            exe_name = f"{language}_runtime"
-            exe_path = os.path.join(bin_dir, exe_name)
-            with open(exe_path, 'w', newline='\n') as fh:
-                fh.write("#!/bin/sh\n")
-                fh.write(f'echo "SIMULATED RUNTIME: {language} {version}" >&2\n')
-                fh.write("cat -\n")
-            st = os.stat(exe_path)
-            os.chmod(exe_path, st.st_mode | stat.S_IEXEC)
+        if os.path.isdir(target):
+            if not self.verify_runtime(language, version):
+                return target
+            shutil.rmtree(target)
+        parent = os.path.dirname(target)
+        os.makedirs(parent, exist_ok=True)
+        files = {}
+        # shared: gc() must not collect blobs between put and link
+        with FileLock(self.blob_lock, exclusive=False):
+            staging = tempfile.mkdtemp(prefix=f'.{version}.', dir=parent)
+            try:
+                for rel, (content, executable) in self._runtime_files(language, version).items():
+                    key, digest = self.blobs.put_bytes(content, executable)
+                    dest = os.path.join(staging, *rel.split('/'))
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    self.blobs.materialize(key, dest)
+                    files[rel] = {'sha256': digest, 'size': len(content), 'blob': key}
+                meta = {'language': language, 'version': version, 'installed_at': time.time(), 'files': files}
+                with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                    json.dump(meta, f, indent=2)
+                bad = self._verify_tree(staging)
+                if bad:
+                    raise RuntimeError(f"{language} {version}: staged files do not match their checksums: {bad}")
+                os.rename(staging, target)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
         return target
+
+    def _read_meta(self, tree):
+        try:
+            with open(os.path.join(tree, 'meta.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def verify_runtime(self, language, version):
+        """
+        Re-hash a provisioned runtime against the checksums in its meta.json.
+        Returns the relative paths that are missing or changed; [] means intact.
+        """
+        return self._verify_tree(os.path.join(self.base_dir, 'runtimes', language, version))
+
+    def _verify_tree(self, tree):
+        meta = self._read_meta(tree)
+        if not meta or 'files' not in meta:
+            return ['meta.json']
+        bad = []
+        for rel, info in sorted(meta['files'].items()):
+            try:
+                if sha256_file(os.path.join(tree, *rel.split('/'))) != info['sha256']:
+                    bad.append(rel)
+            except OSError:
+                bad.append(rel)
+        return bad
+
+    def provision(self, requests, max_workers=4):
+        """
+        ensure_runtime() for many (language, version_spec) pairs at once. Different
+        versions install concurrently; the same version is still serialized by its lock.
+        Returns {(language, version_spec): (path, version) or None if it failed}.
+        """
+        requests = list(dict.fromkeys(requests))
+        results = {}
+        if not requests:
+            return results
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests)))) as ex:
+            futures = {req: ex.submit(self.ensure_runtime, *req) for req in requests}
+            for req, fut in futures.items():
+                try:
+                    results[req] = fut.result()
+                except Exception as e:
+                    print(f"[CAL][runtime] Could not provision {req[0]} {req[1]}: {e}")
+                    results[req] = None
+        return results
+
+    def gc(self, keep=None):
+        """
+        Remove provisioned runtimes the cache no longer references (and, if keep is
+        given, every provisioned (language, version) not in keep), leftover staging
+        directories, and then the blobs no remaining runtime's meta.json lists.
+        Returns {'runtimes': [(language, version)], 'blobs': count, 'bytes': freed}.
+        """
+        keep = None if keep is None else set(keep)
+        root = os.path.join(self.base_dir, 'runtimes')
+        removed, live = [], set()
+        with FileLock(self.blob_lock, exclusive=True):
+            cache = self.store.refresh()
+            for language in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+                lang_dir = os.path.join(root, language)
+                for version in sorted(os.listdir(lang_dir)):
+                    tree = os.path.join(lang_dir, version)
+                    if version.startswith('.'):
+                        shutil.rmtree(tree, ignore_errors=True)
+                        continue
+                    recorded = cache.get(language, {}).get(version) == tree
+                    if recorded and (keep is None or (language, version) in keep):
+                        live.update(f['blob'] for f in ((self._read_meta(tree) or {}).get('files') or {}).values())
+                        continue
+                    shutil.rmtree(tree, ignore_errors=True)
+                    if recorded:
+                        self.store.delete((language, version))
+                        with self._index_lock:
+                            self.version_index(language).remove(version)
+                    removed.append((language, version))
+            blobs = freed = 0
+            for key in list(self.blobs.keys()):
+                if key not in live:
+                    freed += self.blobs.remove(key)
+                    blobs += 1
+        self.store.flush()
+        return {'runtimes': removed, 'blobs': blobs, 'bytes': freed}
@@ -0,0 +1,215 @@
+"""
+Shared runtime cache store (runtime_cache.json).
+
+Several assistant processes on one host share the file, so every write takes an
+exclusive flock on locks/runtime_cache.lock (the same directory the install locks
+live in), re-reads what other processes wrote, replays this process's pending
+changes on top and atomically replaces the file (temp file + rename). Changes are
+batched: set()/delete() update the in-memory snapshot at once and a write-behind
+timer flushes them FLUSH_DELAY later, or flush() writes them immediately.
+
+Readers get snapshot(), a dict that is never mutated afterwards. It is re-read from
+disk only when the file's stat changes, and that is checked at most once per
+REFRESH_INTERVAL.
+"""
+
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+
+FLUSH_DELAY = 0.5
+REFRESH_INTERVAL = 1.0
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path, locks_dir):
+    """The process-wide store for path; every RuntimeManager on one file shares it."""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = RuntimeStore(path, locks_dir)
+        return store
+
+
+@atexit.register
+def _flush_all():
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+
+class FileLock:
+    """flock held for a with-block; a no-op where fcntl is unavailable."""
+    def __init__(self, path, exclusive):
+        self.path = path
+        self.exclusive = exclusive
+        self.fh = None
+
+    def __enter__(self):
+        self.fh = open(self.path, 'a')
+        try:
+            import fcntl
+            fcntl.flock(self.fh, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        except Exception:
+            pass
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            import fcntl
+            fcntl.flock(self.fh, fcntl.LOCK_UN)
+        except Exception:
+            pass
+        self.fh.close()
+
+
+def _apply(data, op):
+    """New dict with one ('set', keys, value) or ('delete', keys, None) applied."""
+    kind, keys, value = op
+    root = dict(data)
+    node = root
+    for key in keys[:-1]:
+        child = node.get(key)
+        child = dict(child) if isinstance(child, dict) else {}
+        node[key] = child
+        node = child
+    if kind == 'set':
+        node[keys[-1]] = value
+    else:
+        node.pop(keys[-1], None)
+    return root
+
+
+class RuntimeStore:
+    def __init__(self, path, locks_dir):
+        self.path = path
+        self.lock_path = os.path.join(locks_dir, os.path.splitext(os.path.basename(path))[0] + '.lock')
+        os.makedirs(locks_dir, exist_ok=True)
+        self.lock = threading.RLock()
+        self.generation = 0      # bumped whenever another process's changes are loaded
+        self.writes = 0
+        self._pending = []
+        self._timer = None
+        self._stamp = None
+        self._checked = 0.0
+        self._data = {}
+        self._reload(force=True)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _reload(self, force=False):
+        stamp = self._stat()
+        self._checked = time.monotonic()
+        if not force and stamp == self._stamp:
+            return
+        try:
+            with FileLock(self.lock_path, exclusive=False):
+                stamp = self._stat()
+                data = self._read()
+        except OSError:
+            # locks/ is gone along with the base dir
+            data = {}
+        for op in self._pending:
+            data = _apply(data, op)
+        self._data = data
+        self._stamp = stamp
+        self.generation += 1
+
+    def snapshot(self):
+        """Current contents; treat as read-only."""
+        with self.lock:
+            if time.monotonic() - self._checked >= REFRESH_INTERVAL:
+                self._reload()
+            return self._data
+
+    def refresh(self):
+        """Pick up other processes' writes now instead of after REFRESH_INTERVAL."""
+        with self.lock:
+            self._reload()
+            return self._data
+
+    def get(self, *keys, default=None):
+        node = self.snapshot()
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                return default
+            node = node[key]
+        return node
+
+    def set(self, keys, value):
+        self._change(('set', tuple(keys), value))
+
+    def delete(self, keys):
+        self._change(('delete', tuple(keys), None))
+
+    def _change(self, op):
+        with self.lock:
+            self._data = _apply(self._data, op)
+            self._pending.append(op)
+            if self._timer is None:
+                self._timer = threading.Timer(FLUSH_DELAY, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write pending changes now, merged over whatever other processes wrote."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            try:
+                with FileLock(self.lock_path, exclusive=True):
+                    data = self._read()
+                    for op in self._pending:
+                        data = _apply(data, op)
+                    self._write(data)
+                    self._stamp = self._stat()
+            except OSError as e:
+                if not os.path.isdir(os.path.dirname(self.path)):
+                    # the base dir was removed; there is nowhere left to write
+                    self._pending = []
+                    return
+                # keep the changes; the next flush retries them
+                print(f"[CAL][runtime] Could not write {self.path}: {e}")
+                return
+            self._pending = []
+            self._data = data
+            self._checked = time.monotonic()
+            self.writes += 1
+
+    def _write(self, data):
+        fd, tmp = tempfile.mkstemp(prefix='.runtime_cache.', dir=os.path.dirname(self.path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,246 @@
+"""
+Admission control for plugin calls.
+
+Every call through Core takes a slot from the Scheduler before it is dispatched.
+Slots are capped per language and per plugin; callers that cannot get one wait in
+a bounded queue ordered by priority class, then arrival. Background work may only
+hold a share of each language's slots, so bursts of cache warmers or batch jobs
+cannot starve interactive requests. A full queue rejects new calls immediately.
+
+Per-plugin caps come from the manifest:  "max_concurrency": 2
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+
+from core.deadlines import LatencyWindow
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 1}
+
+DEFAULT_LANGUAGE_LIMIT = 8
+DEFAULT_PLUGIN_LIMIT = 4
+DEFAULT_QUEUE_LIMITS = {INTERACTIVE: 64, BACKGROUND: 256}
+# Fraction of a language's slots background calls may hold at once
+DEFAULT_BACKGROUND_SHARE = 0.5
+
+
+class SchedulerRejected(RuntimeError):
+    """Raised when a call is refused because its priority queue is full."""
+
+
+class QueueTimeout(TimeoutError):
+    """Raised when a call could not get a slot before its deadline."""
+
+    def __init__(self, waited):
+        self.waited = waited
+        super().__init__(f"no execution slot within {waited:.3g}s")
+
+
+class Ticket:
+    __slots__ = ("rank", "seq", "priority", "lang", "plugin", "enqueued", "waited",
+                 "granted", "event", "future", "loop")
+
+    def __init__(self, rank, seq, priority, lang, plugin):
+        self.rank = rank
+        self.seq = seq
+        self.priority = priority
+        self.lang = lang
+        self.plugin = plugin
+        self.enqueued = time.perf_counter()
+        self.waited = 0.0
+        self.granted = False
+        self.event = None
+        self.future = None
+        self.loop = None
+
+
+class Scheduler:
+    def __init__(self, language_limit=DEFAULT_LANGUAGE_LIMIT, plugin_limit=DEFAULT_PLUGIN_LIMIT,
+                 queue_limits=None, background_share=DEFAULT_BACKGROUND_SHARE):
+        self.language_limit = language_limit
+        self.plugin_limit = plugin_limit
+        self.language_limits = {}   # lang -> cap overriding language_limit
+        self.plugin_limits = {}     # plugin -> cap overriding plugin_limit
+        self.queue_limits = dict(DEFAULT_QUEUE_LIMITS, **(queue_limits or {}))
+        self.background_share = background_share
+        self.waiting = []           # Tickets, kept sorted by (rank, seq)
+        self.running_lang = {}
+        self.running_background = {}
+        self.running_plugin = {}
+        self.admitted = {p: 0 for p in PRIORITIES}
+        self.rejected = {p: 0 for p in PRIORITIES}
+        self.queue_wait = {p: LatencyWindow() for p in PRIORITIES}
+        self.paused = set()         # plugins whose new calls wait (see pause/drain)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self._seq = itertools.count()
+
+    # ------------------------------------------------------------------
+    # Limits
+    # ------------------------------------------------------------------
+    def set_language_limit(self, lang, limit):
+        with self.lock:
+            self.language_limits[lang] = max(1, int(limit))
+            self._grant_waiting()
+
+    def set_plugin_limit(self, plugin, limit):
+        with self.lock:
+            if limit is None:
+                self.plugin_limits.pop(plugin, None)
+            else:
+                self.plugin_limits[plugin] = max(1, int(limit))
+            self._grant_waiting()
+
+    def _eligible(self, ticket):
+        if ticket.plugin in self.paused:
+            return False
+        lang_cap = self.language_limits.get(ticket.lang, self.language_limit)
+        if self.running_lang.get(ticket.lang, 0) >= lang_cap:
+            return False
+        if self.running_plugin.get(ticket.plugin, 0) >= self.plugin_limits.get(ticket.plugin, self.plugin_limit):
+            return False
+        if ticket.priority == BACKGROUND:
+            share = max(1, int(lang_cap * self.background_share))
+            if self.running_background.get(ticket.lang, 0) >= share:
+                return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Granting (callers hold self.lock)
+    # ------------------------------------------------------------------
+    def _take(self, ticket):
+        ticket.granted = True
+        ticket.waited = time.perf_counter() - ticket.enqueued
+        self.running_lang[ticket.lang] = self.running_lang.get(ticket.lang, 0) + 1
+        self.running_plugin[ticket.plugin] = self.running_plugin.get(ticket.plugin, 0) + 1
+        if ticket.priority == BACKGROUND:
+            self.running_background[ticket.lang] = self.running_background.get(ticket.lang, 0) + 1
+        self.admitted[ticket.priority] += 1
+        self.queue_wait[ticket.priority].add(ticket.waited)
+
+    def _grant_waiting(self):
+        for ticket in list(self.waiting):
+            if not self._eligible(ticket):
+                continue
+            self.waiting.remove(ticket)
+            self._take(ticket)
+            if ticket.event is not None:
+                ticket.event.set()
+            elif ticket.future is not None:
+                ticket.loop.call_soon_threadsafe(_resolve, ticket.future)
+
+    def _enqueue(self, lang, plugin, priority):
+        """Queue a ticket and grant whatever is eligible. Returns the Ticket."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class '{priority}'")
+        ticket = Ticket(PRIORITIES[priority], next(self._seq), priority, lang, plugin)
+        queued = sum(1 for t in self.waiting if t.priority == priority)
+        self.waiting.append(ticket)
+        self.waiting.sort(key=lambda t: (t.rank, t.seq))
+        self._grant_waiting()
+        if not ticket.granted and queued >= self.queue_limits[priority]:
+            self.waiting.remove(ticket)
+            self.rejected[priority] += 1
+            raise SchedulerRejected(f"{priority} queue is full ({queued} waiting); try again later")
+        return ticket
+
+    def _abandon(self, ticket):
+        """Drop a waiter that gave up; returns True if it was granted meanwhile."""
+        if ticket.granted:
+            return True
+        self.waiting.remove(ticket)
+        self.queue_wait[ticket.priority].add(time.perf_counter() - ticket.enqueued)
+        return False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def acquire(self, lang, plugin, priority=INTERACTIVE, timeout=None):
+        """Block until a slot is free. Raises SchedulerRejected or QueueTimeout."""
+        with self.lock:
+            ticket = self._enqueue(lang, plugin, priority)
+            if ticket.granted:
+                return ticket
+            ticket.event = threading.Event()
+        if not ticket.event.wait(timeout):
+            with self.lock:
+                if not self._abandon(ticket):
+                    raise QueueTimeout(time.perf_counter() - ticket.enqueued)
+        return ticket
+
+    async def acquire_async(self, lang, plugin, priority=INTERACTIVE, timeout=None):
+        """Awaitable acquire(); waiting does not block the event loop."""
+        with self.lock:
+            ticket = self._enqueue(lang, plugin, priority)
+            if ticket.granted:
+                return ticket
+            ticket.loop = asyncio.get_running_loop()
+            ticket.future = ticket.loop.create_future()
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self.lock:
+                granted = self._abandon(ticket)
+            if granted and isinstance(e, asyncio.TimeoutError):
+                return ticket
+            if granted:
+                self.release(ticket)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise QueueTimeout(time.perf_counter() - ticket.enqueued)
+        return ticket
+
+    def release(self, ticket):
+        with self.lock:
+            self.running_lang[ticket.lang] -= 1
+            self.running_plugin[ticket.plugin] -= 1
+            if ticket.priority == BACKGROUND:
+                self.running_background[ticket.lang] -= 1
+            self._grant_waiting()
+            self.idle.notify_all()
+
+    def pause(self, plugin):
+        """Hold new calls for a plugin in the queue; running calls continue."""
+        with self.lock:
+            self.paused.add(plugin)
+
+    def drain(self, plugin, timeout=None):
+        """Wait until no call for plugin is running. Returns False on timeout."""
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.running_plugin.get(plugin), timeout)
+
+    def resume(self, plugin):
+        """Undo pause(); queued calls for the plugin are granted as slots allow."""
+        with self.lock:
+            self.paused.discard(plugin)
+            self._grant_waiting()
+
+    def running(self, plugin):
+        with self.lock:
+            return self.running_plugin.get(plugin, 0)
+
+    def stats(self):
+        """Running/queued counts, admissions, rejections and queue-wait percentiles."""
+        with self.lock:
+            queued = {p: sum(1 for t in self.waiting if t.priority == p) for p in PRIORITIES}
+            snapshot = {
+                "running": {lang: n for lang, n in self.running_lang.items() if n},
+                "queued": queued,
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected),
+                "paused": sorted(self.paused),
+            }
+        snapshot["queue_wait"] = {
+            p: {"p50": w.percentile(50), "p95": w.percentile(95), "samples": len(w)}
+            for p, w in self.queue_wait.items()
+        }
+        return snapshot
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,200 @@
+"""
+Plugin directory watcher for hot reload.
+
+Watches every directory of <workspace>/plugins with inotify where available (Linux,
+via ctypes) and falls back to polling elsewhere. With inotify the plugin tree is only
+re-scanned after an event settles (plus a rare safety rescan); polling re-scans every
+interval. Every plugin directory whose files differ from the previous scan is handed
+to Core.reload_plugin, which swaps it on the running instance.
+"""
+
+import os
+import sys
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import threading
+
+DEFAULT_POLL_INTERVAL = 1.0
+# Quiet period after an event before rescanning, so editors can finish writing
+SETTLE_DELAY = 0.2
+# inotify mode still rescans this often, in case events were lost (queue overflow)
+RESCAN_INTERVAL = 60.0
+# Directories inside a plugin that do not affect what gets loaded
+IGNORED_DIRS = {"__pycache__", "node_modules", ".git"}
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_IGNORED = 0x8000      # watch removed (directory deleted)
+_EVENT = struct.Struct("iIII")   # struct inotify_event header: wd, mask, cookie, len
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM |
+               _IN_MOVED_TO | _IN_CREATE | _IN_DELETE)
+
+
+def _inotify():
+    """(libc, fd) when inotify is usable on this platform, else None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    return libc, fd
+
+
+def scan_plugins(plugins_dir, dirs=None):
+    """
+    plugin dir name -> sorted (relative path, mtime_ns, size) of every file under it.
+    dirs, if given, is a set that receives every directory walked.
+    """
+    snapshot = {}
+    try:
+        entries = list(os.scandir(plugins_dir))
+    except OSError:
+        return snapshot
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        files = []
+        for root, subdirs, names in os.walk(entry.path):
+            subdirs[:] = [d for d in subdirs if d not in IGNORED_DIRS and not d.startswith(".")]
+            if dirs is not None:
+                dirs.add(root)
+            for fname in names:
+                path = os.path.join(root, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((os.path.relpath(path, entry.path), st.st_mtime_ns, st.st_size))
+        snapshot[entry.name] = tuple(sorted(files))
+    return snapshot
+
+
+class PluginWatcher:
+    def __init__(self, core, interval=DEFAULT_POLL_INTERVAL, use_inotify=True):
+        self.core = core
+        self.plugins_dir = str(core.plugins_dir)
+        self.interval = interval
+        self.inotify = _inotify() if use_inotify else None
+        self.snapshot = {}
+        self.dirs = set()       # directories seen by the last scan
+        self.watches = {}       # inotify: watched directory -> watch descriptor
+        self.reloads = 0
+        self.scans = 0
+        self._next_rescan = 0.0
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self.thread = None
+
+    @property
+    def mode(self):
+        return "inotify" if self.inotify else "poll"
+
+    def start(self):
+        self.dirs = set()
+        self.snapshot = scan_plugins(self.plugins_dir, self.dirs)
+        self._next_rescan = time.monotonic() + RESCAN_INTERVAL
+        self.thread = threading.Thread(target=self._run, name="plugin-watcher", daemon=True)
+        self.thread.start()
+        print(f"[core] watching {self.plugins_dir} for plugin changes ({self.mode})")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        if self.inotify:
+            os.close(self.inotify[1])
+            self.inotify = None
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    # ------------------------------------------------------------------
+    def _add_watches(self):
+        """Watch the directories that appeared since the last pass."""
+        libc, fd = self.inotify
+        for path in ({self.plugins_dir} | self.dirs) - set(self.watches):
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), _WATCH_MASK)
+            if wd >= 0:
+                self.watches[path] = wd
+
+    def _drain(self):
+        """Consume pending events; forget watches the kernel dropped."""
+        fd = self.inotify[1]
+        data = b""
+        try:
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                data += chunk
+        except BlockingIOError:
+            pass
+        dropped = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size + length
+            if mask & _IN_IGNORED:
+                dropped.add(wd)
+        if dropped:
+            self.watches = {p: wd for p, wd in self.watches.items() if wd not in dropped}
+
+    def _wait(self):
+        """
+        Block until a filesystem event (inotify) or the poll interval elapses. True when
+        the tree should be rescanned: always when polling, otherwise after an event or
+        once RESCAN_INTERVAL has passed.
+        """
+        if not self.inotify:
+            self._stop.wait(self.interval)
+            return True
+        fd = self.inotify[1]
+        timeout = max(0.0, self._next_rescan - time.monotonic())
+        ready, _, _ = select.select([fd, self._wake_r], [], [], timeout)
+        if fd not in ready:
+            return time.monotonic() >= self._next_rescan
+        if self._stop.wait(SETTLE_DELAY):
+            return False
+        self._drain()
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.inotify:
+                self._add_watches()
+            rescan = self._wait()
+            if self._stop.is_set():
+                break
+            if rescan:
+                self.check()
+
+    def check(self):
+        """Rescan now and reload every plugin directory that changed. Returns their names."""
+        dirs = set()
+        current = scan_plugins(self.plugins_dir, dirs)
+        self.scans += 1
+        self.dirs = dirs
+        self._next_rescan = time.monotonic() + RESCAN_INTERVAL
+        changed = sorted(n for n in set(self.snapshot) | set(current)
+                         if self.snapshot.get(n) != current.get(n))
+        self.snapshot = current
+        for name in changed:
+            try:
+                self.core.reload_plugin(name)
+                self.reloads += 1
+            except Exception as e:
+                print(f"[core:error] Hot reload of {name} failed: {e}")
+        return changed
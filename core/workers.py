@@ -0,0 +1,329 @@
+"""
+Long-lived runtime workers.
+
+Language modules use these to keep plugin host processes warm between calls
+instead of spawning a fresh interpreter for every export invocation.
+Requests and responses are newline-delimited JSON frames tagged with an "id",
+so a worker may have several requests in flight at once. Replies may carry an
+"elapsed" field (seconds the host spent executing the request).
+"""
+
+import asyncio
+import itertools
+import json
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, FIRST_COMPLETED, wait
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised when a worker process dies or cannot accept a request."""
+
+
+class Worker:
+    """A single host process speaking the framed JSON protocol over stdin/stdout."""
+
+    def __init__(self, command, name="worker"):
+        self.name = name
+        self.pending = {}   # request id -> Future
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._closed = False
+        self.proc = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self.reader = threading.Thread(target=self._read_loop, name=f"{name}-reader", daemon=True)
+        self.reader.start()
+
+    @property
+    def alive(self):
+        return not self._closed and self.proc.poll() is None
+
+    @property
+    def inflight(self):
+        return len(self.pending)
+
+    def submit(self, payload, fut=None):
+        """
+        Send a request frame and return a Future resolving to the reply dict.
+        fut: an existing Future to resolve instead (a request moved from a killed worker).
+        """
+        fut = Future() if fut is None else fut
+        with self.lock:
+            if not self.alive:
+                raise WorkerCrashed(f"{self.name} is not running")
+            req_id = next(self._ids)
+            self.pending[req_id] = fut
+            fut.worker, fut.request_id, fut.payload = self, req_id, payload
+            try:
+                self.proc.stdin.write(json.dumps(dict(payload, id=req_id)) + "\n")
+                self.proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                self.pending.pop(req_id, None)
+                raise WorkerCrashed(f"{self.name} rejected request: {e}")
+        return fut
+
+    def _read_loop(self):
+        for line in self.proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            started = time.perf_counter()
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                print(f"[{self.name}:warn] Dropping malformed frame: {line[:200]}")
+                continue
+            msg["decode"] = time.perf_counter() - started
+            with self.lock:
+                fut = self.pending.pop(msg.get("id"), None)
+            if fut is not None:
+                try:
+                    fut.set_result(msg)
+                except InvalidStateError:
+                    pass
+        code = self.proc.wait()
+        self._fail_pending(WorkerCrashed(f"{self.name} exited with code {code}"))
+
+    def abandon(self, request_id, kill=False):
+        """
+        Stop waiting for a request; a late reply is dropped.
+        Without kill the request stays counted in inflight until that reply arrives,
+        since the host is still busy with it. With kill=True the process is terminated
+        (it is presumed stuck) and the pool replaces it on the next request; the other
+        requests still waiting on it are returned so the pool can send them elsewhere.
+        """
+        if not kill:
+            return []
+        with self.lock:
+            self.pending.pop(request_id, None)
+            orphans, self.pending = [f for f in self.pending.values() if not f.done()], {}
+            # Stop routing requests here before the kill is reaped
+            self._closed = True
+        if self.proc.poll() is None:
+            print(f"[{self.name}:warn] Killing worker stuck past its deadline")
+            self.proc.kill()
+        return orphans
+
+    def _fail_pending(self, exc):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for fut in pending.values():
+            try:
+                fut.set_exception(exc)
+            except InvalidStateError:
+                pass
+
+    def close(self, timeout=2.0):
+        """Close stdin so the worker exits on EOF; kill it if it does not."""
+        with self.lock:
+            self._closed = True
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.reader.join(timeout=timeout)
+        self._fail_pending(WorkerCrashed(f"{self.name} stopped"))
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of Workers sharing one command line.
+    Workers are spawned lazily, requests go to the least-loaded worker,
+    and crashed workers are replaced on the next request.
+    """
+
+    def __init__(self, command, size=1, max_inflight=1, name="worker", kill_on_timeout=True):
+        self.command = command
+        self.size = max(1, int(size))
+        self.max_inflight = max(1, int(max_inflight))
+        self.name = name
+        # A request past its deadline may still be running (stuck, or spinning a Node
+        # event loop): kill its host and move the host's other requests to a replacement
+        self.kill_on_timeout = kill_on_timeout
+        self.hedged = 0
+        self.workers = []
+        self.lock = threading.Lock()
+        self._closed = False
+        self._spawned = 0
+
+    def _spawn(self):
+        command = self.command() if callable(self.command) else list(self.command)
+        self._spawned += 1
+        worker = Worker(command, name=f"{self.name}-{self._spawned}")
+        self.workers.append(worker)
+        return worker
+
+    def _pick(self, exclude=None, idle_only=False):
+        """
+        Least-loaded worker with spare capacity, else a new one while the pool has room,
+        else (unless idle_only, then None) the least-loaded busy worker.
+        """
+        with self.lock:
+            if self._closed:
+                raise WorkerCrashed(f"{self.name} pool is stopped")
+            live = [w for w in self.workers if w.alive]
+            if len(live) < len(self.workers):
+                print(f"[{self.name}:warn] Replacing {len(self.workers) - len(live)} crashed worker(s)")
+                self.workers = live
+            best = min((w for w in live if w is not exclude), key=lambda w: w.inflight, default=None)
+            if best is not None and best.inflight < self.max_inflight:
+                return best
+            if len(live) < self.size:
+                return self._spawn()
+            return None if idle_only else best
+
+    def submit(self, payload):
+        """Dispatch a request to a worker; retries once if the chosen worker just died."""
+        try:
+            return self._pick().submit(payload)
+        except WorkerCrashed:
+            if self._closed:
+                raise
+            return self._pick().submit(payload)
+
+    def _hedge(self, payload, first):
+        """
+        Duplicate request for a slow call, sent only to an idle or newly spawned worker
+        other than the one running first; None (no hedge) when there is none, since a
+        queued duplicate could not overtake the original.
+        """
+        try:
+            worker = self._pick(exclude=first.worker, idle_only=True)
+            if worker is None:
+                return None
+            fut = worker.submit(payload)
+        except WorkerCrashed:
+            return None
+        self.hedged += 1
+        return fut
+
+    def abandon(self, *futures, kill=None):
+        """
+        Give up on submitted requests (see Worker.abandon). Requests that were queued
+        on a killed worker are sent again, to its replacement or another worker.
+        """
+        kill = self.kill_on_timeout if kill is None else kill
+        futures = [f for f in futures if not f.done()]
+        # cancelled first, so that killing one worker never resubmits the others
+        for fut in futures:
+            fut.cancel()
+        for fut in futures:
+            for orphan in fut.worker.abandon(fut.request_id, kill=kill):
+                self._resubmit(orphan)
+
+    def _resubmit(self, fut):
+        try:
+            try:
+                self._pick().submit(fut.payload, fut)
+            except WorkerCrashed:
+                if self._closed:
+                    raise
+                self._pick().submit(fut.payload, fut)
+        except WorkerCrashed as e:
+            try:
+                fut.set_exception(e)
+            except InvalidStateError:
+                pass
+
+    def call(self, payload, timeout=None, hedge_after=None, stages=None):
+        """
+        Send a request and wait for its reply.
+        timeout: seconds before the request is abandoned and TimeoutError is raised.
+        hedge_after: if no reply has arrived after this many seconds, send a duplicate
+            request (idempotent exports only) and take whichever answers first.
+        stages: optional CallStages that receives spawn/transport/execute/decode times.
+        """
+        started = time.perf_counter()
+        futures = [self.submit(payload)]
+        submitted = time.perf_counter()
+        if stages is not None:
+            stages.add("spawn", submitted - started)
+        deadline = None if timeout is None else started + timeout
+
+        if hedge_after is not None and (timeout is None or hedge_after < timeout):
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                hedge = self._hedge(payload, futures[0])
+                if hedge is not None:
+                    futures.append(hedge)
+
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            self.abandon(*futures)
+            raise TimeoutError(f"{self.name}: no reply within {timeout:.3g}s")
+        return self._finish(futures, done, started, submitted, stages)
+
+    async def call_async(self, payload, timeout=None, hedge_after=None, stages=None):
+        """Awaitable call(); waiting does not block the event loop."""
+        started = time.perf_counter()
+        futures = [self.submit(payload)]
+        submitted = time.perf_counter()
+        if stages is not None:
+            stages.add("spawn", submitted - started)
+        deadline = None if timeout is None else started + timeout
+        waiters = [asyncio.wrap_future(futures[0])]
+
+        if hedge_after is not None and (timeout is None or hedge_after < timeout):
+            done, _ = await asyncio.wait(waiters, timeout=hedge_after)
+            if not done:
+                hedge = self._hedge(payload, futures[0])
+                if hedge is not None:
+                    futures.append(hedge)
+                    waiters.append(asyncio.wrap_future(hedge))
+
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        done, _ = await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            self.abandon(*futures)
+            raise TimeoutError(f"{self.name}: no reply within {timeout:.3g}s")
+        done = {futures[waiters.index(w)] for w in done}
+        return self._finish(futures, done, started, submitted, stages)
+
+    def broadcast(self, payload, timeout=None):
+        """Send a request to every live worker and return their replies (control frames)."""
+        with self.lock:
+            workers = [w for w in self.workers if w.alive]
+        futures = []
+        for w in workers:
+            try:
+                futures.append(w.submit(payload))
+            except WorkerCrashed:
+                continue
+        done, _ = wait(futures, timeout=timeout)
+        self.abandon(*(f for f in futures if f not in done), kill=False)
+        return [f.result() for f in done if f.exception() is None]
+
+    def _finish(self, futures, done, started, submitted, stages):
+        # Prefer a successful reply if a hedged duplicate crashed first
+        winner = next((f for f in done if f.exception() is None), next(iter(done)))
+        self.abandon(*(f for f in futures if f is not winner), kill=False)
+        reply = winner.result()
+        if stages is not None:
+            total = time.perf_counter() - started
+            spawn = submitted - started
+            execute = float(reply.get("elapsed") or 0.0)
+            decode = float(reply.get("decode") or 0.0)
+            stages.add("execute", execute)
+            stages.add("decode", decode)
+            stages.add("transport", max(0.0, total - spawn - execute - decode))
+        return reply
+
+    def close(self):
+        with self.lock:
+            self._closed = True
+            workers, self.workers = self.workers, []
+        for w in workers:
+            w.close()
@@ -1,20 +1,33 @@
+import os
 import sys
-import subprocess
 import shutil
-import json
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 from pathlib import Path
 
+from core.workers import WorkerPool
+
+# One host process serves many concurrent calls; more hosts only help CPU-bound plugins
+DEFAULT_POOL_SIZE = 1
+# Requests multiplexed onto a single host before another one is spawned
+MAX_INFLIGHT_PER_HOST = 32
+# Seconds to wait for hosts to acknowledge a module eviction on reload
+EVICT_TIMEOUT = 5.0
+
 class LanguageModule:
     """
     Node.js runtime interface for CAL.
     Handles discovery, execution, and plugin loading for Node.js plugins.
     """
 
-    def __init__(self, core, runtime_path=None, runtime_version=None):
+    def __init__(self, core, runtime_path=None, runtime_version=None, pool_size=None):
         self.core = core
         self.runtime_path = runtime_path
         self.runtime_version = runtime_version
-        self.proc = None
+        self.pool_size = int(pool_size or os.environ.get("CAL_NODE_WORKERS", DEFAULT_POOL_SIZE))
+        self.pool = None
+        self._pool_lock = threading.Lock()
         self.node_exe = self._find_node_executable()
         print(f"[nodejs] Using interpreter: {self.node_exe}")
 
@@ -52,30 +65,115 @@ class LanguageModule:
 
         return {"path": str(entry_path)}
 
+    def evict_plugin(self, plugin_dir, plugin_info=None, timeout=EVICT_TIMEOUT):
+        """Drop a reloaded plugin's modules from the running host(s)."""
+        if self.pool is not None:
+            self.pool.broadcast({"op": "evict", "dir": str(plugin_dir)}, timeout=timeout)
+
     # ---------------------------------------------------------------------
     # Execution
     # ---------------------------------------------------------------------
-    def run_code(self, plugin_info, *args, **kwargs):
-        """Execute a Node.js plugin file and return stdout."""
-        plugin_path = plugin_info["path"]
-        wrapper_path = Path(__file__).parent / "wrapper.js"
+    def _get_pool(self):
+        """Start the persistent Node.js host(s) on first use."""
+        with self._pool_lock:
+            if self.pool is None:
+                wrapper_path = Path(__file__).parent / "wrapper.js"
+                self.pool = WorkerPool(
+                    [self.node_exe, str(wrapper_path), "--serve"],
+                    size=self.pool_size,
+                    max_inflight=MAX_INFLIGHT_PER_HOST,
+                    # a timed-out call may be blocking the event loop; the host is
+                    # restarted and its other in-flight calls are sent again
+                    name="nodejs"
+                )
+            return self.pool
+
+    def _request(self, plugin_info, args):
         export_name = args[0] if args else None
         slots = args[1] if len(args) > 1 else {}
-        slots_json = json.dumps(slots)
-        
+        return {
+            "op": "call",
+            "path": plugin_info["path"],
+            "export": export_name,
+            "slots": slots
+        }
+
+    def _output(self, reply, stages=None):
+        if not reply.get("ok"):
+            print(f"[nodejs:error] {reply.get('error')}")
+            if stages is not None:
+                stages.fail("plugin")
+            return ""
+        return reply.get("output", "")
+
+    def run_code(self, plugin_info, *args, timeout=None, hedge_after=None, stages=None, **kwargs):
+        """Execute a Node.js plugin export on the persistent host and return its output."""
+        try:
+            reply = self._get_pool().call(
+                self._request(plugin_info, args), timeout=timeout, hedge_after=hedge_after, stages=stages
+            )
+        except TimeoutError:
+            raise
+        except Exception as e:
+            return f"[nodejs:exception] {e}"
+        return self._output(reply, stages)
+
+    async def run_code_async(self, plugin_info, *args, timeout=None, hedge_after=None, stages=None, **kwargs):
+        """Awaitable run_code: waits on the worker reply without blocking the event loop."""
         try:
-            result = subprocess.run(
-                [self.node_exe, str(wrapper_path), plugin_path, export_name, slots_json],
-                capture_output=True,
-                text=True
+            reply = await self._get_pool().call_async(
+                self._request(plugin_info, args), timeout=timeout, hedge_after=hedge_after, stages=stages
             )
-            if result.stderr:
-                print(f"[nodejs:error] {result.stderr.strip()}")
-            return result.stdout.strip()
+        except TimeoutError:
+            raise
         except Exception as e:
             return f"[nodejs:exception] {e}"
+        return self._output(reply, stages)
+
+    def run_batch(self, plugin_info, export_name, slots_list, batch_export=None, timeout=None):
+        """
+        Execute one export over many slot dicts and return the outputs in order.
+        The list travels over the worker channel (no argv limits) and is split into
+        at most one chunk per worker in the host pool.
+        """
+        slots_list = list(slots_list)
+        if not slots_list:
+            return []
+        chunk = -(-len(slots_list) // min(self.pool_size, len(slots_list)))
+        chunks = [slots_list[i:i + chunk] for i in range(0, len(slots_list), chunk)]
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit({
+                "op": "batch",
+                "path": plugin_info["path"],
+                "export": export_name,
+                "batch_export": batch_export,
+                "batch": items
+            }) for items in chunks]
+            deadline = None if timeout is None else time.monotonic() + timeout
+            outputs = []
+            for items, fut in zip(chunks, futures):
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    reply = fut.result(remaining)
+                except FutureTimeout:
+                    pool.abandon(*futures)
+                    raise TimeoutError(f"batch got no reply within {timeout:.3g}s")
+                if not reply.get("ok"):
+                    print(f"[nodejs:error] {reply.get('error')}")
+                    outputs.extend([""] * len(items))
+                    continue
+                outputs.extend(self._output(r) for r in reply["results"])
+            return outputs
+        except TimeoutError:
+            raise
+        except Exception as e:
+            return [f"[nodejs:exception] {e}"] * len(slots_list)
 
     # ---------------------------------------------------------------------
     def stop(self):
-        """No persistent runtime for Node.js, so nothing to stop."""
-        pass
+        """Shut down the Node.js host process(es), if any were started."""
+        with self._pool_lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.close()
@@ -3,43 +3,163 @@
 const fs = require('fs');
 const path = require('path');
 
-// Get command line arguments
-const pluginPath = process.argv[2];
-const exportName = process.argv[3];
-const slotsJson = process.argv[4];
+// resolved path -> { mtimeMs, plugin }; only used by the long-lived host (--serve)
+const pluginCache = new Map();
 
-if (!pluginPath || !exportName) {
-    console.error("Usage: node wrapper.js <plugin_path> <export_name> [slots_json]");
-    process.exit(1);
+function loadPlugin(pluginPath) {
+    // Keep the plugin required until its file changes on disk
+    const resolved = path.resolve(pluginPath);
+    const mtimeMs = fs.statSync(resolved).mtimeMs;
+    const cached = pluginCache.get(resolved);
+    if (cached && cached.mtimeMs === mtimeMs) {
+        return cached.plugin;
+    }
+    delete require.cache[resolved];
+    const plugin = require(resolved);
+    pluginCache.set(resolved, { mtimeMs, plugin });
+    return plugin;
 }
 
-try {
-    // Load the plugin module
-    const plugin = require(path.resolve(pluginPath));
+function evictPlugin(pluginDir) {
+    // Forget every module required from under pluginDir so the next call loads it afresh
+    const prefix = path.resolve(pluginDir) + path.sep;
+    let evicted = 0;
+    for (const key of Object.keys(require.cache)) {
+        if (key.startsWith(prefix)) {
+            delete require.cache[key];
+            evicted += 1;
+        }
+    }
+    for (const key of pluginCache.keys()) {
+        if (key.startsWith(prefix)) {
+            pluginCache.delete(key);
+        }
+    }
+    return evicted;
+}
 
-    // Get the function to call
+function getExport(plugin, exportName) {
     const func = plugin[exportName];
     if (typeof func !== 'function') {
         throw new Error(`Export '${exportName}' not found or not a function in plugin.`);
     }
+    return func;
+}
 
-    // Parse slots
-    let slots = {};
-    if (slotsJson) {
-        slots = JSON.parse(slotsJson);
+function formatResult(result) {
+    if (typeof result === 'object') {
+        return JSON.stringify(result);
     }
+    return String(result);
+}
 
-    // Call the function
-    const result = func(slots);
+async function runBatch(plugin, req) {
+    // Run one export over a list of slot objects. A declared native batch export receives
+    // the whole list at once and must return an array of the same length.
+    const items = req.batch || [];
+    if (req.batch_export) {
+        const results = await getExport(plugin, req.batch_export)(items);
+        if (!Array.isArray(results) || results.length !== items.length) {
+            throw new Error(`Batch export '${req.batch_export}' must return a list of ${items.length} results`);
+        }
+        return results.map((r) => ({ ok: true, output: formatResult(r).trim() }));
+    }
 
-    // Output the result
-    if (typeof result === 'object') {
-        console.log(JSON.stringify(result));
-    } else {
-        console.log(result);
+    const func = getExport(plugin, req.export);
+    const results = [];
+    for (const slots of items) {
+        try {
+            results.push({ ok: true, output: formatResult(await func(slots || {})).trim() });
+        } catch (e) {
+            results.push({ ok: false, error: `Error executing plugin: ${e.message}` });
+        }
+    }
+    return results;
+}
+
+async function handleRequest(req) {
+    // Execute one framed request ("call", "batch" or "evict") and build its reply frame
+    const started = process.hrtime.bigint();
+    const elapsed = () => Number(process.hrtime.bigint() - started) / 1e9;
+    try {
+        if (req.op === 'evict') {
+            return { id: req.id, ok: true, evicted: evictPlugin(req.dir), elapsed: elapsed() };
+        }
+        const plugin = loadPlugin(req.path);
+        if (req.op === 'batch') {
+            const results = await runBatch(plugin, req);
+            return { id: req.id, ok: true, results, elapsed: elapsed() };
+        }
+        const result = await getExport(plugin, req.export)(req.slots || {});
+        return { id: req.id, ok: true, output: formatResult(result).trim(), elapsed: elapsed() };
+    } catch (e) {
+        return { id: req.id, ok: false, error: `Error executing plugin: ${e.message}`, elapsed: elapsed() };
     }
+}
+
+function serve() {
+    // Host mode: one JSON request per line on stdin, one JSON reply per line on stdout.
+    // Requests are handled concurrently and replies carry the request id, so they may
+    // come back out of order. Plugin console output is sent to stderr.
+    const readline = require('readline');
+    const writeFrame = (msg) => process.stdout.write(JSON.stringify(msg) + '\n');
+    console.log = console.error;
+    console.info = console.error;
+
+    const inflight = new Set();   // reply promises not yet written
+    const rl = readline.createInterface({ input: process.stdin });
+    rl.on('line', (line) => {
+        if (!line.trim()) {
+            return;
+        }
+        let req;
+        try {
+            req = JSON.parse(line);
+        } catch (e) {
+            writeFrame({ id: null, ok: false, error: `Invalid request frame: ${e.message}` });
+            return;
+        }
+        const done = handleRequest(req).then(writeFrame);
+        inflight.add(done);
+        done.finally(() => inflight.delete(done));
+    });
+    // stdin closed: let pending async exports reply before exiting
+    rl.on('close', () => Promise.allSettled([...inflight]).then(() => process.exit(0)));
+}
+
+function runOnce() {
+    // Get command line arguments
+    const pluginPath = process.argv[2];
+    const exportName = process.argv[3];
+    const slotsJson = process.argv[4];
+
+    if (!pluginPath || !exportName) {
+        console.error("Usage: node wrapper.js <plugin_path> <export_name> [slots_json]");
+        console.error("       node wrapper.js --serve");
+        process.exit(1);
+    }
+
+    try {
+        // Load the plugin module and get the function to call
+        const func = getExport(require(path.resolve(pluginPath)), exportName);
+
+        // Parse slots
+        let slots = {};
+        if (slotsJson) {
+            slots = JSON.parse(slotsJson);
+        }
+
+        // Call the function and output the result
+        console.log(formatResult(func(slots)));
+
+    } catch (e) {
+        console.error(`Error executing plugin: ${e.message}`);
+        process.exit(1);
+    }
+}
 
-} catch (e) {
-    console.error(`Error executing plugin: ${e.message}`);
-    process.exit(1);
+if (process.argv[2] === '--serve') {
+    serve();
+} else {
+    runOnce();
 }
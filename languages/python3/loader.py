@@ -1,23 +1,55 @@
+import os
 import sys
+import json
+import asyncio
 import subprocess
 import shutil
-import json
 import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 from pathlib import Path
 
+from core.workers import WorkerPool
+from languages.python3.wrapper import load_module, format_result, evict_modules
+
+# Number of warm wrapper processes (and fork servers) kept per Python language module
+DEFAULT_POOL_SIZE = 2
+
+# Per-plugin "isolation" modes handled by this module (inprocess is dispatched by Core)
+#   process - warm long-lived worker (default)
+#   fork    - pre-warmed fork server, one forked child per call (POSIX only)
+#   spawn   - fresh interpreter per call
+ISOLATION_MODES = ("process", "fork", "spawn", "inprocess")
+
+# Seconds to wait for workers to acknowledge a module eviction on reload
+EVICT_TIMEOUT = 5.0
+
 class LanguageModule:
     """
     Python runtime interface for CAL.
     Handles discovery, execution, and plugin loading for Python plugins.
     """
 
-    def __init__(self, core, runtime_path=None, runtime_version=None):
+    def __init__(self, core, runtime_path=None, runtime_version=None, pool_size=None):
         self.core = core
         self.runtime_path = runtime_path
         self.runtime_version = runtime_version
-        self.proc = None
-        self.python_exe = self._find_python_executable()
-        print(f"[python] Using interpreter: {self.python_exe}")
+        self.pool_size = int(pool_size or os.environ.get("CAL_PYTHON_WORKERS", DEFAULT_POOL_SIZE))
+        self.pool = None
+        self.fork_pool = None
+        self.fork_preload = set()   # entry paths imported by fork servers before forking
+        self._pool_lock = threading.Lock()
+        self.wrapper_path = Path(__file__).parent / "wrapper.py"
+        self._python_exe = None
+
+    @property
+    def python_exe(self):
+        """Interpreter for plugin hosts, probed on first use rather than at startup."""
+        if self._python_exe is None:
+            self._python_exe = self._find_python_executable()
+            print(f"[python] Using interpreter: {self._python_exe}")
+        return self._python_exe
 
     # ---------------------------------------------------------------------
     # Runtime management
@@ -58,32 +90,213 @@ class LanguageModule:
         if not entry_path.exists():
             raise FileNotFoundError(f"[python] Plugin entry not found: {entry_path}")
 
-        return {"path": str(entry_path)}
+        isolation = plugin_data.get("isolation", "process")
+        if isolation not in ISOLATION_MODES:
+            raise ValueError(f"[python] Unknown isolation mode '{isolation}'")
+        if isolation == "fork":
+            if not hasattr(os, "fork"):
+                print(f"[python:warn] fork isolation unavailable on {sys.platform}; using warm workers")
+                isolation = "process"
+            elif plugin_data.get("preload", True):
+                self.fork_preload.add(str(entry_path))
+
+        return {"path": str(entry_path), "isolation": isolation}
+
+    def restore_plugin(self, plugin_data, plugin_info):
+        """Re-register a plugin whose info came from the manifest index instead of load_plugin."""
+        if plugin_info.get("isolation") == "fork" and plugin_data.get("preload", True):
+            self.fork_preload.add(plugin_info["path"])
+
+    def evict_plugin(self, plugin_dir, plugin_info=None, timeout=EVICT_TIMEOUT):
+        """
+        Drop a reloaded plugin's modules from this process, the warm workers and the
+        fork servers (which re-preload the entry) so the next call imports it afresh.
+        """
+        evict_modules(plugin_dir)
+        if plugin_info is not None:
+            self.fork_preload.discard(plugin_info["path"])
+        request = {"op": "evict", "dir": str(plugin_dir)}
+        if self.pool is not None:
+            self.pool.broadcast(request, timeout=timeout)
+        if self.fork_pool is not None:
+            if plugin_info and plugin_info.get("isolation") == "fork" and os.path.exists(plugin_info["path"]):
+                request = dict(request, preload=plugin_info["path"])
+            self.fork_pool.broadcast(request, timeout=timeout)
+
+    def load_inprocess(self, plugin_info):
+        """
+        Import a trusted plugin into the host interpreter ("isolation": "inprocess").
+        Returns the module; its exports are then called directly, without a worker.
+        """
+        return load_module(plugin_info["path"])
+
+    def format_result(self, result):
+        """Render an in-process export result exactly like the worker protocol does."""
+        return format_result(result).strip()
 
     # ---------------------------------------------------------------------
     # Execution
     # ---------------------------------------------------------------------
-    def run_code(self, plugin_info, *args, **kwargs):
-        """Execute a Python plugin file and return stdout."""
-        plugin_path = plugin_info["path"]
-        wrapper_path = Path(__file__).parent / "wrapper.py"
+    def _get_pool(self, isolation="process"):
+        """Create the warm worker pool, or the fork-server pool, on first use."""
+        with self._pool_lock:
+            if isolation == "fork":
+                if self.fork_pool is None:
+                    self.fork_pool = WorkerPool(
+                        self._fork_command,
+                        size=self.pool_size,
+                        max_inflight=1,
+                        name="python-fork",
+                        # the fork server kills its own child at the deadline
+                        kill_on_timeout=False
+                    )
+                return self.fork_pool
+            if self.pool is None:
+                self.pool = WorkerPool(
+                    [self.python_exe, str(self.wrapper_path), "--serve"],
+                    size=self.pool_size,
+                    max_inflight=1,
+                    name="python"
+                )
+            return self.pool
+
+    def _fork_command(self):
+        # Built at spawn time so fork servers preload every fork plugin registered so far
+        return [self.python_exe, str(self.wrapper_path), "--fork-server", *sorted(self.fork_preload)]
+
+    def _request(self, plugin_info, args):
         export_name = args[0] if args else None
         slots = args[1] if len(args) > 1 else {}
-        slots_json = json.dumps(slots)
-        
+        return {
+            "op": "call",
+            "path": plugin_info["path"],
+            "export": export_name,
+            "slots": slots
+        }
+
+    def _run_spawn(self, plugin_info, args, timeout=None, stages=None):
+        """Run one export in a fresh interpreter ("isolation": "spawn")."""
+        export_name = args[0] if args else None
+        slots = args[1] if len(args) > 1 else {}
+        started = time.perf_counter()
         try:
             result = subprocess.run(
-                [self.python_exe, str(wrapper_path), plugin_path, export_name, slots_json],
+                [self.python_exe, str(self.wrapper_path), plugin_info["path"], export_name, json.dumps(slots)],
                 capture_output=True,
-                text=True
+                text=True,
+                timeout=timeout
             )
-            if result.stderr:
-                print(f"[python:error] {result.stderr.strip()}")
-            return result.stdout.strip()
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(f"python: no output within {timeout:.3g}s")
+        if stages is not None:
+            stages.add("execute", time.perf_counter() - started)
+            if result.returncode != 0:
+                stages.fail("plugin")
+        if result.stderr:
+            print(f"[python:error] {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    def _output(self, reply, stages=None):
+        if not reply.get("ok"):
+            print(f"[python:error] {reply.get('error')}")
+            if stages is not None:
+                stages.fail("plugin")
+            return ""
+        return reply.get("output", "")
+
+    def run_code(self, plugin_info, *args, timeout=None, hedge_after=None, stages=None, **kwargs):
+        """Execute a Python plugin export per its isolation mode and return its output."""
+        isolation = plugin_info.get("isolation", "process")
+        try:
+            if isolation == "spawn":
+                return self._run_spawn(plugin_info, args, timeout, stages)
+            request = self._request(plugin_info, args)
+            if isolation == "fork":
+                request["timeout"] = timeout
+            reply = self._get_pool(isolation).call(
+                request, timeout=timeout, hedge_after=hedge_after, stages=stages
+            )
+        except TimeoutError:
+            raise
         except Exception as e:
             return f"[python:exception] {e}"
+        return self._output(reply, stages)
+
+    async def run_code_async(self, plugin_info, *args, timeout=None, hedge_after=None, stages=None, **kwargs):
+        """Awaitable run_code: waits on the worker reply without blocking the event loop."""
+        isolation = plugin_info.get("isolation", "process")
+        try:
+            if isolation == "spawn":
+                return await asyncio.to_thread(self._run_spawn, plugin_info, args, timeout, stages)
+            request = self._request(plugin_info, args)
+            if isolation == "fork":
+                request["timeout"] = timeout
+            reply = await self._get_pool(isolation).call_async(
+                request, timeout=timeout, hedge_after=hedge_after, stages=stages
+            )
+        except TimeoutError:
+            raise
+        except Exception as e:
+            return f"[python:exception] {e}"
+        return self._output(reply, stages)
+
+    def run_batch(self, plugin_info, export_name, slots_list, batch_export=None, timeout=None):
+        """
+        Execute one export over many slot dicts and return the outputs in order.
+        The list travels over the worker channel (no argv limits) and is split into
+        at most one chunk per pool worker.
+        """
+        slots_list = list(slots_list)
+        if not slots_list:
+            return []
+        isolation = plugin_info.get("isolation", "process")
+        if isolation == "spawn":
+            # one deadline for the whole batch, as for the pooled chunks below
+            deadline = None if timeout is None else time.monotonic() + timeout
+            outputs = []
+            for slots in slots_list:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"batch got no reply within {timeout:.3g}s")
+                outputs.append(self.run_code(plugin_info, export_name, slots, timeout=remaining))
+            return outputs
+        chunk = -(-len(slots_list) // min(self.pool_size, len(slots_list)))
+        chunks = [slots_list[i:i + chunk] for i in range(0, len(slots_list), chunk)]
+        try:
+            pool = self._get_pool(isolation)
+            futures = [pool.submit({
+                "op": "batch",
+                "path": plugin_info["path"],
+                "export": export_name,
+                "batch_export": batch_export,
+                "batch": items,
+                "timeout": timeout
+            }) for items in chunks]
+            deadline = None if timeout is None else time.monotonic() + timeout
+            outputs = []
+            for items, fut in zip(chunks, futures):
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    reply = fut.result(remaining)
+                except FutureTimeout:
+                    pool.abandon(*futures)
+                    raise TimeoutError(f"batch got no reply within {timeout:.3g}s")
+                if not reply.get("ok"):
+                    print(f"[python:error] {reply.get('error')}")
+                    outputs.extend([""] * len(items))
+                    continue
+                outputs.extend(self._output(r) for r in reply["results"])
+            return outputs
+        except TimeoutError:
+            raise
+        except Exception as e:
+            return [f"[python:exception] {e}"] * len(slots_list)
 
     # ---------------------------------------------------------------------
     def stop(self):
-        """No persistent runtime for Python, so nothing to stop."""
-        pass
+        """Shut down the warm worker and fork-server pools, if they were started."""
+        with self._pool_lock:
+            pools = [p for p in (self.pool, self.fork_pool) if p is not None]
+            self.pool = self.fork_pool = None
+        for pool in pools:
+            pool.close()
@@ -1,10 +1,60 @@
 # languages/python3/wrapper.py
 
+import os
 import sys
 import json
+import time
+import signal
+import select
 import importlib.util
 from pathlib import Path
 
+# path -> (mtime, module). Kept by every long-lived process that imports plugins: the
+# warm workers (--serve), the fork server (children inherit it) and the Core host for
+# inprocess plugins (LanguageModule.load_inprocess); evict_modules clears it on reload.
+_modules = {}
+
+def load_module(plugin_path):
+    """Import a plugin from source, reusing the cached module while the file is unchanged."""
+    mtime = os.stat(plugin_path).st_mtime_ns
+    cached = _modules.get(plugin_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    spec = importlib.util.spec_from_file_location(f"cal_plugin_{len(_modules)}", plugin_path)
+    plugin = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(plugin)
+    _modules[plugin_path] = (mtime, plugin)
+    return plugin
+
+def evict_modules(plugin_dir):
+    """
+    Forget every module loaded from under plugin_dir (plugin entries and the helpers
+    they imported) so the next call imports the plugin afresh. Returns the count.
+    """
+    prefix = os.path.join(os.path.abspath(plugin_dir), "")
+    evicted = 0
+    for path in [p for p in _modules if os.path.abspath(p).startswith(prefix)]:
+        del _modules[path]
+        evicted += 1
+    for name, module in list(sys.modules.items()):
+        origin = getattr(module, "__file__", None)
+        if origin and os.path.abspath(origin).startswith(prefix):
+            del sys.modules[name]
+            evicted += 1
+    return evicted
+
+def get_export(plugin, export_name):
+    func = getattr(plugin, export_name, None)
+    if not func or not callable(func):
+        raise AttributeError(f"Export '{export_name}' not found or not a function in plugin.")
+    return func
+
+def format_result(result):
+    """Render an export's return value the way the one-shot wrapper prints it."""
+    if isinstance(result, dict) or isinstance(result, list):
+        return json.dumps(result)
+    return str(result)
+
 def run_plugin(plugin_path, export_name, slots):
     try:
         # Load the plugin module
@@ -13,26 +63,181 @@ def run_plugin(plugin_path, export_name, slots):
         spec.loader.exec_module(plugin)
 
         # Get the function to call
-        func = getattr(plugin, export_name, None)
-        if not func or not callable(func):
-            raise AttributeError(f"Export '{export_name}' not found or not a function in plugin.")
-
-        # Call the function
-        result = func(slots)
+        func = get_export(plugin, export_name)
 
-        # Output the result
-        if isinstance(result, dict) or isinstance(result, list):
-            print(json.dumps(result))
-        else:
-            print(result)
+        # Call the function and output the result
+        print(format_result(func(slots)))
 
     except Exception as e:
         print(f"Error executing plugin: {e}", file=sys.stderr)
         sys.exit(1)
 
+def run_batch(plugin, req):
+    """
+    Run one export over a list of slot dicts. A declared native batch export receives
+    the whole list at once and must return a list of the same length.
+    """
+    items = req.get("batch") or []
+    batch_export = req.get("batch_export")
+    if batch_export:
+        results = get_export(plugin, batch_export)(items)
+        if not isinstance(results, list) or len(results) != len(items):
+            raise ValueError(f"Batch export '{batch_export}' must return a list of {len(items)} results")
+        return [{"ok": True, "output": format_result(r).strip()} for r in results]
+
+    func = get_export(plugin, req.get("export"))
+    results = []
+    for slots in items:
+        try:
+            results.append({"ok": True, "output": format_result(func(slots or {})).strip()})
+        except Exception as e:
+            results.append({"ok": False, "error": f"Error executing plugin: {e}"})
+    return results
+
+def handle_request(req):
+    """Execute one framed request ("call", "batch" or "evict") and build its reply frame."""
+    reply = {"id": req.get("id")}
+    started = time.perf_counter()
+    try:
+        if req.get("op") == "evict":
+            reply["evicted"] = evict_modules(req["dir"])
+            if req.get("preload"):
+                load_module(req["preload"])
+        elif req.get("op") == "batch":
+            plugin = load_module(req["path"])
+            reply["results"] = run_batch(plugin, req)
+        else:
+            plugin = load_module(req["path"])
+            func = get_export(plugin, req.get("export"))
+            reply["output"] = format_result(func(req.get("slots") or {})).strip()
+        reply["ok"] = True
+    except Exception as e:
+        reply["ok"] = False
+        reply["error"] = f"Error executing plugin: {e}"
+    reply["elapsed"] = time.perf_counter() - started
+    return reply
+
+def serve():
+    """
+    Worker mode: read one JSON request per line on stdin, answer one JSON reply per line.
+    The protocol keeps the original stdout; fd 1 is pointed at stderr so plugin prints
+    cannot corrupt the frames.
+    """
+    proto = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+        except ValueError as e:
+            reply = {"id": None, "ok": False, "error": f"Invalid request frame: {e}"}
+        else:
+            reply = handle_request(req)
+        proto.write(json.dumps(reply) + "\n")
+        proto.flush()
+
+# Imported once by the fork server so forked children start with them warm
+FORK_SERVER_PRELOAD = ("json", "re", "datetime", "urllib.request", "collections", "random", "math")
+
+def write_frame(fd, reply):
+    data = (json.dumps(reply) + "\n").encode("utf-8")
+    while data:
+        data = data[os.write(fd, data):]
+
+def read_all(fd):
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+def run_forked(req):
+    """
+    Run one request in a forked child and return its reply. The child inherits the
+    server's warm imports copy-on-write and is killed if it outlives req["timeout"].
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            write_frame(write_fd, handle_request(req))
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    timeout = req.get("timeout")
+    ready, _, _ = select.select([read_fd], [], [], timeout)
+    if not ready:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        os.close(read_fd)
+        return {"id": req.get("id"), "ok": False, "error": f"Plugin process killed after {timeout}s"}
+
+    data = read_all(read_fd)
+    os.close(read_fd)
+    _, status = os.waitpid(pid, 0)
+    if not data:
+        return {"id": req.get("id"), "ok": False, "error": f"Plugin process exited abnormally (status {status})"}
+    return json.loads(data)
+
+def fork_server(preload_paths):
+    """
+    Fork-server mode: import the wrapper's dependencies, common stdlib modules and the
+    given plugin entries once, then fork a fresh child per request. Same framing as serve();
+    "evict" requests run in the server itself so later children see the reloaded plugin.
+    """
+    proto_fd = os.dup(sys.stdout.fileno())
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    for name in FORK_SERVER_PRELOAD:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    for path in preload_paths:
+        try:
+            load_module(path)
+        except Exception as e:
+            print(f"[python:fork-server] Could not preload {path}: {e}", file=sys.stderr)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+        except ValueError as e:
+            reply = {"id": None, "ok": False, "error": f"Invalid request frame: {e}"}
+        else:
+            if req.get("op") == "evict":
+                reply = handle_request(req)
+            else:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                reply = run_forked(req)
+        write_frame(proto_fd, reply)
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve()
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "--fork-server":
+        fork_server(sys.argv[2:])
+        sys.exit(0)
+
     if len(sys.argv) < 3:
         print("Usage: python wrapper.py <plugin_path> <export_name> [slots_json]", file=sys.stderr)
+        print("       python wrapper.py --serve", file=sys.stderr)
+        print("       python wrapper.py --fork-server [plugin_path ...]", file=sys.stderr)
         sys.exit(1)
 
     plugin_path = sys.argv[1]
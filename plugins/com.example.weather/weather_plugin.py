@@ -10,5 +10,9 @@ def get_weather(slots):
         city = "Nowhere"
     return {"city": city, "forecast": "sunny", "temp_c": 22}
 
+def get_weather_batch(slots_list):
+    # native batch export: one result per slots dict, same order
+    return [get_weather(slots) for slots in slots_list]
+
 def on_stop():
     print("[weather] stopped")
\ No newline at end of file
@@ -2,20 +2,45 @@
 
 import argparse
 import os
-from core.core import Core
-from assistant.cal import Assistant
+from core import profiler
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--workspace', default=os.path.dirname(os.path.dirname(__file__)), help='workspace root')
     ap.add_argument('--model', default=None, help='optional local GGUF model for LLM (ctransformers)')
     ap.add_argument('--persona', default=None, help='optional persona json')
+    ap.add_argument('--no-watch', action='store_true', help='do not hot-reload plugins when their files change')
+    ap.add_argument('--profile-startup', nargs='?', const='', default=None, metavar='JSON',
+                    help='print per-phase startup timings and save them as JSON (default: <workspace>/cal_ai/startup_profile.json)')
+    ap.add_argument('--metrics-socket', nargs='?', const='', default=None, metavar='PATH',
+                    help='serve per-plugin metrics in Prometheus text format on a Unix socket (default: <workspace>/cal_ai/metrics.sock)')
     args = ap.parse_args()
-    core = Core(args.workspace)
+    prof = profiler.enable() if args.profile_startup is not None else None
+
+    with profiler.phase("import core"):
+        from core.core import Core
+    with profiler.phase("core.init"):
+        core = Core(args.workspace)
     print("[CAL] assistant starting: discovering plugins...")
-    core.resolve_and_load()
-    assistant = Assistant(args.workspace, core, model_path=args.model, persona_path=args.persona)
-    assistant.run_loop()
+    with profiler.phase("core.resolve_and_load"):
+        core.resolve_and_load()
+    if not args.no_watch:
+        core.watch_plugins()
+    if args.metrics_socket is not None:
+        core.serve_metrics(args.metrics_socket or None)
+    try:
+        with profiler.phase("import assistant"):
+            from assistant.cal import Assistant
+        with profiler.phase("assistant.init"):
+            assistant = Assistant(args.workspace, core, model_path=args.model, persona_path=args.persona)
+        if prof:
+            out = args.profile_startup or os.path.join(args.workspace, 'cal_ai', 'startup_profile.json')
+            prof.dump_json(out)
+            print(prof.format_table())
+            print(f"[CAL] startup profile written to {out}")
+        assistant.run_loop()
+    finally:
+        core.stop_all()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.dependencies import DependencyError, parse_requirement, resolve_dependencies, activation_waves
+
+
+def manifest(name, version="1.0.0", requires=()):
+    return {"name": name, "version": version, "requires": list(requires)}
+
+
+class TestDependencies(unittest.TestCase):
+    def test_parse_requirement_forms(self):
+        self.assertEqual(parse_requirement("com.example.echo"), ("com.example.echo", None))
+        self.assertEqual(parse_requirement("com.example.echo@^1.2"), ("com.example.echo", "^1.2"))
+        self.assertEqual(parse_requirement({"name": "a", "version": ">=1"}), ("a", ">=1"))
+
+    def test_waves_follow_requirements(self):
+        deps = resolve_dependencies({
+            "base": manifest("base"),
+            "cache": manifest("cache", requires=["base@^1.0"]),
+            "tools": manifest("tools"),
+            "app": manifest("app", requires=["cache", {"name": "tools", "version": ">=1.0"}]),
+        })
+        self.assertEqual(activation_waves(deps), [["base", "tools"], ["cache"], ["app"]])
+
+    def test_requirement_by_manifest_name(self):
+        deps = resolve_dependencies({"dir-a": manifest("com.a"), "dir-b": manifest("com.b", requires=["com.a"])})
+        self.assertEqual(deps["dir-b"], {"dir-a"})
+
+    def test_missing_and_unsatisfiable(self):
+        with self.assertRaisesRegex(DependencyError, "not loaded"):
+            resolve_dependencies({"app": manifest("app", requires=["ghost"])})
+        with self.assertRaisesRegex(DependencyError, "2.0.0 is loaded"):
+            resolve_dependencies({"base": manifest("base", "2.0.0"),
+                                  "app": manifest("app", requires=["base@^1.0"])})
+
+    def test_cycle_is_reported(self):
+        deps = resolve_dependencies({
+            "a": manifest("a", requires=["b"]),
+            "b": manifest("b", requires=["c"]),
+            "c": manifest("c", requires=["a"]),
+            "d": manifest("d"),
+        })
+        with self.assertRaisesRegex(DependencyError, "a -> b -> c -> a"):
+            activation_waves(deps)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+Fixtures shared by the plugin runtime tests: throwaway workspaces and small plugins.
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+
+COUNTER_PLUGIN = """
+state = {"calls": 0, "started": None, "stopped": False}
+
+def on_start(core):
+    state["started"] = core
+
+def bump(slots):
+    state["calls"] += 1
+    return {"calls": state["calls"], "n": slots.get("n")}
+
+def on_stop():
+    state["stopped"] = True
+"""
+
+
+def make_workspace(plugins):
+    """
+    Build a throwaway workspace sharing this repo's language modules.
+    plugins maps a plugin dir name to (manifest dict, {filename: source}).
+    """
+    ws = Path(tempfile.mkdtemp(prefix="cal-test-"))
+    os.symlink(BASE_DIR / "languages", ws / "languages")
+    for name, (manifest, files) in plugins.items():
+        pdir = ws / "plugins" / name
+        pdir.mkdir(parents=True)
+        (pdir / "plugin.json").write_text(json.dumps(manifest))
+        for fname, src in files.items():
+            (pdir / fname).write_text(src)
+    return ws
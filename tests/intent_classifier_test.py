@@ -0,0 +1,59 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from assistant import intent_classifier
+from assistant.intent_classifier import IntentClassifier
+
+SPECS = [
+    {"name": "weather", "keywords": ["weather", "forecast", "rain", "temperature"],
+     "examples": ["what's the weather in Paris", "will it rain tomorrow", "how hot is it"]},
+    {"name": "lights", "keywords": ["lights", "lamp", "on", "off"],
+     "examples": ["turn on the lights", "switch off the lamp"]},
+    {"name": "timer", "keywords": ["timer", "remind me", "alarm"],
+     "examples": ["set a timer for 5 minutes", "remind me to call mom"]},
+]
+
+
+class ClassifierCases:
+    use_numpy = False
+
+    def setUp(self):
+        self.clf = IntentClassifier.from_specs(SPECS, use_numpy=self.use_numpy)
+
+    def test_ranks_intents_by_cosine(self):
+        (best, score), (_, runner_up) = self.clf.top("What's the weather like in Berlin?")
+        self.assertEqual(best, 0)
+        self.assertGreater(score - runner_up, 0.2)
+        self.assertEqual(self.clf.top("turn the lamps off", 1)[0][0], 1)
+        self.assertEqual(self.clf.top("set an alarm", 1)[0][0], 2)
+
+    def test_scores_are_cosines(self):
+        scores = [float(s) for s in self.clf.scores("switch off the lamp")]
+        self.assertTrue(all(0.0 <= s <= 1.0 + 1e-6 for s in scores))
+        self.assertEqual([float(s) for s in self.clf.scores("zzz qqq")], [0.0, 0.0, 0.0])
+
+    def test_empty(self):
+        self.assertEqual(IntentClassifier.from_specs([], use_numpy=self.use_numpy).top("hello"), [])
+
+
+class TestPythonClassifier(ClassifierCases, unittest.TestCase):
+    use_numpy = False
+
+
+@unittest.skipIf(intent_classifier.np is None, "numpy is not installed")
+class TestNumpyClassifier(ClassifierCases, unittest.TestCase):
+    use_numpy = True
+
+    def test_matches_python_scores(self):
+        reference = IntentClassifier.from_specs(SPECS, use_numpy=False)
+        for text in ("what's the weather in Paris", "lights off", "remind me at noon"):
+            for a, b in zip(self.clf.scores(text), reference.scores(text)):
+                self.assertAlmostEqual(float(a), b, places=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
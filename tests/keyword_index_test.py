@@ -0,0 +1,56 @@
+import sys
+import os
+import re
+import random
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from assistant.keyword_index import KeywordIndex
+
+SPECS = [
+    {"name": "weather", "keywords": ["weather", "rain", "forecast"], "examples": ["will it rain tomorrow"]},
+    {"name": "lights", "keywords": ["lights", "on", "off"], "examples": ["turn on the lights"]},
+    {"name": "timer", "keywords": ["timer", "remind me"], "examples": []},
+]
+
+
+class TestKeywordIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = KeywordIndex.from_specs(SPECS)
+
+    def test_scores_match_keyword_and_example_weights(self):
+        hits = self.index.scan("Turn ON the   lights please")
+        self.assertEqual(hits, {1: (10 + 10 + 20, 2)})
+        self.assertEqual(self.index.best("will it rain tomorrow?"), (0, 30))
+
+    def test_whole_words_only(self):
+        self.assertEqual(self.index.scan("it is done, training starts"), {})
+        self.assertEqual(self.index.scan("rain-check"), {0: (10, 1)})
+        self.assertEqual(self.index.first_keyword_match("please remind me later"), 2)
+        self.assertIsNone(self.index.first_keyword_match("remind meeting"))
+
+    def test_overlapping_patterns_and_repeats(self):
+        index = KeywordIndex.from_specs([{"keywords": ["he", "she", "hers", "his"]}, {"keywords": ["she sells"]}])
+        self.assertEqual(index.scan("she sells, she sells"), {0: (10, 1), 1: (10, 1)})
+        self.assertEqual(index.scan("hers his"), {0: (20, 2)})
+        self.assertEqual(index.best(""), (None, 0))
+
+    def test_agrees_with_naive_scan(self):
+        rng = random.Random(3)
+        words = ["on", "one", "lights", "light", "go", "good", "morning", "mo", "in"]
+        specs = [{"keywords": [" ".join(rng.sample(words, rng.randint(1, 2))) for _ in range(3)]} for _ in range(40)]
+        index = KeywordIndex.from_specs(specs)
+        for _ in range(200):
+            utterance = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+            expected = {}
+            for i, spec in enumerate(specs):
+                found = [kw for kw in set(spec["keywords"]) if re.search(rf"(?<!\w){re.escape(kw)}(?!\w)", utterance)]
+                if found:
+                    expected[i] = (10 * len(found), len(found))
+            self.assertEqual(index.scan(utterance), expected, utterance)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 import sys
 import os
+import math
 import unittest
+import time
+import tempfile
 from unittest.mock import MagicMock, patch
 
 # Add project root to path
@@ -8,6 +11,171 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from assistant.persona_engine import PersonaEngine
 from assistant.llm_client import LLMClient
+from assistant.voice_io import VoiceIO
+from assistant.keyword_index import KeywordIndex
+from assistant.intent_classifier import IntentClassifier
+
+class FakeModel:
+    """
+    Character-level stand-in for a ctransformers LLM. Logits cover the end-of-sequence,
+    digit and newline tokens only; they favour "1" after a newline and "2" after "1".
+    """
+    BOS, EOS = 1, 0
+
+    def __init__(self):
+        self.context = []
+        self.evaluated = []   # token lists passed to eval()
+
+    @staticmethod
+    def tok(ch):
+        return 2 + "0123456789\n".index(ch) if ch in "0123456789\n" else 16 + ord(ch)
+
+    @property
+    def eos_token_id(self):
+        return self.EOS
+
+    def tokenize(self, text, add_bos_token=None):
+        return ([] if add_bos_token is False else [self.BOS]) + [self.tok(ch) for ch in text]
+
+    def prepare_inputs_for_generation(self, tokens, reset=True):
+        n_past = 0
+        for a, b in zip(self.context, tokens[:-1]):
+            if a != b:
+                break
+            n_past += 1
+        self.context = self.context[:n_past]
+        return tokens[n_past:]
+
+    def __call__(self, prompt, max_new_tokens=128, temperature=0.7, stop=None, stream=False):
+        self.eval(self.prepare_inputs_for_generation(self.tokenize(prompt), reset=True))
+        return iter(["o", "k"]) if stream else "ok"
+
+    def eval(self, tokens):
+        self.evaluated.append(list(tokens))
+        self.context.extend(tokens)
+
+    @property
+    def logits(self):
+        out = [0.0] * 16
+        last = self.context[-1]
+        if last == self.tok("\n"):
+            out[self.tok("1")] = 3.0
+        elif last == self.tok("1"):
+            out[self.tok("2")] = 2.0
+        return out
+
+
+def fake_client(contexts=2):
+    """LLMClient whose contexts are FakeModels."""
+    with tempfile.NamedTemporaryFile(suffix=".gguf") as f, \
+            patch('assistant.llm_client.AutoModelForCausalLM') as automodel:
+        automodel.from_pretrained.side_effect = lambda *a, **kw: FakeModel()
+        client = LLMClient(f.name, contexts=contexts)
+        client.wait_ready()
+    return client
+
+
+class TestLabelScoring(unittest.TestCase):
+    def client(self):
+        return fake_client()
+
+    def test_single_token_labels_use_one_evaluation(self):
+        client = self.client()
+        probs = client.score_labels("Index:\n", ["0", "1", "2"])
+        self.assertAlmostEqual(sum(probs), 1.0)
+        self.assertEqual(max(range(3), key=probs.__getitem__), 1)
+        self.assertAlmostEqual(probs[1], math.exp(3) / (math.exp(3) + 2))
+        self.assertEqual(len(client.model.evaluated), 1)
+
+    def test_multi_token_labels_share_prefixes(self):
+        client = self.client()
+        probs = client.score_labels("Index:\n", ["1", "12", "3"])
+        # "1" must be followed by end-of-sequence, which is unlikely after "1"; "12" wins
+        self.assertEqual(max(range(3), key=probs.__getitem__), 1)
+        self.assertAlmostEqual(sum(probs), 1.0)
+        # the prompt once, then only the "1" token on top of it
+        self.assertEqual(client.model.evaluated[1], [FakeModel.tok("1")])
+        self.assertEqual(len(client.model.evaluated), 2)
+
+    def test_without_model(self):
+        client = self.client()
+        client.model = None
+        self.assertIsNone(client.score_labels("Index:\n", ["0"]))
+
+
+class TestPrefixContexts(unittest.TestCase):
+    INTENT = "<|system|>\nClassify the intent.</s>\n<|user|>\n"
+    PERSONA = "<|system|>\nYou are CAL. Style: friendly.</s>\n<|user|>\n"
+
+    def test_prompt_families_keep_their_prefix(self):
+        with tempfile.NamedTemporaryFile(suffix=".gguf") as f, \
+                patch('assistant.llm_client.AutoModelForCausalLM') as automodel:
+            automodel.from_pretrained.side_effect = lambda *a, **kw: FakeModel()
+            client = LLMClient(f.name, contexts=2)
+            # both contexts are open before the first request
+            client.wait_ready()
+            self.assertEqual(automodel.from_pretrained.call_count, 2)
+            for turn in ("lights on", "rain?"):
+                client.generate(self.INTENT + turn)
+                client.generate(self.PERSONA + turn)
+        self.assertEqual(automodel.from_pretrained.call_count, 2)
+        intent, persona = (c.model for c in client._contexts)
+        # second turn: only the text after each family's system block is evaluated
+        self.assertEqual(intent.evaluated[-1], intent.tokenize("rain?", add_bos_token=False))
+        self.assertEqual(persona.evaluated[-1], persona.tokenize("rain?", add_bos_token=False))
+        stats = client.prefix_stats
+        self.assertEqual((stats["contexts"], stats["evictions"]), (2, 0))
+        self.assertGreater(stats["reused_tokens"], len(self.INTENT))
+
+    def test_least_recently_used_context_is_evicted(self):
+        client = fake_client(contexts=1)
+        client.generate(self.INTENT + "one")
+        client.generate(self.PERSONA + "two")
+        self.assertEqual(client.prefix_stats["evictions"], 1)
+        model = client._contexts[0].model
+        # the persona prompt replaced the intent prefix: evaluated from the first differing token
+        self.assertEqual(len(model.evaluated[-1]), len(self.PERSONA + "two") + 1 - len("<|system|>\n") - 1)
+
+
+class TestStreaming(unittest.TestCase):
+    def test_generate_stream_releases_context(self):
+        client = fake_client(contexts=1)
+        self.assertEqual(list(client.generate_stream("Hello\n")), ["o", "k"])
+        stream = client.generate_stream("Hello again\n")
+        self.assertEqual(next(stream), "o")
+        stream.close()
+        self.assertFalse(client._contexts[0].busy)
+        self.assertEqual(client.generate("Hello\n"), "ok")
+        self.assertEqual(client.prefix_stats["contexts"], 1)
+
+    @patch('assistant.persona_engine.LLMClient')
+    def test_decorate_stream_yields_sentences(self, MockLLMClient):
+        mock_client = MockLLMClient.return_value
+        mock_client.model = True
+        mock_client.generate_stream.return_value = iter(["It is sun", "ny. Take", " a hat!", " Bye"])
+
+        engine = PersonaEngine()
+        chunks = list(engine.decorate_stream("What's the weather?", {'city': 'London', 'forecast': 'sunny'}))
+        self.assertEqual(chunks, ["It is sunny.", "Take a hat!", "Bye"])
+
+        # nothing generated: the template reply
+        mock_client.generate_stream.return_value = iter([])
+        chunks = list(engine.decorate_stream("What's the weather?", {'city': 'London', 'forecast': 'sunny', 'temp_c': 18}))
+        self.assertEqual(chunks, ["In London, it's sunny at 18°C."])
+
+    def test_speak_stream_reports_time_to_first_word(self):
+        def chunks():
+            yield "First."
+            time.sleep(0.05)
+            yield "Second."
+
+        voice = VoiceIO()
+        with patch('builtins.print'):
+            started = time.perf_counter()
+            text, first_word = voice.speak_stream(chunks(), started=started)
+        self.assertEqual(text, "First. Second.")
+        self.assertLess(first_word, time.perf_counter() - started - 0.04)
+
 
 class TestLLMIntegration(unittest.TestCase):
     @patch('assistant.llm_client.AutoModelForCausalLM')
@@ -58,6 +226,108 @@ class TestLLMIntegration(unittest.TestCase):
         self.assertIn("Turn on the lights", prompt)
         self.assertIn("weather", prompt)
 
+    @patch('assistant.persona_engine.LLMClient')
+    def test_persona_engine_keyword_fallback(self, MockLLMClient):
+        MockLLMClient.return_value.model = None
+
+        engine = PersonaEngine()
+        intents = [
+            {'name': 'weather', 'keywords': ['rain'], 'examples': ['will it rain']},
+            {'name': 'lights', 'keywords': ['on', 'off']}
+        ]
+        index = KeywordIndex.from_specs(intents)
+
+        chosen, score = engine.parse_intent("Will it rain today?", intents, keyword_index=index)
+        self.assertEqual((chosen['name'], score), ('weather', 30.0))
+        # whole words only: "done" does not contain the keyword "on"
+        self.assertEqual(engine.parse_intent("I am done", intents, keyword_index=index), (None, 0.0))
+
+    @patch('assistant.persona_engine.LLMClient')
+    def test_confident_classifier_skips_llm(self, MockLLMClient):
+        mock_client = MockLLMClient.return_value
+        mock_client.model = True
+        mock_client.generate.return_value = "Index: 0"
+
+        engine = PersonaEngine()
+        intents = [
+            {'name': 'weather', 'keywords': ['weather', 'rain'], 'examples': ["what's the weather in Paris"]},
+            {'name': 'lights', 'keywords': ['lights', 'lamp'], 'examples': ['turn on the lights']}
+        ]
+        classifier = IntentClassifier.from_specs(intents)
+
+        chosen, _ = engine.parse_intent("what's the weather in Rome", intents, classifier=classifier)
+        self.assertEqual(chosen['name'], 'weather')
+        mock_client.generate.assert_not_called()
+
+        # nothing the classifier recognizes: ask the LLM
+        chosen, score = engine.parse_intent("hmm, do the thing", intents, classifier=classifier)
+        self.assertEqual((chosen['name'], score), ('weather', 1.0))
+        mock_client.generate.assert_called_once()
+
+        stats = engine.decision_stats()
+        self.assertEqual((stats['classifier'], stats['llm'], stats['llm_avoided']), (1, 1, 1))
+        self.assertEqual(stats['llm_rate'], 0.5)
+
+    @patch('assistant.persona_engine.LLMClient')
+    def test_unrelated_utterances_match_no_intent(self, MockLLMClient):
+        MockLLMClient.return_value.model = None
+
+        engine = PersonaEngine()
+        intents = [
+            {'name': 'get_weather', 'keywords': ['weather', 'forecast'],
+             'examples': ["what's the weather", 'forecast for paris']},
+            {'name': 'echo', 'keywords': ['echo', 'repeat'], 'examples': ['say hello', 'repeat after me']}
+        ]
+        classifier = IntentClassifier.from_specs(intents)
+        for utterance in ("what's the time", "what's the score", "what is the plan for today",
+                          "play music for paris", "the"):
+            self.assertEqual(engine.parse_intent(utterance, intents, classifier=classifier), (None, 0.0), utterance)
+        chosen, _ = engine.parse_intent("what's the weather like", intents, classifier=classifier)
+        self.assertEqual(chosen['name'], 'get_weather')
+        self.assertEqual(engine.decision_stats()['classifier'], 1)
+
+    @patch('assistant.persona_engine.LLMClient')
+    def test_llm_prompt_lists_only_shortlisted_intents(self, MockLLMClient):
+        mock_client = MockLLMClient.return_value
+        mock_client.model = True
+        mock_client.generate.return_value = "0"
+
+        engine = PersonaEngine(intent_shortlist=3)
+        intents = [{'name': f'filler{i}', 'keywords': [f'word{i}']} for i in range(200)]
+        intents[137] = {'name': 'lights', 'keywords': ['lights', 'lamp']}
+
+        chosen, _ = engine.parse_intent("dim the lights", intents)
+        self.assertEqual(chosen['name'], 'lights')   # index 0 of the shortlist maps back to 137
+        prompt = mock_client.generate.call_args[0][0]
+        self.assertIn("0: lights", prompt)
+        self.assertNotIn("3:", prompt)
+        self.assertNotIn("filler100", prompt)
+
+    @patch('assistant.persona_engine.LLMClient')
+    def test_scored_labels_replace_generation(self, MockLLMClient):
+        mock_client = MockLLMClient.return_value
+        mock_client.model = True
+        mock_client.score_labels.return_value = [0.2, 0.8]
+
+        engine = PersonaEngine()
+        intents = [
+            {'name': 'weather', 'keywords': ['rain']},
+            {'name': 'lights', 'keywords': ['on', 'off']}
+        ]
+        chosen, score = engine.parse_intent("Turn on the lights", intents)
+        self.assertEqual((chosen['name'], score), ('lights', 0.8))
+        prompt, labels = mock_client.score_labels.call_args[0]
+        self.assertIn("1: lights", prompt)
+        self.assertEqual(labels, ['0', '1'])
+        mock_client.generate.assert_not_called()
+
+        # not confident enough: the keyword fallback decides
+        mock_client.score_labels.return_value = [0.5, 0.5]
+        engine.intent_llm_min_prob = 0.6
+        chosen, score = engine.parse_intent("Will it rain?", intents)
+        self.assertEqual((chosen['name'], score), ('weather', 10.0))
+        self.assertEqual(engine.decision_stats()['keyword'], 1)
+
     @patch('assistant.persona_engine.LLMClient')
     def test_persona_engine_decorate(self, MockLLMClient):
         mock_client = MockLLMClient.return_value
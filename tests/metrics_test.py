@@ -0,0 +1,60 @@
+import sys
+import os
+import random
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.metrics import Histogram, Metrics, BUCKET_GROWTH, is_error_output
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles_within_bucket_error(self):
+        rng = random.Random(7)
+        samples = [rng.lognormvariate(-4, 1) for _ in range(5000)]
+        hist = Histogram()
+        for s in samples:
+            hist.observe(s)
+        ordered = sorted(samples)
+        for q in (0.5, 0.95, 0.99):
+            exact = ordered[int(q * len(ordered)) - 1]
+            self.assertLess(abs(hist.quantile(q) - exact) / exact, BUCKET_GROWTH - 1)
+        self.assertEqual(hist.count, 5000)
+        self.assertAlmostEqual(hist.sum, sum(samples))
+
+    def test_empty_and_out_of_range(self):
+        hist = Histogram()
+        self.assertIsNone(hist.quantile(0.5))
+        hist.observe(0.0)
+        hist.observe(10000.0)
+        self.assertTrue(600 < hist.quantile(0.99) <= 10000.0)   # overflow bucket is capped by the max
+
+
+class TestMetrics(unittest.TestCase):
+    def test_snapshot_and_prometheus_text(self):
+        m = Metrics()
+        m.record("weather:forecast", 0.010, {"queue": 0.001, "execute": 0.009})
+        m.record("weather:forecast", 0.030, {"queue": 0.002, "execute": 0.028}, "plugin")
+        m.record("weather:forecast", None, {"queue": 0.5}, "timeout")
+
+        snap = m.snapshot()["weather:forecast"]
+        self.assertEqual((snap["calls"], snap["errors"]), (3, 2))
+        self.assertEqual(snap["latency"]["count"], 2)
+        self.assertEqual(snap["stages"]["queue"]["count"], 3)
+
+        text = m.prometheus()
+        self.assertIn("# TYPE cal_plugin_call_seconds summary", text)
+        self.assertIn('cal_plugin_errors_total{plugin="weather",export="forecast",kind="plugin"} 1', text)
+        self.assertIn('cal_plugin_call_seconds_count{plugin="weather",export="forecast"} 2', text)
+        self.assertIn('cal_plugin_stage_seconds{plugin="weather",export="forecast",stage="execute",quantile="0.5"}', text)
+
+    def test_error_outputs(self):
+        self.assertTrue(is_error_output("[core:error] Plugin 'x' not found."))
+        self.assertTrue(is_error_output("[python:exception] boom"))
+        self.assertFalse(is_error_output("It is 20 degrees [core:error]"))
+        self.assertFalse(is_error_output({"ok": True}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,575 @@
+import sys
+import os
+import json
+import asyncio
+import shutil
+import socket
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.core import Core
+from core.deadlines import PluginTimeout
+from tests.helpers import BASE_DIR, make_workspace, COUNTER_PLUGIN
+
+SLOW_PLUGIN = """
+import os, time
+
+def nap(slots):
+    time.sleep(slots.get("seconds", 0))
+    return "awake"
+
+def first_call_hangs(slots):
+    # only the very first request (across workers) stalls
+    marker = slots["marker"]
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        time.sleep(5)
+    return os.getpid()
+"""
+
+FORKED_PLUGIN = """
+import os, time
+state = {"calls": 0}
+
+def bump(slots):
+    state["calls"] += 1
+    return {"calls": state["calls"], "pid": os.getpid()}
+
+def nap(slots):
+    time.sleep(slots.get("seconds", 0))
+    return "awake"
+"""
+
+SPIN_PLUGIN = """
+module.exports = {
+  spin: function() { for (;;) {} },
+  ok: function() { return "ok"; }
+};
+"""
+
+LATER_PLUGIN = """
+module.exports = {
+  later: function() { return new Promise((resolve) => setTimeout(() => resolve("done"), 300)); }
+};
+"""
+
+GREETER_PLUGIN = """
+import os, sys
+sys.path.insert(0, os.path.dirname(__file__))
+from words import WORD
+
+def greet(slots):
+    return WORD
+"""
+
+
+class TestPythonWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.core = Core(BASE_DIR)
+        self.core.resolve_and_load()
+        self.lm = self.core.language_modules["python3"]
+
+    def tearDown(self):
+        self.core.stop_all()
+
+    def test_worker_is_reused_between_calls(self):
+        out = self.core.run_plugin("com.example.weather", "get_weather", {"city": "Paris"})
+        self.assertEqual(json.loads(out)["city"], "Paris")
+        pids = {w.proc.pid for w in self.lm.pool.workers}
+
+        self.core.run_plugin("com.example.weather", "get_weather", {"city": "Oslo"})
+        self.assertEqual({w.proc.pid for w in self.lm.pool.workers}, pids)
+
+    def test_crashed_worker_is_replaced(self):
+        self.core.run_plugin("com.example.weather", "get_weather", {})
+        for w in self.lm.pool.workers:
+            w.proc.kill()
+            w.proc.wait()
+
+        out = self.core.run_plugin("com.example.weather", "get_weather", {"city": "Rome"})
+        self.assertEqual(json.loads(out)["city"], "Rome")
+
+    def test_missing_export_returns_empty_output(self):
+        self.assertEqual(self.core.run_plugin("com.example.weather", "nope", {}), "")
+
+    def test_batch_returns_outputs_in_order(self):
+        slots = [{"city": f"city-{i}"} for i in range(7)]
+        outs = self.core.run_plugin_batch("com.example.weather", "get_weather", slots)
+        self.assertEqual([json.loads(o)["city"] for o in outs], [s["city"] for s in slots])
+        self.assertEqual(self.core.run_plugin_batch("com.example.weather", "get_weather", []), [])
+
+    def test_stop_shuts_down_workers(self):
+        self.core.run_plugin("com.example.weather", "get_weather", {})
+        procs = [w.proc for w in self.lm.pool.workers]
+        self.lm.stop()
+        self.assertIsNone(self.lm.pool)
+        self.assertTrue(all(p.poll() is not None for p in procs))
+
+
+class TestAsyncInvocation(unittest.TestCase):
+    def setUp(self):
+        self.core = Core(BASE_DIR)
+        self.core.resolve_and_load()
+
+    def tearDown(self):
+        self.core.stop_all()
+
+    def test_gather_plugins_keeps_call_order(self):
+        calls = [("com.example.weather", "get_weather", {"city": f"city-{i}"}) for i in range(6)]
+        calls.append(("com.example.missing", "get_weather", {}))
+
+        outs = asyncio.run(self.core.gather_plugins(calls, limit_per_language=2))
+
+        self.assertEqual([json.loads(o)["city"] for o in outs[:-1]], [f"city-{i}" for i in range(6)])
+        self.assertIn("not found", outs[-1])
+
+
+class TestInProcessPlugins(unittest.TestCase):
+    def setUp(self):
+        manifest = {"name": "counter", "language": "python3", "entry": "counter.py",
+                    "exports": ["bump"], "isolation": "inprocess"}
+        self.ws = make_workspace({"counter": (manifest, {"counter.py": COUNTER_PLUGIN})})
+        self.core = Core(self.ws)
+        self.core.resolve_and_load()
+
+    def tearDown(self):
+        self.core.stop_all()
+        shutil.rmtree(self.ws, ignore_errors=True)
+
+    def test_exports_are_called_in_process(self):
+        instance = self.core.registry.plugins["counter"]["instance"]
+        self.assertIs(instance.state["started"], self.core)
+
+        self.core.run_plugin("counter", "bump", {"n": 1})
+        out = self.core.run_plugin("counter", "bump", {"n": 2})
+        self.assertEqual(json.loads(out), {"calls": 2, "n": 2})
+        self.assertIsNone(self.core.language_modules["python3"].pool)
+
+    def test_batch_without_native_export_calls_each_item(self):
+        outs = self.core.run_plugin_batch("counter", "bump", [{"n": 1}, {"n": 2}])
+        self.assertEqual([json.loads(o) for o in outs], [{"calls": 1, "n": 1}, {"calls": 2, "n": 2}])
+
+    def test_undeclared_export_is_not_callable(self):
+        self.assertEqual(self.core.run_plugin("counter", "on_start", {}), "")
+
+    def test_stop_all_runs_on_stop(self):
+        instance = self.core.registry.plugins["counter"]["instance"]
+        self.core.stop_all()
+        self.assertTrue(instance.state["stopped"])
+
+
+class TestDeadlines(unittest.TestCase):
+    def setUp(self):
+        manifest = {"name": "slow", "language": "python3", "entry": "slow.py",
+                    "exports": ["nap", "first_call_hangs"], "timeout": 0.5}
+        self.ws = make_workspace({"slow": (manifest, {"slow.py": SLOW_PLUGIN})})
+        self.core = Core(self.ws)
+        self.core.resolve_and_load()
+
+    def tearDown(self):
+        self.core.stop_all()
+        shutil.rmtree(self.ws, ignore_errors=True)
+
+    def test_manifest_timeout_raises_structured_error_and_kills_worker(self):
+        with self.assertRaises(PluginTimeout) as ctx:
+            self.core.run_plugin("slow", "nap", {"seconds": 5})
+        self.assertEqual(ctx.exception.to_dict()["export"], "nap")
+        self.assertIn("spawn", ctx.exception.stages)
+
+        # the stuck worker was killed; the next call gets a fresh one
+        self.assertEqual(self.core.run_plugin("slow", "nap", {"seconds": 0}), "awake")
+
+    def test_per_call_override(self):
+        self.assertEqual(self.core.run_plugin("slow", "nap", {"seconds": 0.8}, timeout=3), "awake")
+        stages = self.core.stage_timings()["slow:nap"]
+        self.assertEqual(stages["calls"], 1)
+        self.assertGreaterEqual(stages["execute"], 0.8)
+
+    def test_metrics_split_latency_and_count_errors(self):
+        for _ in range(3):
+            self.core.run_plugin("slow", "nap", {"seconds": 0.05})
+        with self.assertRaises(PluginTimeout):
+            self.core.run_plugin("slow", "nap", {"seconds": 5})
+        self.core.run_plugin("slow", "missing", {})
+
+        nap = self.core.metrics()["slow:nap"]
+        self.assertEqual((nap["calls"], nap["errors_by_kind"]), (4, {"timeout": 1}))
+        self.assertGreaterEqual(nap["latency"]["p50"], 0.04)
+        self.assertGreaterEqual(nap["latency"]["p99"], 0.4)
+        self.assertTrue({"queue", "spawn", "execute", "decode"} <= set(nap["stages"]))
+        self.assertEqual(self.core.metrics()["slow:missing"]["errors_by_kind"], {"plugin": 1})
+
+        path = self.core.serve_metrics(str(self.ws / "metrics.sock"))
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.connect(path)
+            text = sock.makefile("r").read()
+        self.assertIn('cal_plugin_calls_total{plugin="slow",export="nap"} 4', text)
+        self.assertIn('cal_plugin_errors_total{plugin="slow",export="nap",kind="timeout"} 1', text)
+        self.assertIn('cal_plugin_stage_seconds_count{plugin="slow",export="nap",stage="execute"}', text)
+
+    def test_hedged_request_answers_first(self):
+        lm = self.core.language_modules["python3"]
+        info = self.core.plugins["slow"]["info"]
+        slots = {"marker": str(self.ws / "marker")}
+
+        out = lm.run_code(info, "first_call_hangs", slots, timeout=3, hedge_after=0.2)
+
+        self.assertEqual(lm.pool.hedged, 1)
+        self.assertIn(int(out), {w.proc.pid for w in lm.pool.workers})
+
+        # the losing worker is still busy with the duplicate, so the next call avoids it
+        loser = next(w for w in lm.pool.workers if w.proc.pid != int(out))
+        self.assertEqual(loser.inflight, 1)
+        self.assertEqual(int(lm.run_code(info, "first_call_hangs", slots, timeout=1)), int(out))
+
+    def test_call_queued_behind_killed_worker_is_sent_again(self):
+        lm = self.core.language_modules["python3"]
+        lm._get_pool().size = 1
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            hung = ex.submit(self.core.run_plugin, "slow", "nap", {"seconds": 5})
+            while not lm.pool.workers or lm.pool.workers[0].inflight < 1:
+                time.sleep(0.01)
+            queued = ex.submit(self.core.run_plugin, "slow", "nap", {"seconds": 0}, timeout=10)
+            with self.assertRaises(PluginTimeout):
+                hung.result()
+            # the worker was killed for the hung call; the healthy one ran on its replacement
+            self.assertEqual(queued.result(), "awake")
+
+    def test_async_fallback_keeps_deadline_and_stages(self):
+        lm = self.core.language_modules["python3"]
+
+        class SyncOnly:
+            # a loader without run_code_async
+            run_code = lm.run_code
+
+        self.core.language_modules["python3"] = SyncOnly()
+        self.assertEqual(asyncio.run(self.core.run_plugin_async("slow", "nap", {"seconds": 0})), "awake")
+        with self.assertRaises(PluginTimeout):
+            asyncio.run(self.core.run_plugin_async("slow", "nap", {"seconds": 5}))
+
+        nap = self.core.metrics()["slow:nap"]
+        self.assertEqual(nap["errors_by_kind"], {"timeout": 1})
+        self.assertIn("execute", nap["stages"])
+        # the loader gave up on the worker at the deadline instead of letting it run on
+        self.assertFalse(any(w.inflight for w in lm.pool.workers))
+
+    def test_batch_deadline_covers_every_item(self):
+        lm = self.core.language_modules["python3"]
+
+        class NoBatch:
+            # a loader without run_batch: Core calls run_code per item
+            run_code = lm.run_code
+
+        self.core.language_modules["python3"] = NoBatch()
+        started = time.perf_counter()
+        with self.assertRaises(PluginTimeout):
+            self.core.run_plugin_batch("slow", "nap", [{"seconds": 0.3}] * 3)
+        self.assertLess(time.perf_counter() - started, 0.85)
+
+        self.core.language_modules["python3"] = lm
+        self.core.plugins["slow"]["info"]["isolation"] = "spawn"
+        started = time.perf_counter()
+        with self.assertRaises(PluginTimeout):
+            self.core.run_plugin_batch("slow", "nap", [{"seconds": 0.3}] * 3)
+        self.assertLess(time.perf_counter() - started, 0.85)
+
+    def test_hedge_needs_an_idle_worker(self):
+        lm = self.core.language_modules["python3"]
+        info = self.core.plugins["slow"]["info"]
+        lm._get_pool().size = 1
+
+        # the only worker is running the original: a duplicate would queue behind it
+        out = lm.run_code(info, "nap", {"seconds": 0.5}, timeout=3, hedge_after=0.1)
+        self.assertEqual(out, "awake")
+        self.assertEqual(lm.pool.hedged, 0)
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "fork server needs os.fork")
+class TestForkServer(unittest.TestCase):
+    def setUp(self):
+        manifest = {"name": "forked", "language": "python3", "entry": "forked.py",
+                    "exports": ["bump", "nap"], "isolation": "fork"}
+        self.ws = make_workspace({"forked": (manifest, {"forked.py": FORKED_PLUGIN})})
+        self.core = Core(self.ws)
+        self.core.resolve_and_load()
+        self.lm = self.core.language_modules["python3"]
+
+    def tearDown(self):
+        self.core.stop_all()
+        shutil.rmtree(self.ws, ignore_errors=True)
+
+    def test_each_call_runs_in_a_fresh_child(self):
+        first = json.loads(self.core.run_plugin("forked", "bump", {}))
+        second = json.loads(self.core.run_plugin("forked", "bump", {}))
+
+        self.assertEqual((first["calls"], second["calls"]), (1, 1))
+        self.assertNotEqual(first["pid"], second["pid"])
+        self.assertIsNone(self.lm.pool)
+        self.assertIn(self.core.plugins["forked"]["info"]["path"], self.lm.fork_preload)
+
+    def test_timeout_kills_child_but_keeps_fork_server(self):
+        self.core.run_plugin("forked", "bump", {})
+        server_pids = {w.proc.pid for w in self.lm.fork_pool.workers}
+
+        with self.assertRaises(PluginTimeout):
+            self.core.run_plugin("forked", "nap", {"seconds": 5}, timeout=0.3)
+
+        self.assertEqual(self.core.run_plugin("forked", "nap", {"seconds": 0}), "awake")
+        self.assertTrue(server_pids & {w.proc.pid for w in self.lm.fork_pool.workers})
+
+
+class TestManifestIndex(unittest.TestCase):
+    def setUp(self):
+        manifest = {"name": "counter", "language": "python3", "entry": "counter.py", "exports": ["bump"],
+                    "intents": {"count": {"export": "bump", "keywords": ["count"]}}}
+        self.ws = make_workspace({"counter": (manifest, {"counter.py": COUNTER_PLUGIN})})
+
+    def tearDown(self):
+        shutil.rmtree(self.ws, ignore_errors=True)
+
+    def load(self):
+        core = Core(self.ws)
+        core.resolve_and_load()
+        core.stop_all()
+        return core
+
+    def test_unchanged_plugins_are_registered_from_index(self):
+        first = self.load()
+        self.assertTrue(first.index_path.exists())
+
+        # same size and mtime but unparseable: only the index can register it
+        manifest_path = self.ws / "plugins" / "counter" / "plugin.json"
+        st = manifest_path.stat()
+        manifest_path.write_text("x" * st.st_size)
+        os.utime(manifest_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        second = self.load()
+        self.assertEqual(second.plugins["counter"]["meta"], first.plugins["counter"]["meta"])
+        self.assertEqual(second.plugins["counter"]["intents"][0]["export"], "bump")
+
+    def test_modified_and_removed_plugins_are_refreshed(self):
+        self.load()
+        manifest_path = self.ws / "plugins" / "counter" / "plugin.json"
+        manifest = json.loads(manifest_path.read_text())
+        manifest["version"] = "2.0.0"
+        manifest_path.write_text(json.dumps(manifest) + "\n")
+        self.assertEqual(self.load().plugins["counter"]["meta"]["version"], "2.0.0")
+
+        shutil.rmtree(self.ws / "plugins" / "counter")
+        self.load()
+        self.assertEqual(json.loads(Core(self.ws).index_path.read_text())["plugins"], {})
+
+
+class TestLazyStartup(unittest.TestCase):
+    def setUp(self):
+        plugins = {}
+        for i in range(12):
+            manifest = {"name": f"p{i}", "language": "python3", "entry": "counter.py", "exports": ["bump"]}
+            plugins[f"p{i:02d}"] = (manifest, {"counter.py": COUNTER_PLUGIN})
+        self.ws = make_workspace(plugins)
+        self.core = Core(self.ws)
+        self.core.resolve_and_load()
+
+    def tearDown(self):
+        self.core.stop_all()
+        shutil.rmtree(self.ws, ignore_errors=True)
+
+    def test_only_needed_language_modules_are_created(self):
+        self.assertEqual(list(self.core.language_modules), ["python3"])
+        self.assertIn("nodejs", self.core.language_loaders)
+        # the interpreter is not probed until a worker is needed
+        self.assertIsNone(self.core.language_modules["python3"]._python_exe)
+
+    def test_plugins_load_concurrently_in_directory_order(self):
+        self.assertEqual(self.core.list_plugins(), [f"p{i:02d}" for i in range(12)])
+        out = self.core.run_plugin("p07", "bump", {"n": 7})
+        self.assertEqual(json.loads(out), {"calls": 1, "n": 7})
+
+
+class TestDependencyActivation(unittest.TestCase):
+    STARTER = """
+import time
+def on_start(core):
+    time.sleep(0.2)
+    core.started.append("{name}")
+def ping(slots):
+    return "{name}"
+"""
+
+    def plugin(self, name, requires=(), version="1.0.0"):
+        manifest = {"name": name, "version": version, "language": "python3", "entry": "p.py",
+                    "exports": ["ping"], "isolation": "inprocess", "requires": list(requires)}
+        return manifest, {"p.py": self.STARTER.format(name=name)}
+
+    def load(self, plugins):
+        self.ws = make_workspace(plugins)
+        self.core = Core(self.ws)
+        self.core.started = []
+        self.core.resolve_and_load()
+
+    def tearDown(self):
+        self.core.stop_all()
+        shutil.rmtree(self.ws, ignore_errors=True)
+
+    def test_waves_start_in_order_and_in_parallel(self):
+        started = time.perf_counter()
+        self.load({"a": self.plugin("a"), "b": self.plugin("b"),
+                   "c": self.plugin("c", ["a@^1.0", "b"]), "d": self.plugin("d", ["c"])})
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(self.core.activation_waves, [["a", "b"], ["c"], ["d"]])
+        self.assertEqual(sorted(self.core.started[:2]), ["a", "b"])
+        self.assertEqual(self.core.started[2:], ["c", "d"])
+        self.assertLess(elapsed, 0.75)   # three waves, not four sequential hooks
+        self.assertEqual(self.core.plugins["c"]["requires"], ["a", "b"])
+
+    def test_unsatisfiable_range_fails_before_anything_starts(self):
+        from core.dependencies import DependencyError
+        with self.assertRaises(DependencyError):
+            self.load({"a": self.plugin("a", version="2.1.0"), "b": self.plugin("b", ["a@^1.0"])})
+        self.assertEqual(self.core.started, [])
+        self.assertEqual(self.core.plugins, {})
+
+
+class TestHotReload(unittest.TestCase):
+    def setUp(self):
+        self.ws = make_workspace({
+            "greeter": ({"name": "greeter", "language": "python3", "entry": "greeter.py", "exports": ["greet"],
+                         "intents": {"greet": {"keywords": ["hello"]}}},
+                        {"greeter.py": GREETER_PLUGIN,
+                         "words.py": "WORD = 'hi'\n"}),
+            "counter": ({"name": "counter", "language": "python3", "entry": "counter.py",
+                         "exports": ["bump"], "isolation": "inprocess"},
+                        {"counter.py": COUNTER_PLUGIN}),
+        })
+        self.core = Core(self.ws)
+        self.core.resolve_and_load()
+        self.changes = []
+        self.core.add_plugin_listener(lambda name, entry: self.changes.append((name, entry)))
+        self.watcher = self.core.watch_plugins(interval=0.05, use_inotify=False)
+
+    def tearDown(self):
+        self.core.stop_all()
+        shutil.rmtree(self.ws, ignore_errors=True)
+
+    def wait_for_reload(self, count):
+        deadline = time.time() + 5
+        while self.watcher.reloads < count and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertGreaterEqual(self.watcher.reloads, count)
+
+    def test_helper_module_change_reaches_warm_worker(self):
+        self.assertEqual(self.core.run_plugin("greeter", "greet", {}), "hi")
+        workers = list(self.core.language_modules["python3"].pool.workers)
+
+        (self.ws / "plugins" / "greeter" / "words.py").write_text("WORD = 'hello there'\n")
+        self.wait_for_reload(1)
+
+        self.assertEqual(self.core.run_plugin("greeter", "greet", {}), "hello there")
+        self.assertEqual(self.core.language_modules["python3"].pool.workers, workers)
+        self.assertEqual(self.changes[-1][0], "greeter")
+        self.assertEqual(self.changes[-1][1]["intents"][0]["name"], "greet")
+
+    def test_inprocess_plugin_is_stopped_and_restarted(self):
+        old = self.core.registry.plugins["counter"]["instance"]
+        self.core.run_plugin("counter", "bump", {})
+
+        (self.ws / "plugins" / "counter" / "counter.py").write_text(COUNTER_PLUGIN + "\n# v2\n")
+        self.wait_for_reload(1)
+
+        self.assertTrue(old.state["stopped"])
+        self.assertIsNot(self.core.registry.plugins["counter"]["instance"], old)
+        self.assertEqual(json.loads(self.core.run_plugin("counter", "bump", {}))["calls"], 1)
+
+    def test_inotify_rescans_only_after_events(self):
+        self.watcher.stop()
+        self.core.watcher = None
+        self.watcher = self.core.watch_plugins(interval=0.05)
+        if self.watcher.mode != "inotify":
+            self.skipTest("inotify is not available")
+        time.sleep(0.3)
+        self.assertEqual(self.watcher.scans, 0)
+
+        # a file in a new subdirectory: the directory is watched once it has been seen
+        helpers = self.ws / "plugins" / "greeter" / "helpers"
+        helpers.mkdir()
+        deadline = time.time() + 5
+        while str(helpers) not in self.watcher.watches and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.watcher.scans, 1)
+        (helpers / "extra.py").write_text("X = 1\n")
+        self.wait_for_reload(1)
+        self.assertEqual(self.watcher.scans, 2)
+
+    def test_removed_plugin_is_unloaded_and_listeners_told(self):
+        shutil.rmtree(self.ws / "plugins" / "greeter")
+        self.wait_for_reload(1)
+        self.assertNotIn("greeter", self.core.plugins)
+        self.assertEqual(self.changes, [("greeter", None)])
+
+    def test_reload_waits_for_in_flight_calls(self):
+        slow = "import time\ndef greet(slots):\n    time.sleep(0.5)\n    return 'slow'\n"
+        (self.ws / "plugins" / "greeter" / "greeter.py").write_text(slow)
+        self.core.reload_plugin("greeter")
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            call = ex.submit(self.core.run_plugin, "greeter", "greet", {})
+            while not self.core.scheduler.running("greeter"):
+                time.sleep(0.01)
+            self.core.reload_plugin("greeter")
+            self.assertTrue(call.done())
+            self.assertEqual(call.result(), "slow")
+
+
+@unittest.skipUnless(shutil.which("node"), "node not installed")
+class TestNodeHost(unittest.TestCase):
+    def setUp(self):
+        self.core = Core(BASE_DIR)
+        self.core.resolve_and_load()
+        self.lm = self.core.language_modules["nodejs"]
+
+    def tearDown(self):
+        self.core.stop_all()
+
+    def test_concurrent_calls_share_one_host(self):
+        texts = [f"msg-{i}" for i in range(20)]
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            outs = list(ex.map(lambda t: self.core.run_plugin("com.example.echo", "echo", {"text": t}), texts))
+
+        self.assertEqual([json.loads(o)["echoed"] for o in outs], texts)
+        self.assertEqual(len(self.lm.pool.workers), 1)
+
+    def test_pending_async_calls_reply_before_host_exits(self):
+        manifest = {"name": "later", "language": "nodejs", "entry": "later.js", "exports": ["later"]}
+        ws = make_workspace({"later": (manifest, {"later.js": LATER_PLUGIN})})
+        core = Core(ws)
+        try:
+            core.resolve_and_load()
+            lm = core.language_modules["nodejs"]
+            fut = lm._get_pool().submit(lm._request(core.plugins["later"]["info"], ("later", {})))
+            time.sleep(0.1)
+            lm.pool.close()   # stdin closes while the export is still awaiting
+            self.assertEqual(fut.result(timeout=5)["output"], "done")
+        finally:
+            core.stop_all()
+            shutil.rmtree(ws, ignore_errors=True)
+
+    def test_timed_out_call_does_not_block_the_host(self):
+        manifest = {"name": "spin", "language": "nodejs", "entry": "spin.js", "exports": ["spin", "ok"],
+                    "timeout": 0.5}
+        ws = make_workspace({"spin": (manifest, {"spin.js": SPIN_PLUGIN})})
+        core = Core(ws)
+        try:
+            core.resolve_and_load()
+            with self.assertRaises(PluginTimeout):
+                core.run_plugin("spin", "spin", {})
+            self.assertEqual(core.run_plugin("spin", "ok", {}), "ok")
+        finally:
+            core.stop_all()
+            shutil.rmtree(ws, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
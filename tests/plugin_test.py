@@ -6,6 +6,11 @@ def main():
     core = Core(base_dir)
     core.resolve_and_load()
     print(core.list_plugins())
+    try:
+        print(core.run_plugin("com.example.weather", "get_weather", {"city": "Paris"}))
+        print(core.run_plugin("com.example.echo", "echo", {"text": "hello"}))
+    finally:
+        core.stop_all()
 
 if __name__ == "__main__":
     main()
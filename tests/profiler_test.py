@@ -0,0 +1,64 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import profiler
+from core.core import Core
+from tests.helpers import make_workspace, COUNTER_PLUGIN
+
+
+class TestStartupProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiler._active = None
+
+    def test_phases_are_noops_until_enabled(self):
+        with profiler.phase("ignored"):
+            pass
+        self.assertIsNone(profiler.active())
+
+    def test_nested_phases_and_report(self):
+        prof = profiler.enable()
+        with profiler.phase("outer"):
+            with profiler.phase("inner"):
+                blob = bytearray(8 * 1024 * 1024)
+        report = prof.report()
+
+        self.assertEqual([(p["name"], p["depth"]) for p in report["phases"]], [("outer", 0), ("inner", 1)])
+        self.assertGreaterEqual(report["phases"][0]["wall_ms"], report["phases"][1]["wall_ms"])
+        if report["phases"][1]["rss_delta_kb"] is not None:
+            self.assertGreater(report["phases"][1]["rss_delta_kb"], 4 * 1024)
+        del blob
+
+    def test_core_records_boot_phases_per_plugin(self):
+        ws = make_workspace({"counter": ({"name": "counter", "language": "python3", "entry": "counter.py",
+                                          "exports": ["bump"], "isolation": "inprocess"},
+                                         {"counter.py": COUNTER_PLUGIN})})
+        prof = profiler.enable()
+        core = Core(ws)
+        try:
+            core.resolve_and_load()
+        finally:
+            core.stop_all()
+
+        out = os.path.join(tempfile.mkdtemp(), "profile.json")
+        prof.dump_json(out)
+        with open(out) as f:
+            report = json.load(f)
+        names = [p["name"] for p in report["phases"]]
+        for expected in ("languages.discover", "plugins.load", "language:python3", "plugins.activate"):
+            self.assertIn(expected, names)
+        self.assertIn("counter", report["plugins"])
+        self.assertIn("counter on_start", report["plugins"])
+        self.assertIn("plugins (loaded concurrently):", prof.format_table())
+        shutil.rmtree(ws, ignore_errors=True)
+        shutil.rmtree(os.path.dirname(out), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.disk = tempfile.mkdtemp(prefix="cal-cache-")
+        self.cache = ResultCache(disk_dir=self.disk)
+
+    def tearDown(self):
+        shutil.rmtree(self.disk, ignore_errors=True)
+
+    def test_hit_uses_only_key_slots(self):
+        opts = {"ttl": 60, "key": ["city"]}
+        self.cache.put("p", "1.0.0", "get", {"city": "Paris", "ts": 1}, opts, "sunny")
+
+        self.assertEqual(self.cache.get("p", "1.0.0", "get", {"city": "Paris", "ts": 2}, opts), (True, "sunny"))
+        self.assertEqual(self.cache.get("p", "1.0.0", "get", {"city": "Oslo"}, opts), (False, None))
+        self.assertEqual(self.cache.stats()["p:get"], {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_entries_expire_after_ttl(self):
+        opts = {"ttl": 10}
+        with patch("core.result_cache.time.time", return_value=100.0):
+            self.cache.put("p", "1", "get", {"a": 1}, opts, "x")
+        with patch("core.result_cache.time.time", return_value=111.0):
+            self.assertEqual(self.cache.get("p", "1", "get", {"a": 1}, opts), (False, None))
+
+    def test_lru_eviction(self):
+        opts = {"max_entries": 2}
+        for i in range(3):
+            self.cache.put("p", "1", "get", {"i": i}, opts, str(i))
+        self.assertFalse(self.cache.get("p", "1", "get", {"i": 0}, opts)[0])
+        self.assertTrue(self.cache.get("p", "1", "get", {"i": 2}, opts)[0])
+
+    def test_errors_are_not_cached(self):
+        for output in ("", "[python:error] boom", "[core:error] missing"):
+            self.cache.put("p", "1", "get", {}, {}, output)
+        self.assertFalse(self.cache.get("p", "1", "get", {}, {})[0])
+
+    def test_disk_tier_survives_new_instance_until_version_changes(self):
+        opts = {"disk": True}
+        self.cache.put("p", "1.0.0", "get", {"a": 1}, opts, '["v1"]')
+
+        fresh = ResultCache(disk_dir=self.disk)
+        self.assertEqual(fresh.get("p", "1.0.0", "get", {"a": 1}, opts), (True, '["v1"]'))
+
+        fresh.invalidate("p", keep_version="2.0.0")
+        self.assertFalse(fresh.get("p", "1.0.0", "get", {"a": 1}, opts)[0])
+        self.assertFalse(os.path.exists(os.path.join(self.disk, "p", "1.0.0")))
+
+
+if __name__ == '__main__':
+    unittest.main()
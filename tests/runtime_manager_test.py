@@ -0,0 +1,165 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+import unittest
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.runtime_manager import RuntimeManager
+
+# PATH only holds the fake runtimes while a test runs
+SLEEP = shutil.which("sleep") or "/bin/sleep"
+FAKE_RUNTIME = """#!/bin/sh
+echo run >> "{log}"
+"{sleep}" 0.3
+echo "{output}"
+"""
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "fake runtimes are shell scripts")
+class TestSystemDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="cal-rt-")
+        self.bin_dir = os.path.join(self.tmp, "bin")
+        os.makedirs(self.bin_dir)
+        self.write_bin("node", "v20.1.0")
+        self.write_bin("python3", "Python 3.12.1")
+        self.write_bin("go", "go version go1.22.0 linux/amd64")
+        self.env = mock.patch.dict(os.environ, {"PATH": self.bin_dir})
+        self.env.start()
+        os.environ.pop("CAL_BASE_DIR", None)
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write_bin(self, name, output):
+        path = os.path.join(self.bin_dir, name)
+        with open(path, "w") as f:
+            f.write(FAKE_RUNTIME.format(log=os.path.join(self.tmp, f"{name}.log"), output=output, sleep=SLEEP))
+        os.chmod(path, 0o755)
+
+    def runs(self, name):
+        try:
+            with open(os.path.join(self.tmp, f"{name}.log")) as f:
+                return len(f.read().split())
+        except FileNotFoundError:
+            return 0
+
+    def manager(self):
+        return RuntimeManager(base_dir=os.path.join(self.tmp, "cal_ai"))
+
+    def test_probes_run_in_parallel_and_are_cached(self):
+        started = time.perf_counter()
+        rm = self.manager()
+        self.assertEqual(rm.system_runtime("node"), (os.path.join(self.bin_dir, "node"), "20.1.0"))
+        self.assertLess(time.perf_counter() - started, 0.8)   # three 0.3s probes at once
+        self.assertEqual(rm.find_installed_versions("python"), ["3.12.1"])
+
+        # a fresh process reuses the cache without running anything
+        self.assertEqual(self.manager().system_runtime("go")[1], "1.22.0")
+        self.assertEqual([self.runs(b) for b in ("node", "python3", "go")], [1, 1, 1])
+
+    def test_changed_binary_is_reprobed_alone(self):
+        self.manager().discover_system_runtimes()
+        time.sleep(0.01)
+        self.write_bin("node", "v21.0.0")
+
+        rm = self.manager()
+        self.assertEqual(rm.system_runtime("node")[1], "21.0.0")
+        self.assertEqual(rm.find_installed_versions("node"), ["21.0.0"])
+        self.assertEqual([self.runs(b) for b in ("node", "python3", "go")], [2, 1, 1])
+
+    def test_path_change_invalidates_every_probe(self):
+        self.manager().discover_system_runtimes()
+        os.environ["PATH"] = self.bin_dir + os.pathsep + os.path.join(self.tmp, "missing")
+        self.manager().discover_system_runtimes()
+        self.assertEqual([self.runs(b) for b in ("node", "python3", "go")], [2, 2, 2])
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "simulated runtimes are shell scripts")
+class TestInstallStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="cal-rt-")
+        # no system runtimes, so every request provisions
+        self.env = mock.patch.dict(os.environ, {"PATH": os.path.join(self.tmp, "empty")})
+        self.env.start()
+        os.environ.pop("CAL_BASE_DIR", None)
+        self.rm = RuntimeManager(base_dir=os.path.join(self.tmp, "cal_ai"))
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def exe(self, version):
+        return os.path.join(self.rm.base_dir, "runtimes", "node", version, "bin", "node_runtime")
+
+    def test_parallel_provisioning_shares_blobs(self):
+        results = self.rm.provision([("node", "20.6.0"), ("node", "18.17.1"), ("go", "1.21.3"), ("node", "20.6.0")])
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[("node", "18.17.1")][1], "18.17.1")
+        self.assertEqual(len(list(self.rm.blobs.keys())), 2)   # one script per language
+
+        out = subprocess.run([self.exe("18.17.1")], input="ping\n", capture_output=True, text=True,
+                             env={"PATH": os.defpath})
+        self.assertEqual(out.stdout, "ping\n")
+        self.assertIn("node 18.17.1", out.stderr)
+        self.assertEqual(self.rm.ensure_runtime("node", "^18")[1], "18.17.1")
+
+    def test_partial_spec_resolves_to_installed_version(self):
+        self.rm.ensure_runtime("node", "20.6.0")
+        self.assertEqual(self.rm.find_compatible_version(["20.6.0", "18.17.1"], "20.6"), "20.6.0")
+        self.assertEqual(self.rm.find_compatible_version(["20.6.0"], "v20.6.0"), "20.6.0")
+        path, version = self.rm.ensure_runtime("node", "20.6")
+        self.assertEqual(version, "20.6.0")
+        self.assertTrue(path.startswith(os.path.join(self.rm.base_dir, "runtimes", "node", "20.6.0")))
+
+    def test_verify_detects_changed_files(self):
+        self.rm.ensure_runtime("node", "20.6.0")
+        self.assertEqual(self.rm.verify_runtime("node", "20.6.0"), [])
+        os.unlink(self.exe("20.6.0"))
+        self.assertEqual(self.rm.verify_runtime("node", "20.6.0"), ["bin/node_runtime"])
+        with open(self.exe("20.6.0"), "w") as f:
+            f.write("#!/bin/sh\n")
+        self.assertEqual(self.rm.verify_runtime("node", "20.6.0"), ["bin/node_runtime"])
+
+        # a damaged tree is rebuilt instead of reused
+        self.rm.download_and_install("node", "20.6.0")
+        self.assertEqual(self.rm.verify_runtime("node", "20.6.0"), [])
+
+    def test_tampered_tree_does_not_poison_reinstalls(self):
+        self.rm.provision([("node", "20.6.0"), ("node", "18.17.1")])
+        exe = self.exe("20.6.0")
+        os.chmod(exe, 0o755)
+        with open(exe, "a") as f:   # in place: the blob too, if the tree was hardlinked
+            f.write("echo tampered\n")
+        self.assertEqual(self.rm.verify_runtime("node", "20.6.0"), ["bin/node_runtime"])
+
+        self.rm.download_and_install("node", "20.6.0")
+        self.assertEqual(self.rm.verify_runtime("node", "20.6.0"), [])
+        key = next(iter(self.rm._read_meta(os.path.dirname(os.path.dirname(exe)))["files"].values()))["blob"]
+        self.assertTrue(self.rm.blobs.verify(key))
+        self.rm.download_and_install("node", "19.0.0")
+        self.assertEqual(self.rm.verify_runtime("node", "19.0.0"), [])
+
+    def test_gc_removes_unreferenced_versions_and_blobs(self):
+        self.rm.provision([("node", "20.6.0"), ("node", "18.17.1"), ("go", "1.21.3")])
+        os.makedirs(os.path.join(self.rm.base_dir, "runtimes", "node", ".19.0.0.tmp"))
+
+        report = self.rm.gc(keep=[("node", "20.6.0")])
+        self.assertEqual(sorted(report["runtimes"]), [("go", "1.21.3"), ("node", "18.17.1")])
+        self.assertEqual(report["blobs"], 1)
+        self.assertEqual(os.listdir(os.path.join(self.rm.base_dir, "runtimes", "node")), ["20.6.0"])
+        self.assertEqual(self.rm.find_installed_versions("node"), ["20.6.0"])
+        self.assertEqual(self.rm.verify_runtime("node", "20.6.0"), [])
+
+        self.assertEqual(self.rm.gc(), {"runtimes": [], "blobs": 0, "bytes": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import unittest
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import runtime_store
+from core.runtime_store import RuntimeStore
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+WRITER = """
+import sys
+sys.path.insert(0, {root!r})
+from core.runtime_store import RuntimeStore
+store = RuntimeStore({path!r}, {locks!r})
+for i in range(40):
+    store.set(('python', '{worker}.%d' % i), '/opt/{worker}')
+    if i % 8 == 7:
+        store.flush()
+store.flush()
+"""
+
+
+class TestRuntimeStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="cal-store-")
+        self.path = os.path.join(self.tmp, "runtime_cache.json")
+        self.locks = os.path.join(self.tmp, "locks")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def store(self):
+        return RuntimeStore(self.path, self.locks)
+
+    def on_disk(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_changes_are_batched_into_one_atomic_write(self):
+        store = self.store()
+        for i in range(20):
+            store.set(("node", f"20.{i}.0"), f"/opt/node{i}")
+        store.delete(("node", "20.0.0"))
+        self.assertEqual(store.writes, 0)
+        self.assertEqual(len(store.snapshot()["node"]), 19)
+        self.assertFalse(os.path.exists(self.path))
+
+        store.flush()
+        self.assertEqual(store.writes, 1)
+        self.assertEqual(len(self.on_disk()["node"]), 19)
+        self.assertEqual(sorted(os.listdir(self.tmp)), ["locks", "runtime_cache.json"])   # no temp files left
+        store.flush()
+        self.assertEqual(store.writes, 1)
+
+    def test_write_behind_timer_flushes(self):
+        with mock.patch.object(runtime_store, "FLUSH_DELAY", 0.05):
+            store = self.store()
+            store.set(("go", "1.22.0"), "/usr/bin")
+            store.set(("go", "1.21.0"), "/opt/go")
+            time.sleep(0.3)
+        self.assertEqual(store.writes, 1)
+        self.assertEqual(set(self.on_disk()["go"]), {"1.22.0", "1.21.0"})
+
+    def test_snapshots_are_stable_and_merge_other_writers(self):
+        a, b = self.store(), self.store()
+        a.set(("python", "3.11.5"), "/opt/a")
+        a.flush()
+        before = a.snapshot()
+
+        b.set(("python", "3.12.1"), "/opt/b")
+        b.flush()
+        a.set(("node", "20.1.0"), "/opt/a")   # pending while b's write lands
+        generation = a.generation
+        after = a.refresh()
+
+        self.assertEqual(before["python"], {"3.11.5": "/opt/a"})
+        self.assertEqual(set(after["python"]), {"3.11.5", "3.12.1"})
+        self.assertEqual(after["node"], {"20.1.0": "/opt/a"})
+        self.assertGreater(a.generation, generation)
+        a.flush()
+        self.assertEqual(set(self.on_disk()), {"python", "node"})
+
+    @unittest.skipIf(sys.platform.startswith("win"), "needs flock")
+    def test_concurrent_processes_lose_no_updates(self):
+        procs = [subprocess.Popen([sys.executable, "-c", WRITER.format(root=ROOT, path=self.path, locks=self.locks, worker=w)])
+                 for w in range(4)]
+        for p in procs:
+            self.assertEqual(p.wait(timeout=60), 0)
+        self.assertEqual(len(self.on_disk()["python"]), 160)
+        self.assertEqual(self.store().get("python", "3.39"), "/opt/3")
+
+
+if __name__ == '__main__':
+    unittest.main()
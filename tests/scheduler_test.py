@@ -0,0 +1,94 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.scheduler import Scheduler, SchedulerRejected, QueueTimeout, INTERACTIVE, BACKGROUND
+
+
+class TestScheduler(unittest.TestCase):
+    def test_interactive_jumps_ahead_of_queued_background(self):
+        sched = Scheduler(language_limit=1, background_share=1.0)
+        first = sched.acquire("python3", "a")
+        order = []
+
+        def waiter(priority):
+            ticket = sched.acquire("python3", "a", priority)
+            order.append(priority)
+            sched.release(ticket)
+
+        bg = threading.Thread(target=waiter, args=(BACKGROUND,))
+        bg.start()
+        while sched.stats()["queued"][BACKGROUND] == 0:
+            time.sleep(0.001)
+        fg = threading.Thread(target=waiter, args=(INTERACTIVE,))
+        fg.start()
+        while sched.stats()["queued"][INTERACTIVE] == 0:
+            time.sleep(0.001)
+
+        sched.release(first)
+        bg.join(); fg.join()
+        self.assertEqual(order, [INTERACTIVE, BACKGROUND])
+
+    def test_plugin_cap_does_not_block_other_plugins(self):
+        sched = Scheduler(language_limit=4)
+        sched.set_plugin_limit("a", 1)
+        sched.acquire("python3", "a")
+        with self.assertRaises(QueueTimeout):
+            sched.acquire("python3", "a", timeout=0.05)
+        self.assertTrue(sched.acquire("python3", "b", timeout=0.05).granted)
+
+    def test_background_share_leaves_room_for_interactive(self):
+        sched = Scheduler(language_limit=4, background_share=0.5)
+        sched.acquire("nodejs", "a", BACKGROUND)
+        sched.acquire("nodejs", "b", BACKGROUND)
+        with self.assertRaises(QueueTimeout):
+            sched.acquire("nodejs", "c", BACKGROUND, timeout=0.05)
+        self.assertTrue(sched.acquire("nodejs", "c", INTERACTIVE).granted)
+
+    def test_full_queue_rejects(self):
+        sched = Scheduler(language_limit=1, queue_limits={INTERACTIVE: 0})
+        sched.acquire("python3", "a")
+        with self.assertRaises(SchedulerRejected):
+            sched.acquire("python3", "a")
+        self.assertEqual(sched.stats()["rejected"][INTERACTIVE], 1)
+
+    def test_async_waiter_is_woken_by_release(self):
+        sched = Scheduler(language_limit=1)
+
+        async def scenario():
+            held = await sched.acquire_async("python3", "a")
+            waiter = asyncio.ensure_future(sched.acquire_async("python3", "a", timeout=2))
+            await asyncio.sleep(0.01)
+            self.assertFalse(waiter.done())
+            sched.release(held)
+            ticket = await waiter
+            sched.release(ticket)
+            return ticket
+
+        ticket = asyncio.run(scenario())
+        self.assertGreater(ticket.waited, 0)
+        self.assertEqual(sched.stats()["running"], {})
+
+
+    def test_pause_drains_running_calls_and_holds_new_ones(self):
+        sched = Scheduler(language_limit=4)
+        held = sched.acquire("python3", "a")
+        sched.pause("a")
+        self.assertFalse(sched.drain("a", timeout=0.05))
+        with self.assertRaises(QueueTimeout):
+            sched.acquire("python3", "a", timeout=0.05)
+        self.assertTrue(sched.acquire("python3", "b", timeout=0.05).granted)
+
+        threading.Timer(0.05, sched.release, args=(held,)).start()
+        self.assertTrue(sched.drain("a", timeout=2))
+        sched.resume("a")
+        self.assertTrue(sched.acquire("python3", "a", timeout=0.05).granted)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.semver_utils import Version, VersionIndex, parse_range, satisfies
+
+
+class TestRanges(unittest.TestCase):
+    def check(self, spec, matching, rejected):
+        for v in matching:
+            self.assertTrue(satisfies(v, spec), f"{v} should satisfy {spec}")
+        for v in rejected:
+            self.assertFalse(satisfies(v, spec), f"{v} should not satisfy {spec}")
+
+    def test_caret_and_tilde(self):
+        self.check("^1.2.3", ["1.2.3", "1.9.0"], ["1.2.2", "2.0.0", "2.0.0-rc1"])
+        self.check("^0.2.3", ["0.2.3", "0.2.9"], ["0.3.0"])
+        self.check("^0.0.3", ["0.0.3"], ["0.0.4"])
+        self.check("~1.2", ["1.2.0", "1.2.9"], ["1.3.0"])
+        self.check("~1", ["1.0.0", "1.9.9"], ["2.0.0"])
+
+    def test_partials_wildcards_and_comparators(self):
+        self.check("*", ["0.0.1", "9.9.9"], ["1.0.0-beta"])
+        self.check("1.x", ["1.0.0", "1.5.2"], ["2.0.0", "0.9.9"])
+        self.check("1.2", ["1.2.0", "1.2.7"], ["1.3.0"])
+        self.check(">1.2", ["1.3.0"], ["1.2.9", "1.3.0-rc"])
+        self.check("<=1.2", ["1.2.9"], ["1.3.0"])
+        self.check(">=1.0 <2", ["1.0.0", "1.99.0"], ["2.0.0", "0.9.0"])
+        self.check(">= 1.0.0", ["1.0.0"], ["0.9.9"])
+
+    def test_hyphen_and_alternatives(self):
+        self.check("1.2 - 2.3.4", ["1.2.0", "2.3.4"], ["2.3.5", "1.1.9"])
+        self.check("1.2.3 - 2", ["2.9.9"], ["3.0.0"])
+        self.check("~1.2 || >=3", ["1.2.5", "3.0.0", "4.1.0"], ["2.0.0"])
+
+    def test_requirement_ranges(self):
+        # the forms plugin manifests use in "requires"
+        self.check("^1.2", ["1.4.0"], ["2.0.0"])
+        self.check("~1.2", ["1.2.9"], ["1.3.0"])
+        self.check(">= 1.0 <2.0", ["1.5.0"], [])
+        self.check("^1.0 || ^3.0", ["3.1.0"], [])
+
+    def test_prereleases(self):
+        self.assertTrue(Version("1.0.0-alpha") < Version("1.0.0-alpha.1") < Version("1.0.0-beta") < Version("1.0.0"))
+        self.assertTrue(Version("1.0.0-2") < Version("1.0.0-10"))
+        self.check(">=1.2.3-rc1", ["1.2.3-rc2", "1.2.3", "1.4.0"], ["1.4.0-rc1"])
+        self.assertTrue(satisfies("2.1.0-rc1", "^1.0 || ^2.0", include_prerelease=True))
+        self.assertFalse(satisfies("2.1.0-rc1", "^1.0 || ^2.0"))
+
+    def test_invalid_range(self):
+        with self.assertRaises(ValueError):
+            parse_range("^abc")
+
+
+class TestVersionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = VersionIndex(["3.9.1", "3.12.1", "3.10.2", "2.7.18", "3.11.5", "3.12.0-rc1"])
+
+    def test_sorted_and_latest(self):
+        self.assertEqual(list(self.index), ["2.7.18", "3.9.1", "3.10.2", "3.11.5", "3.12.0-rc1", "3.12.1"])
+        self.assertEqual(self.index.latest(), "3.12.1")
+
+    def test_max_satisfying(self):
+        self.assertEqual(self.index.max_satisfying("^3.9"), "3.12.1")
+        self.assertEqual(self.index.max_satisfying("~3.10 || 2"), "3.10.2")
+        self.assertEqual(self.index.max_satisfying("<3.12"), "3.11.5")
+        self.assertEqual(self.index.max_satisfying(">=3.12.0-rc1 <3.12.1"), "3.12.0-rc1")
+        self.assertIsNone(self.index.max_satisfying("4"))
+
+    def test_add_remove(self):
+        self.index.add("3.13.0")
+        self.index.add("3.13.0")
+        self.assertEqual(len(self.index), 7)
+        self.assertEqual(self.index.max_satisfying("3"), "3.13.0")
+        self.index.remove("3.13.0")
+        self.assertNotIn("3.13.0", self.index)
+        self.assertIn("3.11.5", self.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
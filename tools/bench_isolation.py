@@ -0,0 +1,60 @@
+# benchmark Python plugin isolation modes against each other
+#   python -m tools.bench_isolation [--calls N]
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from core.core import Core
+
+PLUGIN = "com.example.weather"
+EXPORT = "get_weather"
+
+
+def bench(fn, calls):
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        fn({"city": f"city-{i}"})
+        samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--calls', type=int, default=50, help='calls per isolation mode')
+    args = ap.parse_args()
+
+    core = Core(Path(__file__).parent.parent)
+    core.resolve_and_load()
+    lm = core.language_modules["python3"]
+    path = core.plugins[PLUGIN]["info"]["path"]
+    lm.fork_preload.add(path)
+
+    modes = ["spawn", "fork", "process"]
+    results = {}
+    try:
+        for mode in modes:
+            info = {"path": path, "isolation": mode}
+            lm.run_code(info, EXPORT, {})   # warm up pools before timing
+            results[mode] = bench(lambda slots: lm.run_code(info, EXPORT, slots), args.calls)
+
+        module = lm.load_inprocess({"path": path})
+        export = getattr(module, EXPORT)
+        results["inprocess"] = bench(lambda slots: lm.format_result(export(slots)), args.calls)
+    finally:
+        core.stop_all()
+
+    print(f"\n{'mode':<10} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<10} {r['mean']:>10.3f} {r['p50']:>10.3f} {r['p95']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
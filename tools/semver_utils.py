@@ -1,22 +1,233 @@
 # minimal version helper used by runtime manager
 import re
-from functools import total_ordering
+from bisect import bisect_left, bisect_right
+from functools import total_ordering, lru_cache
+
+_VERSION = re.compile(r'^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?')
+
+def _prerelease_key(tag):
+    # release sorts after all of its pre-releases; numeric identifiers sort before alphanumeric ones
+    if not tag:
+        return (1,)
+    return (0,) + tuple((0, int(p), '') if p.isdigit() else (1, 0, p) for p in tag.split('.'))
 
 @total_ordering
 class Version:
+    __slots__ = ('raw', 'parts', 'prerelease', 'key')
+
     def __init__(self, s):
         self.raw = str(s)
-        m = re.match(r'^(\d+)(?:\.(\d+))?(?:\.(\d+))?', self.raw)
+        m = _VERSION.match(self.raw.strip())
         if not m:
             self.parts = (0,0,0)
+            self.prerelease = None
         else:
-            parts = [int(x) if x is not None else 0 for x in m.groups()]
-            while len(parts) < 3:
-                parts.append(0)
-            self.parts = tuple(parts)
+            self.parts = tuple(int(x) if x is not None else 0 for x in m.groups()[:3])
+            self.prerelease = m.group(4)
+        self.key = (self.parts, _prerelease_key(self.prerelease))
     def __lt__(self, other):
-        return self.parts < other.parts
+        return self.key < other.key
     def __eq__(self, other):
-        return self.parts == other.parts
+        return isinstance(other, Version) and self.key == other.key
+    def __hash__(self):
+        return hash(self.key)
     def __repr__(self):
-        return ".".join(str(x) for x in self.parts)
+        base = ".".join(str(x) for x in self.parts)
+        return f"{base}-{self.prerelease}" if self.prerelease else base
+
+@lru_cache(maxsize=1024)
+def parse_version(s):
+    """Cached Version(s); Version objects are immutable in practice, so sharing is safe."""
+    return Version(s)
+
+# ---------------------------------------------------------------------------
+# Ranges (npm-style): '*', '1.x', '1.2.3', '^1.2', '~1.2', '>=1.0 <2.0',
+# '1.2 - 2.3.4', alternatives joined by '||', optional pre-release tags.
+# ---------------------------------------------------------------------------
+
+_WILDCARDS = ('*', 'x', 'X')
+_PARTIAL = re.compile(r'^v?(\*|x|X|\d+)(?:\.(\*|x|X|\d+))?(?:\.(\*|x|X|\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+_OPERATOR_SPACE = re.compile(r'(>=|<=|>|<|=|\^|~)\s+')
+_HYPHEN = re.compile(r'^(\S+)\s+-\s+(\S+)$')
+_COMPARATOR = re.compile(r'^(>=|<=|>|<|=|\^|~)?(.*)$')
+
+def _partial(text):
+    """(major, minor, patch, prerelease) with None for missing or wildcard parts."""
+    m = _PARTIAL.match(text)
+    if not m:
+        raise ValueError(f"Invalid version in range: '{text}'")
+    nums = [None if p is None or p in _WILDCARDS else int(p) for p in m.groups()[:3]]
+    # nothing after a wildcard counts
+    for i in range(3):
+        if nums[i] is None:
+            nums[i + 1:] = [None] * (2 - i)
+            break
+    return nums[0], nums[1], nums[2], m.group(4)
+
+def _v(major, minor=0, patch=0, pre=None):
+    return Version(f"{major}.{minor}.{patch}" + (f"-{pre}" if pre else ""))
+
+def _bump(major, minor, pre='0'):
+    """First version above a partial: 1 -> 2.0.0-0, 1.2 -> 1.3.0-0 (without the -0 for lower bounds)."""
+    if minor is None:
+        return _v(major + 1, pre=pre)
+    return _v(major, minor + 1, pre=pre)
+
+def _desugar(op, text):
+    """One range token -> list of primitive (op, Version) comparators."""
+    if text in _WILDCARDS or text == '':
+        return [] if op in (None, '=', '>=', '<=', '^', '~') else [('<', _v(0, pre='0'))]
+    major, minor, patch, pre = _partial(text)
+    if major is None:
+        return []
+    full = patch is not None
+    low = _v(major, minor or 0, patch or 0, pre)
+
+    if op == '^':
+        if major > 0 or minor is None:
+            high = _v(major + 1, pre='0')
+        elif minor > 0 or patch is None:
+            high = _v(0, minor + 1, pre='0')
+        else:
+            high = _v(0, 0, patch + 1, pre='0')
+        return [('>=', low), ('<', high)]
+    if op == '~':
+        high = _v(major + 1, pre='0') if minor is None else _v(major, minor + 1, pre='0')
+        return [('>=', low), ('<', high)]
+    if op in (None, '='):
+        return [('=', low)] if full else [('>=', low), ('<', _bump(major, minor))]
+    if op == '>':
+        return [('>', low)] if full else [('>=', _bump(major, minor, pre=None))]
+    if op == '<=':
+        return [('<=', low)] if full else [('<', _bump(major, minor))]
+    if op == '<':
+        return [('<', _v(major, minor or 0, 0, pre or '0') if not full else low)]
+    return [('>=', low)]
+
+_TESTS = {
+    '=': lambda v, b: v == b,
+    '>': lambda v, b: v > b,
+    '>=': lambda v, b: v >= b,
+    '<': lambda v, b: v < b,
+    '<=': lambda v, b: v <= b,
+}
+
+class ComparatorSet:
+    """Comparators that must all hold (one '||' alternative)."""
+    __slots__ = ('comparators', 'lower', 'upper')
+
+    def __init__(self, comparators):
+        self.comparators = tuple(comparators)
+        # tightest bounds, used to bisect into a sorted VersionIndex
+        self.lower = None    # (Version, inclusive)
+        self.upper = None
+        for op, bound in self.comparators:
+            if op in ('>', '>=', '='):
+                cand = (bound, op != '>')
+                if self.lower is None or (bound, not cand[1]) > (self.lower[0], not self.lower[1]):
+                    self.lower = cand
+            if op in ('<', '<=', '='):
+                cand = (bound, op != '<')
+                if self.upper is None or (bound, cand[1]) < (self.upper[0], self.upper[1]):
+                    self.upper = cand
+
+    def test(self, version, include_prerelease=False):
+        if not all(_TESTS[op](version, bound) for op, bound in self.comparators):
+            return False
+        if version.prerelease and not include_prerelease:
+            # a pre-release only matches if the range names one on the same release
+            return any(b.prerelease and b.parts == version.parts for _, b in self.comparators)
+        return True
+
+class Range:
+    __slots__ = ('raw', 'sets')
+
+    def __init__(self, spec):
+        self.raw = str(spec)
+        self.sets = []
+        for alternative in self.raw.split('||'):
+            alternative = alternative.strip()
+            hyphen = _HYPHEN.match(alternative)
+            if hyphen:
+                comparators = _desugar('>=', hyphen.group(1)) + _desugar('<=', hyphen.group(2))
+            else:
+                comparators = []
+                for token in _OPERATOR_SPACE.sub(r'\1', alternative).split():
+                    op, text = _COMPARATOR.match(token).groups()
+                    comparators += _desugar(op, text)
+            self.sets.append(ComparatorSet(comparators))
+
+    def test(self, version, include_prerelease=False):
+        version = version if isinstance(version, Version) else parse_version(version)
+        return any(s.test(version, include_prerelease) for s in self.sets)
+
+@lru_cache(maxsize=512)
+def parse_range(spec):
+    return Range('*' if spec in (None, '', 'latest') else spec)
+
+def satisfies(version, spec, include_prerelease=False):
+    """
+    True if version matches spec: '*', '1.x', '1.2.3', '^1.2', '~1.2', '>=1.0 <2.0',
+    '1.2 - 2.3.4'; alternatives may be joined with '||'.
+    """
+    return parse_range(spec).test(version, include_prerelease)
+
+class VersionIndex:
+    """
+    Sorted, parsed versions for one language; resolving a range bisects to the
+    range's upper bound and walks down instead of scanning every version.
+    """
+    __slots__ = ('versions',)
+
+    def __init__(self, raw_versions=()):
+        self.versions = sorted(parse_version(v) for v in raw_versions)
+
+    def __len__(self):
+        return len(self.versions)
+
+    def __iter__(self):
+        return (v.raw for v in self.versions)
+
+    def __contains__(self, raw):
+        v = parse_version(raw)
+        i = bisect_left(self.versions, v)
+        return i < len(self.versions) and self.versions[i] == v
+
+    def add(self, raw):
+        v = parse_version(raw)
+        i = bisect_left(self.versions, v)
+        if i == len(self.versions) or self.versions[i] != v:
+            self.versions.insert(i, v)
+
+    def remove(self, raw):
+        v = parse_version(raw)
+        i = bisect_left(self.versions, v)
+        if i < len(self.versions) and self.versions[i] == v:
+            del self.versions[i]
+
+    def latest(self, include_prerelease=False):
+        for v in reversed(self.versions):
+            if include_prerelease or not v.prerelease:
+                return v.raw
+        return None
+
+    def max_satisfying(self, spec, include_prerelease=False):
+        """Highest indexed version (raw string) matching spec, or None."""
+        best = None
+        for cset in parse_range(spec).sets:
+            if cset.upper is None:
+                hi = len(self.versions)
+            elif cset.upper[1]:
+                hi = bisect_right(self.versions, cset.upper[0])
+            else:
+                hi = bisect_left(self.versions, cset.upper[0])
+            for i in range(hi - 1, -1, -1):
+                v = self.versions[i]
+                if best is not None and v <= best:
+                    break
+                if cset.lower is not None and (v < cset.lower[0] or (v == cset.lower[0] and not cset.lower[1])):
+                    break
+                if cset.test(v, include_prerelease):
+                    best = v
+                    break
+        return best.raw if best is not None else None